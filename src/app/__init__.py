@@ -0,0 +1,3 @@
+# Recorded in the manifests of the generated subtitles, so they are generated again
+# when the tool changes. Increase it when the generated output changes.
+__version__ = '0.2.0'
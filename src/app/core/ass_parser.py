@@ -0,0 +1,77 @@
+from typing import Iterable, Iterator
+import re
+from app.core.cue import Cue
+
+# Same rules as asstosrt, which was used before to convert ASS subtitles
+MIN_DURATION_MILLISECONDS = 200
+_OVERRIDE_TAGS_REGEX = re.compile(r'{.*?}')
+_DRAWING_END_TAG = r'{\p0}'
+
+
+def _parse_timestamp(timestamp: str) -> int:
+    '''Parses an ASS timestamp like `0:01:20.35`, the last part being centiseconds, to milliseconds'''
+    hours, minutes, seconds = timestamp.split(':', 2)
+    seconds, centiseconds = seconds.split('.')
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 \
+        + max(int(centiseconds) * 10, 0)
+
+
+def _get_lines(lines: Iterable[str]) -> Iterator[str]:
+    '''Strips the lines and skips the comments'''
+    for line in lines:
+        line = line.strip()
+        if not line.startswith(';'):
+            yield line
+
+
+def iter_ass(lines: Iterable[str]) -> Iterator[Cue]:
+    '''
+    Parses the `Dialogue` lines of the `[Events]` section lazily, in the order of the file.
+    Override tags are removed and `\\N` line breaks are converted. Drawings and dialogues
+    shorter than MIN_DURATION_MILLISECONDS are skipped. The cues have no index.
+    '''
+    stripped_lines = _get_lines(lines)
+    for line in stripped_lines:
+        if line.startswith('[Events]'):
+            break
+
+    columns: list[str] | None = None
+    for line in stripped_lines:
+        if line.startswith('Format:'):
+            columns = [column.strip().lower()
+                       for column in line[len('Format:'):].split(',')]
+            break
+    if columns is None:
+        raise ValueError('Events section or its Format line not found')
+
+    start_column = columns.index('start')
+    end_column = columns.index('end')
+    text_column = columns.index('text')
+
+    for line in stripped_lines:
+        if line.startswith('['):
+            return
+        if not line.startswith('Dialogue:'):
+            continue
+
+        values = line[len('Dialogue:'):].split(',', len(columns) - 1)
+        start = _parse_timestamp(values[start_column])
+        end = _parse_timestamp(values[end_column])
+        text = values[text_column]
+        if end - start < MIN_DURATION_MILLISECONDS or text.endswith(_DRAWING_END_TAG):
+            continue
+
+        text = _OVERRIDE_TAGS_REGEX.sub('', text)
+        yield Cue(
+            start=start,
+            end=end,
+            content=text.replace('\\N', '\n').replace('\\n', '\n'))
+
+
+def iter_ass_sorted(lines: Iterable[str]) -> Iterator[Cue]:
+    '''
+    Like `iter_ass`, but the cues are sorted by start time. Unlike SRT cues, ASS dialogues are
+    often not in order, e.g. when grouped by style, so they are all parsed before the first one
+    is yielded, on the first iteration.
+    '''
+    yield from sorted(iter_ass(lines), key=lambda cue: cue.start)
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from operator import attrgetter
+from typing import TYPE_CHECKING, Iterable
+import re
+
+if TYPE_CHECKING:
+    # Only needed to convert from and to `srt`, which the pipeline does not use
+    import srt
+
+_TIMESTAMP_REGEX = re.compile(
+    r'^([0-9]+)[,.:，．。：]([0-9]+)[,.:，．。：]([0-9]+)[,.:，．。：]?([0-9]*)$')
+_BLANK_LINES_REGEX = re.compile(r'\n\n+')
+_MILLISECOND = timedelta(milliseconds=1)
+
+
+def timestamp_to_milliseconds(timestamp: str) -> int:
+    '''Parses a SRT timestamp like `00:01:20,350`, accepting the same variants as `srt`'''
+    match = _TIMESTAMP_REGEX.match(timestamp)
+    if match is None:
+        raise ValueError(f'Unparseable timestamp: {timestamp}')
+    hours, minutes, seconds, milliseconds = match.groups()
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 \
+        + (int(milliseconds) if milliseconds else 0)
+
+
+def milliseconds_to_timestamp(milliseconds: int) -> str:
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return '%02d:%02d:%02d,%03d' % (hours, minutes, seconds, milliseconds)
+
+
+class Cue:
+    '''
+    A subtitle with its timings in milliseconds. It is lighter than `srt.Subtitle`,
+    which has a dict per instance and `timedelta` timings, so it is used in the whole
+    pipeline and the subtitles are only converted when read or written.
+    '''
+    __slots__ = ('start', 'end', 'content', 'index', 'proprietary')
+
+    def __init__(
+            self,
+            start: int,
+            end: int,
+            content: str,
+            index: int | None = None,
+            proprietary: str = '') -> None:
+        '''
+        Parameters:
+        start, end: Timings in milliseconds.
+        proprietary: Text after the timings of a SRT cue, like positions.
+        '''
+        self.start = start
+        self.end = end
+        self.content = content
+        self.index = index
+        self.proprietary = proprietary
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Cue):
+            return NotImplemented
+        return (self.start, self.end, self.content, self.index, self.proprietary) \
+            == (other.start, other.end, other.content, other.index, other.proprietary)
+
+    def __repr__(self) -> str:
+        return f'Cue(start={self.start}, end={self.end}, content={self.content!r}, ' \
+            f'index={self.index}, proprietary={self.proprietary!r})'
+
+    def copy(self) -> 'Cue':
+        return Cue(self.start, self.end, self.content, self.index, self.proprietary)
+
+    @staticmethod
+    def from_subtitle(subtitle: 'srt.Subtitle') -> 'Cue':
+        return Cue(
+            start=subtitle.start // _MILLISECOND,
+            end=subtitle.end // _MILLISECOND,
+            content=subtitle.content,
+            index=subtitle.index,
+            proprietary=subtitle.proprietary)
+
+    def to_subtitle(self) -> 'srt.Subtitle':
+        import srt
+        return srt.Subtitle(
+            index=self.index,
+            start=timedelta(milliseconds=self.start),
+            end=timedelta(milliseconds=self.end),
+            content=self.content,
+            proprietary=self.proprietary)
+
+    def to_srt(self) -> str:
+        '''The SRT block of the cue, formatted like `srt.Subtitle.to_srt`'''
+        content = self.content
+        if content == '' or content[0] == '\n' or '\n\n' in content:
+            content = _BLANK_LINES_REGEX.sub('\n', content.strip('\n'))
+        proprietary = ' ' + self.proprietary if self.proprietary else ''
+        return f'{self.index or 0}\n{milliseconds_to_timestamp(self.start)} --> ' \
+            f'{milliseconds_to_timestamp(self.end)}{proprietary}\n{content}\n\n'
+
+
+def should_skip(cue: Cue) -> bool:
+    '''Same rules as `srt`, for cues that are not useful'''
+    return cue.content.strip() == '' or cue.start < 0 or cue.start >= cue.end
+
+
+def sort_and_reindex(cues: Iterable[Cue], start_index: int = 1) -> list[Cue]:
+    '''Sorts the cues by their timings, skips the ones not useful and reindexes the rest'''
+    sorted_cues = [cue for cue in sorted(cues, key=attrgetter('start', 'end'))
+                   if not should_skip(cue)]
+    for index, cue in enumerate(sorted_cues, start=start_index):
+        cue.index = index
+    return sorted_cues
+
+
+def compose(cues: Iterable[Cue]) -> str:
+    '''Like `srt.compose`, the cues are sorted, reindexed and the ones not useful skipped'''
+    return ''.join(cue.to_srt() for cue in sort_and_reindex(cues))
@@ -0,0 +1,105 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterator
+
+
+class IntervalIndex:
+    '''
+    Intervals sorted by their start, to find in O(log n) the ones starting in a range
+    or the first one containing a point, even when the intervals overlap each other.
+    The largest end of the intervals starting up to each position is kept, so a long
+    interval does not make the other lookups scan the intervals starting after it.
+    '''
+
+    def __init__(self, starts: list[int], ends: list[int]) -> None:
+        '''
+        Parameters:
+        starts, ends: Timings of each interval in milliseconds.
+        '''
+        self._ends = ends
+        self._order = list(range(len(starts)))
+        if any(starts[index] > starts[index + 1] for index in range(len(starts) - 1)):
+            self._order.sort(key=starts.__getitem__)
+            self._starts = [starts[index] for index in self._order]
+        else:
+            self._starts = starts
+        self._max_ends: list[int] = []
+        for index in self._order:
+            self._max_ends.append(max(ends[index], self._max_ends[-1]) if self._max_ends else ends[index])
+
+    def starting_between(self, low: int, high: int) -> Iterator[int]:
+        '''Indexes of the intervals starting after `low` and before `high`, ordered by start'''
+        for position in range(bisect_right(self._starts, low), bisect_left(self._starts, high)):
+            yield self._order[position]
+
+    def containing(self, point: int) -> Iterator[int]:
+        '''
+        Indexes of the intervals starting at or before `point` and ending after it, ordered by start.
+        The intervals before the first one are skipped with a binary search on the largest ends.
+        '''
+        for position in range(bisect_right(self._max_ends, point), bisect_right(self._starts, point)):
+            index = self._order[position]
+            if self._ends[index] > point:
+                yield index
+
+
+def _is_close(start: int, end: int, other_start: int, other_end: int, max_diff: int) -> bool:
+    return abs(start - other_start) < max_diff and abs(end - other_end) < max_diff \
+        and other_start <= end and start <= other_end
+
+
+def match_intervals(
+        starts: list[int],
+        ends: list[int],
+        other_starts: list[int],
+        other_ends: list[int],
+        max_diff: int) -> list[list[int]]:
+    '''
+    Finds, for each interval, the other intervals to merge into it.
+    An other interval is merged into the overlapping interval whose start and end are
+    both less than `max_diff` away, picking the closest one. Otherwise, it can be merged
+    with the other intervals whose middle is inside the same interval, when all of them
+    together span that interval within `max_diff`. Each other interval is merged once at most.
+
+    Returns for each interval the indexes of its other intervals, ordered by their start.
+    '''
+    index = IntervalIndex(starts, ends)
+    matches: list[list[int]] = [[] for _ in starts]
+    spanning: set[int] = set()
+
+    for other_index, (other_start, other_end) in enumerate(zip(other_starts, other_ends)):
+        closest = -1
+        closest_diff = 0
+        for candidate in index.starting_between(other_start - max_diff, other_start + max_diff):
+            end = ends[candidate]
+            end_diff = abs(end - other_end)
+            if end_diff >= max_diff or end < other_start or other_end < starts[candidate]:
+                continue
+            diff = abs(starts[candidate] - other_start) + end_diff
+            if closest == -1 or diff < closest_diff:
+                closest = candidate
+                closest_diff = diff
+
+        if closest != -1:
+            matches[closest].append(other_index)
+            continue
+
+        containing = next(index.containing(
+            (other_start + other_end) // 2), None)
+        if containing is not None:
+            matches[containing].append(other_index)
+            spanning.add(containing)
+
+    for interval_index in spanning:
+        other_indexes = matches[interval_index]
+        start = min(other_starts[other_index] for other_index in other_indexes)
+        end = max(other_ends[other_index] for other_index in other_indexes)
+        if abs(start - starts[interval_index]) >= max_diff or abs(end - ends[interval_index]) >= max_diff:
+            other_indexes[:] = [other_index for other_index in other_indexes
+                                if _is_close(starts[interval_index], ends[interval_index],
+                                             other_starts[other_index], other_ends[other_index], max_diff)]
+
+    for other_indexes in matches:
+        if len(other_indexes) > 1:
+            other_indexes.sort(key=other_starts.__getitem__)
+
+    return matches
@@ -0,0 +1,280 @@
+from abc import ABC, abstractmethod
+from array import array
+from functools import cache
+import marshal
+import re
+from infra.file_system_interface import IFileSystem
+
+# pypinyin loads all of its dictionaries when imported, which takes longer than starting
+# the tool, so it is only imported when converting without the precompiled tables.
+
+TABLE_FILE_VERSION = 2
+
+_CODEPOINT_BITS = 21
+_NO_READING = 0
+
+_han_run_regex: re.Pattern | None = None
+
+
+@cache
+def get_pypinyin_version() -> str:
+    '''Read from the package metadata, without importing pypinyin'''
+    import importlib.metadata
+    return importlib.metadata.version('pypinyin')
+
+
+def _get_pypinyin_han_chars() -> str:
+    '''The characters pypinyin considers Han, as a regex character class'''
+    from pypinyin.constants import RE_HANS
+    return RE_HANS.pattern[len('^(?:'):-len(')+$')]
+
+
+def _use_han_chars(han_chars: str) -> None:
+    global _han_run_regex
+    _han_run_regex = re.compile(f'({han_chars}+)')
+
+
+def split_han_runs(line: str) -> list[tuple[str, bool]]:
+    '''
+    Splits a line into runs of Han and non Han characters, the same way pypinyin does
+    before matching phrases. Returns each run with whether it is a Han run.
+    '''
+    if _han_run_regex is None:
+        _use_han_chars(_get_pypinyin_han_chars())
+    return [(run, index % 2 == 1)
+            for index, run in enumerate(_han_run_regex.split(line))
+            if run != '']
+
+
+class IPinyinBackend(ABC):
+    @abstractmethod
+    def convert_han_runs(self, han_runs: list[str]) -> list[list[str]]:
+        '''Converts each run of Han characters to one pinyin syllable per character'''
+        pass
+
+    def convert_lines(self, lines: list[str]) -> list[str]:
+        '''
+        Converts every line in a single batch. Non Han text is kept as it is and
+        every segment is separated by a space, like joining the output of `pypinyin.pinyin`.
+        '''
+        split_lines = [split_han_runs(line) for line in lines]
+        han_runs = list({run: None for runs in split_lines
+                         for run, is_han in runs if is_han})
+        run_to_pinyin = dict(zip(han_runs, self.convert_han_runs(han_runs)))
+
+        converted_lines: list[str] = []
+        for runs in split_lines:
+            segments: list[str] = []
+            for run, is_han in runs:
+                if is_han:
+                    segments.extend(run_to_pinyin[run])
+                else:
+                    segments.append(run)
+            converted_lines.append(' '.join(segments))
+
+        return converted_lines
+
+
+class PypinyinBackend(IPinyinBackend):
+    def convert_han_runs(self, han_runs: list[str]) -> list[list[str]]:
+        from pypinyin import pinyin
+        return [[seg[0] for seg in pinyin(han_run)] for han_run in han_runs]
+
+
+# Tables loaded by a process, so pickling a backend into a worker process
+# does not copy the tables for every task.
+_process_tables: dict[str | None, 'TablePinyinBackend'] = {}
+
+
+def _get_process_table(file_system: IFileSystem | None, table_file_path: str | None) -> 'TablePinyinBackend':
+    table = _process_tables.get(table_file_path)
+    if table is None:
+        table = TablePinyinBackend.load_or_build(file_system, table_file_path)
+    return table
+
+
+class TablePinyinBackend(IPinyinBackend):
+    '''
+    Precompiled pypinyin data: the syllable of every character indexed by code point,
+    and a trie of the phrases, matched with the same forward maximum matching as pypinyin.
+    The tables are built from pypinyin itself, so the output is the same as `PypinyinBackend`.
+    '''
+
+    def __init__(
+            self,
+            syllables: list[str],
+            char_readings: array,
+            trie: dict[int, int],
+            phrase_readings: dict[int, tuple[int, ...]],
+            han_chars: str,
+            file_system: IFileSystem | None = None,
+            table_file_path: str | None = None) -> None:
+        '''
+        Parameters:
+        syllables: Every distinct pinyin syllable.
+        char_readings: For each code point, the index in `syllables` plus 1, or 0 when it has no pinyin.
+        trie: Phrase trie, the child of a node is at `node << 21 | code point`. The root node is 0.
+        phrase_readings: Indexes in `syllables` of the phrase ending at each trie node.
+        han_chars: The characters pypinyin considers Han, saved with the tables so splitting
+        lines into Han runs does not need to import pypinyin.
+        '''
+        self._syllables = syllables
+        self._char_readings = char_readings
+        self._trie = trie
+        self._phrase_readings = phrase_readings
+        self._han_chars = han_chars
+        if _han_run_regex is None:
+            _use_han_chars(han_chars)
+        self._file_system = file_system
+        self._table_file_path = table_file_path
+        _process_tables[table_file_path] = self
+
+    def __reduce__(self):
+        return (_get_process_table, (self._file_system, self._table_file_path))
+
+    @staticmethod
+    def build() -> 'TablePinyinBackend':
+        from pypinyin import pinyin
+        from pypinyin.constants import PHRASES_DICT, PINYIN_DICT
+        syllables: list[str] = []
+        syllable_indexes: dict[str, int] = {}
+
+        def get_syllable_index(syllable: str) -> int:
+            if syllable not in syllable_indexes:
+                syllable_indexes[syllable] = len(syllables)
+                syllables.append(syllable)
+            return syllable_indexes[syllable]
+
+        char_readings = array('H', [_NO_READING]) * (max(PINYIN_DICT) + 1)
+        for codepoint in PINYIN_DICT:
+            syllable = pinyin(chr(codepoint))[0][0]
+            char_readings[codepoint] = get_syllable_index(syllable) + 1
+
+        trie: dict[int, int] = {}
+        phrase_readings: dict[int, tuple[int, ...]] = {}
+        for phrase in PHRASES_DICT:
+            node = 0
+            for char in phrase:
+                key = node << _CODEPOINT_BITS | ord(char)
+                child = trie.get(key)
+                if child is None:
+                    child = len(trie) + 1
+                    trie[key] = child
+                node = child
+            phrase_readings[node] = tuple(get_syllable_index(seg[0])
+                                          for seg in pinyin(phrase))
+
+        return TablePinyinBackend(syllables, char_readings, trie, phrase_readings, _get_pypinyin_han_chars())
+
+    @staticmethod
+    def _load(file_system: IFileSystem, table_file_path: str) -> 'TablePinyinBackend | None':
+        '''None when the file does not exist, is not a complete table file, or was built from another pypinyin version'''
+        try:
+            table_file = marshal.loads(file_system.read_bytes(table_file_path))
+            if not isinstance(table_file, dict) or table_file.get('version') != TABLE_FILE_VERSION \
+                    or table_file.get('pypinyin') != get_pypinyin_version():
+                return None
+            char_readings = array('H')
+            char_readings.frombytes(table_file['char_readings'])
+            return TablePinyinBackend(
+                table_file['syllables'], char_readings, table_file['trie'], table_file['phrase_readings'],
+                table_file['han_chars'], file_system=file_system, table_file_path=table_file_path)
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            return None
+
+    @staticmethod
+    def load_or_build(file_system: IFileSystem | None, table_file_path: str | None) -> 'TablePinyinBackend':
+        '''
+        Loads the precompiled tables from the given file. If the file does not exist, cannot be
+        loaded or was built from another pypinyin version, the tables are built and saved to the file.
+        '''
+        if file_system is not None and table_file_path is not None and file_system.path_exists(table_file_path):
+            loaded = TablePinyinBackend._load(file_system, table_file_path)
+            if loaded is not None:
+                return loaded
+
+        backend = TablePinyinBackend.build()
+        if file_system is not None and table_file_path is not None:
+            backend._file_system = file_system
+            backend._table_file_path = table_file_path
+            _process_tables[table_file_path] = backend
+            backend.save(file_system, table_file_path)
+        return backend
+
+    def save(self, file_system: IFileSystem, table_file_path: str) -> None:
+        '''The file is replaced at once, so another process never loads it half written'''
+        file_system.create_dir(file_system.get_dir_path(table_file_path))
+        file_system.write_bytes_atomic(table_file_path, marshal.dumps({
+            'version': TABLE_FILE_VERSION,
+            'pypinyin': get_pypinyin_version(),
+            'syllables': self._syllables,
+            'char_readings': self._char_readings.tobytes(),
+            'trie': self._trie,
+            'phrase_readings': self._phrase_readings,
+            'han_chars': self._han_chars,
+        }))
+
+    def _convert_han_run(self, han_run: str) -> list[str]:
+        syllables = self._syllables
+        char_readings = self._char_readings
+        trie = self._trie
+        phrase_readings = self._phrase_readings
+        codepoints = [ord(char) for char in han_run]
+        converted: list[str] = []
+
+        def append_char(position: int) -> None:
+            codepoint = codepoints[position]
+            reading = char_readings[codepoint] if codepoint < len(
+                char_readings) else _NO_READING
+            converted.append(han_run[position] if reading == _NO_READING
+                             else syllables[reading - 1])
+
+        start = 0
+        length = len(codepoints)
+        while start < length:
+            node = 0
+            end = start
+            while end < length:
+                child = trie.get(node << _CODEPOINT_BITS | codepoints[end])
+                if child is None:
+                    break
+                node = child
+                end += 1
+
+            phrase = phrase_readings.get(node) if end > start else None
+            if end == length:
+                # Like pypinyin, when the rest of the run is the prefix of a phrase
+                # it is either that phrase or only single characters
+                if phrase is not None:
+                    converted.extend(syllables[index] for index in phrase)
+                else:
+                    for position in range(start, length):
+                        append_char(position)
+                break
+
+            if phrase is not None:
+                converted.extend(syllables[index] for index in phrase)
+                start = end
+            else:
+                append_char(start)
+                start += 1
+
+        return converted
+
+    def convert_han_runs(self, han_runs: list[str]) -> list[list[str]]:
+        return [self._convert_han_run(han_run) for han_run in han_runs]
+
+
+class LazyTablePinyinBackend(IPinyinBackend):
+    '''
+    Loads the precompiled tables, or builds them, on the first conversion instead of
+    when the tool starts, so they are not loaded while there is nothing to convert.
+    The tables are loaded once per process.
+    '''
+
+    def __init__(self, file_system: IFileSystem, table_file_path: str) -> None:
+        self._file_system = file_system
+        self._table_file_path = table_file_path
+
+    def convert_han_runs(self, han_runs: list[str]) -> list[list[str]]:
+        return _get_process_table(self._file_system, self._table_file_path).convert_han_runs(han_runs)
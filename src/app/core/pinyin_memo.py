@@ -0,0 +1,249 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Generic, NamedTuple, TypeVar
+from weakref import WeakValueDictionary
+import json
+import uuid
+from app.core.pinyin_backend import IPinyinBackend, PypinyinBackend, get_pypinyin_version
+from infra.file_system_interface import IFileSystem
+
+MEMO_FILE_VERSION = 1
+DEFAULT_MAX_LINES = 50_000
+DEFAULT_MAX_RUNS = 200_000
+
+V = TypeVar('V')
+
+
+class LruCache(Generic[V]):
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._items: OrderedDict[str, V] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> V | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: V) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+
+    def items(self) -> list[tuple[str, V]]:
+        with self._lock:
+            return list(self._items.items())
+
+
+class PinyinMemoStats(NamedTuple):
+    line_hits: int
+    line_misses: int
+    run_hits: int
+    run_misses: int
+
+    @property
+    def line_hit_rate(self) -> float:
+        total = self.line_hits + self.line_misses
+        return self.line_hits / total if total > 0 else 0.0
+
+    @property
+    def run_hit_rate(self) -> float:
+        total = self.run_hits + self.run_misses
+        return self.run_hits / total if total > 0 else 0.0
+
+
+class PinyinMemoDelta(NamedTuple):
+    '''Entries added and lookups done by a memo since the last delta was taken'''
+    lines: dict[str, str]
+    runs: dict[str, list[str]]
+    stats: PinyinMemoStats
+
+
+# Memos unpickled in a worker process resolve to a single memo per process,
+# so the memo stays warm across all the files the worker generates.
+# The memos are not kept alive by the registry, only the last one unpickled is,
+# between the tasks of the worker.
+_process_memos: 'WeakValueDictionary[str, PinyinMemo]' = WeakValueDictionary()
+_unpickled_memo: 'PinyinMemo | None' = None
+
+
+def _get_process_memo(token: str, backend: IPinyinBackend, max_lines: int, max_runs: int,
+                      file_system: IFileSystem | None, memo_file_path: str | None) -> 'PinyinMemo':
+    global _unpickled_memo
+    memo = _process_memos.get(token)
+    if memo is None:
+        memo = PinyinMemo(backend=backend, max_lines=max_lines, max_runs=max_runs,
+                          file_system=file_system, memo_file_path=memo_file_path, token=token)
+    # Only the memos sent to a worker record what they add, to be merged by the main process
+    memo._records_delta = True
+    _unpickled_memo = memo
+    return memo
+
+
+class PinyinMemo(IPinyinBackend):
+    '''
+    Decorates a pinyin backend with a bounded LRU memoization of the pinyin of whole lines,
+    and of the runs of Han characters within them. pypinyin segments a text by Han runs
+    before matching phrases, so converting each run separately gives the same result
+    as converting the line.
+    '''
+
+    def __init__(
+            self,
+            backend: IPinyinBackend | None = None,
+            max_lines: int = DEFAULT_MAX_LINES,
+            max_runs: int = DEFAULT_MAX_RUNS,
+            file_system: IFileSystem | None = None,
+            memo_file_path: str | None = None,
+            token: str | None = None) -> None:
+        '''
+        Parameters:
+        backend: Converts the lines and runs that are not memoized yet. Defaults to pypinyin.
+        file_system, memo_file_path: When given, the memo is loaded from that file
+        and `save` persists it, so it is reused between runs. The file is only loaded
+        when the memo is first used, so it does not slow down the start of the tool.
+        '''
+        self._backend = backend or PypinyinBackend()
+        self._max_lines = max_lines
+        self._max_runs = max_runs
+        self._file_system = file_system
+        self._memo_file_path = memo_file_path
+        self._lines: LruCache[str] = LruCache(max_lines)
+        self._runs: LruCache[list[str]] = LruCache(max_runs)
+        self._new_lines: dict[str, str] = {}
+        self._new_runs: dict[str, list[str]] = {}
+        self._taken_stats = PinyinMemoStats(0, 0, 0, 0)
+        self._records_delta = False
+        self._token = token or uuid.uuid4().hex
+        _process_memos[self._token] = self
+        self._loaded = False
+
+    def __reduce__(self):
+        return (_get_process_memo, (self._token, self._backend, self._max_lines, self._max_runs,
+                                    self._file_system, self._memo_file_path))
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self._file_system is None or self._memo_file_path is None:
+            return
+        if not self._file_system.path_exists(self._memo_file_path):
+            return
+
+        try:
+            memo_file = json.loads(
+                self._file_system.read(self._memo_file_path))
+        except ValueError:
+            return
+
+        if memo_file.get('version') != MEMO_FILE_VERSION or memo_file.get('pypinyin') != get_pypinyin_version():
+            return
+
+        for han_run, syllables in memo_file.get('runs', []):
+            self._runs.put(han_run, syllables)
+        for line, line_pinyin in memo_file.get('lines', []):
+            self._lines.put(line, line_pinyin)
+
+    def save(self) -> None:
+        # When the memo has not been used, there is nothing new to save
+        if self._file_system is None or self._memo_file_path is None or not self._loaded:
+            return
+
+        self._file_system.create_dir(
+            self._file_system.get_dir_path(self._memo_file_path))
+        self._file_system.write_atomic(self._memo_file_path, json.dumps({
+            'version': MEMO_FILE_VERSION,
+            'pypinyin': get_pypinyin_version(),
+            'runs': self._runs.items(),
+            'lines': self._lines.items(),
+        }, ensure_ascii=False))
+
+    def get_stats(self) -> PinyinMemoStats:
+        return PinyinMemoStats(
+            line_hits=self._lines.hits,
+            line_misses=self._lines.misses,
+            run_hits=self._runs.hits,
+            run_misses=self._runs.misses)
+
+    def take_delta(self) -> PinyinMemoDelta:
+        '''
+        Returns what was added and looked up since the last call,
+        so the work of a worker process can be merged into the memo of the main process.
+        The lines and runs added are only recorded by the memos unpickled in a worker,
+        so the memo of the main process does not keep a copy of everything it converts.
+        '''
+        stats = self.get_stats()
+        delta = PinyinMemoDelta(
+            lines=self._new_lines,
+            runs=self._new_runs,
+            stats=PinyinMemoStats(*(total - taken for total, taken
+                                    in zip(stats, self._taken_stats))))
+        self._new_lines = {}
+        self._new_runs = {}
+        self._taken_stats = stats
+        return delta
+
+    def merge_delta(self, delta: PinyinMemoDelta) -> None:
+        self._load()
+        for han_run, syllables in delta.runs.items():
+            self._runs.put(han_run, syllables)
+        for line, line_pinyin in delta.lines.items():
+            self._lines.put(line, line_pinyin)
+        self._lines.hits += delta.stats.line_hits
+        self._lines.misses += delta.stats.line_misses
+        self._runs.hits += delta.stats.run_hits
+        self._runs.misses += delta.stats.run_misses
+        self._taken_stats = self.get_stats()
+
+    def convert_han_runs(self, han_runs: list[str]) -> list[list[str]]:
+        self._load()
+        converted: list[list[str] | None] = [
+            self._runs.get(han_run) for han_run in han_runs]
+        missing_runs = list({han_run: None for han_run, syllables in zip(han_runs, converted)
+                             if syllables is None})
+        if len(missing_runs) == 0:
+            return converted  # type: ignore
+
+        missing_to_syllables = dict(
+            zip(missing_runs, self._backend.convert_han_runs(missing_runs)))
+        for han_run, syllables in missing_to_syllables.items():
+            self._runs.put(han_run, syllables)
+            if self._records_delta:
+                self._new_runs[han_run] = syllables
+
+        return [syllables if syllables is not None else missing_to_syllables[han_run]
+                for han_run, syllables in zip(han_runs, converted)]
+
+    def convert_lines(self, lines: list[str]) -> list[str]:
+        self._load()
+        converted: list[str | None] = [self._lines.get(line) for line in lines]
+        missing_lines = list({line: None for line, line_pinyin in zip(lines, converted)
+                              if line_pinyin is None})
+        if len(missing_lines) == 0:
+            return converted  # type: ignore
+
+        missing_to_pinyin = dict(
+            zip(missing_lines, super().convert_lines(missing_lines)))
+        for line, line_pinyin in missing_to_pinyin.items():
+            self._lines.put(line, line_pinyin)
+            if self._records_delta:
+                self._new_lines[line] = line_pinyin
+
+        return [line_pinyin if line_pinyin is not None else missing_to_pinyin[line]
+                for line, line_pinyin in zip(lines, converted)]
+
+    def to_pinyin(self, line: str) -> str:
+        return self.convert_lines([line])[0]
@@ -0,0 +1,34 @@
+from enum import Enum
+from functools import lru_cache
+import re
+
+# A syllable written with tone marks, the other segments of a pinyin line are kept as they are
+_SYLLABLE_REGEX = re.compile('^[a-zāáǎàēéěèīíǐìōóǒòūúǔùüǖǘǚǜńňǹḿ]+$')
+
+
+class PinyinStyle(Enum):
+    '''
+    TONE_MARKS: The tone is marked on the vowel, like `zhōng`.
+    TONE_NUMBERS: The tone is a number after the syllable, like `zhong1`.
+    '''
+    TONE_MARKS = 'TONE_MARKS'
+    TONE_NUMBERS = 'TONE_NUMBERS'
+
+
+@lru_cache(maxsize=None)
+def _to_tone_numbers(syllable: str) -> str:
+    # Imported when first used, since pypinyin loads its dictionaries when imported
+    from pypinyin.contrib.tone_convert import tone_to_tone3
+    return tone_to_tone3(syllable)
+
+
+def apply_pinyin_style(pinyin_lines: list[str], pinyin_style: PinyinStyle) -> list[str]:
+    '''
+    Converts the lines of pinyin with tone marks, like the ones of `IPinyinBackend.convert_lines`,
+    to the given style. Each syllable is converted once.
+    '''
+    if pinyin_style == PinyinStyle.TONE_MARKS:
+        return pinyin_lines
+    return [' '.join(_to_tone_numbers(segment) if _SYLLABLE_REGEX.match(segment) else segment
+                     for segment in line.split(' '))
+            for line in pinyin_lines]
@@ -0,0 +1,91 @@
+from typing import Iterable, Iterator
+import heapq
+import itertools
+import re
+from app.core.cue import Cue, should_skip, timestamp_to_milliseconds
+
+_TIMESTAMP = r'[0-9]+[,.:][0-9]+[,.:][0-9]+[,.:]?[0-9]*'
+_TIMING_REGEX = re.compile(
+    rf'^\s*({_TIMESTAMP}) *-[ -] *> *({_TIMESTAMP}) ?(.*)$')
+_INDEX_REGEX = re.compile(r'^\s*-?[0-9]+\.?[0-9]*\s*$')
+
+DEFAULT_REORDER_WINDOW = 16
+
+
+def _to_cue(index_line: str | None, timing: re.Match, content_lines: list[str]) -> Cue:
+    while len(content_lines) > 0 and content_lines[-1].strip() == '':
+        content_lines.pop()
+
+    return Cue(
+        start=timestamp_to_milliseconds(timing.group(1)),
+        end=timestamp_to_milliseconds(timing.group(2)),
+        content='\n'.join(content_lines),
+        index=int(index_line.strip().split('.')[0]) if index_line else None,
+        proprietary=timing.group(3))
+
+
+def iter_srt(lines: Iterable[str]) -> Iterator[Cue]:
+    '''
+    Parses SRT cues lazily, one line at a time, so only the current cue is kept in memory.
+    A cue starts at a timing line, optionally preceded by its index.
+    '''
+    index_line: str | None = None
+    timing: re.Match | None = None
+    content_lines: list[str] = []
+
+    for line_number, line in enumerate(lines):
+        line = line.rstrip('\r\n')
+        if line_number == 0:
+            line = line.lstrip('\ufeff')
+
+        timing_match = _TIMING_REGEX.match(line)
+        if timing_match is None:
+            content_lines.append(line)
+            continue
+
+        next_index_line: str | None = None
+        if len(content_lines) > 0 and _INDEX_REGEX.match(content_lines[-1]) \
+                and (len(content_lines) == 1 or content_lines[-2].strip() == '' or timing is None):
+            next_index_line = content_lines.pop()
+
+        if timing is not None:
+            yield _to_cue(index_line, timing, content_lines)
+
+        index_line = next_index_line
+        timing = timing_match
+        content_lines = []
+
+    if timing is not None:
+        yield _to_cue(index_line, timing, content_lines)
+
+
+def reorder(cues: Iterable[Cue], window: int = DEFAULT_REORDER_WINDOW) -> Iterator[Cue]:
+    '''
+    Sorts nearly sorted cues keeping at most `window` of them in memory.
+    The result is fully sorted when no cue is more than `window` positions away
+    from its sorted position.
+    '''
+    heap: list[tuple[int, int, int, Cue]] = []
+    for order, cue in enumerate(cues):
+        heapq.heappush(heap, (cue.start, cue.end, order, cue))
+        if len(heap) > window:
+            yield heapq.heappop(heap)[3]
+
+    while len(heap) > 0:
+        yield heapq.heappop(heap)[3]
+
+
+def compose_stream(
+        cues: Iterable[Cue],
+        reorder_window: int = DEFAULT_REORDER_WINDOW,
+        start_index: int = 1) -> Iterator[str]:
+    '''
+    Like `compose`, but yields one SRT block per cue instead of joining them.
+    Cues are reindexed and the ones not useful are skipped, like `compose` does.
+    '''
+    index = itertools.count(start_index)
+    for cue in reorder(cues, reorder_window):
+        if should_skip(cue):
+            continue
+        cue.index = next(index)
+        yield cue.to_srt()
@@ -1,12 +1,36 @@
-import asstosrt
+from typing import Iterable
+from app.core.ass_parser import iter_ass_sorted
+from app.core.cue import Cue, compose
 from infra.file_system_interface import IFileSystem
+from infra.tracer import NullTracer
+from infra.tracer_interface import ITracer
 
 
 class SubtitleConverter:
-    def __init__(self, file_system: IFileSystem) -> None:
+    def __init__(self, file_system: IFileSystem, tracer: ITracer | None = None) -> None:
         self._file_system = file_system
+        self._tracer = tracer or NullTracer()
+
+    def read_ass_subtitles(self, ass_file_path: str) -> list[Cue]:
+        '''Returns the cues sorted by start time and indexed'''
+        with self._file_system.open(ass_file_path) as ass_file:
+            return self.parse_ass_subtitles(ass_file, self._file_system.get_file_stat(ass_file_path).size)
+
+    def parse_ass_subtitles(self, lines: Iterable[str], size: int | None = None) -> list[Cue]:
+        '''
+        Like `read_ass_subtitles`, for subtitles that are not in a file, like an extraction pipe.
+        Parameters:
+        size: Bytes of the subtitles to trace, when known.
+        '''
+        with self._tracer.span('parse ass') as span:
+            cues = list(iter_ass_sorted(lines))
+            for index, cue in enumerate(cues, start=1):
+                cue.index = index
+            span.set('cues', len(cues))
+            if size is not None:
+                span.set('bytes', size)
+            return cues
 
     def convert_ass_to_srt(self, ass_file_path: str, srt_file_path: str) -> None:
-        ass_file = self._file_system.open(ass_file_path)
-        srt_subtitle = asstosrt.convert(ass_file)
-        self._file_system.write(srt_file_path, srt_subtitle)
+        self._file_system.write(
+            srt_file_path, compose(self.read_ass_subtitles(ass_file_path)))
@@ -1,144 +1,360 @@
 from enum import Enum
+from operator import attrgetter
+from typing import Iterable, Iterator
+import heapq
+import itertools
+from app.core.cue import Cue, compose, sort_and_reindex
+from app.core.interval_merge import match_intervals
+from app.core.pinyin_backend import IPinyinBackend, PypinyinBackend
+from app.core.pinyin_style import PinyinStyle, apply_pinyin_style
+from app.core.srt_stream import compose_stream, iter_srt
 from infra.file_system_interface import IFileSystem
-from pypinyin import pinyin
-import srt
+from infra.tracer import NullTracer
+from infra.tracer_interface import ITracer
 
 MAX_SECONDS_DIFF = 0.8
+MAX_MILLISECONDS_DIFF = int(MAX_SECONDS_DIFF * 1000)
+STREAMING_PINYIN_BATCH_SIZE = 256
 
 
 class Color(Enum):
     CYAN = '#00ffff'
 
 
+class MergeStrategy(Enum):
+    '''
+    How `add_language` pairs the subtitles of both languages.
+    TWO_POINTER: Walks both subtitles in order, only comparing the current subtitle of each.
+    INTERVAL_INDEX: Sorts both subtitles and looks up every overlap, so out of order
+    subtitles are merged too, and several subtitles can be merged into one.
+    '''
+    TWO_POINTER = 'TWO_POINTER'
+    INTERVAL_INDEX = 'INTERVAL_INDEX'
+
+
 class SubtitleManipulator:
-    def __init__(self, file_system: IFileSystem) -> None:
+    def __init__(
+            self,
+            file_system: IFileSystem,
+            pinyin_backend: IPinyinBackend | None = None,
+            tracer: ITracer | None = None) -> None:
         self._file_system = file_system
+        self._pinyin_backend = pinyin_backend or PypinyinBackend()
+        self._tracer = tracer or NullTracer()
 
-    def _to_pinyin(self, chinese: str):
-        return ' '.join([seg[0] for seg in pinyin(chinese)])
+    def _to_pinyin(self, chinese: str) -> str:
+        return self._pinyin_backend.convert_lines([chinese])[0]
 
     def _get_text_with_color(self, text: str, color: Color) -> str:
         return f'<font color="{color.value}">{text}</font>'
 
-    def _add_color_to_subtitle_content(self, subtitle: srt.Subtitle, color: Color):
+    def _add_color_to_subtitle_content(self, subtitle: Cue, color: Color):
         content = subtitle.content
         new_content = self._get_text_with_color(text=content, color=color)
         subtitle.content = new_content
 
-    def _should_merge_subtitles(self, sub_one: srt.Subtitle, sub_two: srt.Subtitle) -> bool:
-        start_dif = abs(sub_one.start.total_seconds() -
-                        sub_two.start.total_seconds())
-        end_dif = abs(sub_one.end.total_seconds() -
-                      sub_two.end.total_seconds())
-        return start_dif < MAX_SECONDS_DIFF and end_dif < MAX_SECONDS_DIFF
+    def _should_merge_subtitles(self, sub_one: Cue, sub_two: Cue) -> bool:
+        return abs(sub_one.start - sub_two.start) < MAX_MILLISECONDS_DIFF \
+            and abs(sub_one.end - sub_two.end) < MAX_MILLISECONDS_DIFF
 
-    def _should_adjust_subtitle_start_time(self, source_sub: srt.Subtitle, sub_to_adjust: srt.Subtitle) -> bool:
+    def _should_adjust_subtitle_start_time(self, source_sub: Cue, sub_to_adjust: Cue) -> bool:
         if source_sub.start < sub_to_adjust.start:
-            return abs(sub_to_adjust.start.total_seconds() - source_sub.start.total_seconds()) < MAX_SECONDS_DIFF
+            return sub_to_adjust.start - source_sub.start < MAX_MILLISECONDS_DIFF
 
         return False
 
-    def _should_adjust_subtitle_end_time(self, source_sub: srt.Subtitle, sub_to_adjust: srt.Subtitle) -> bool:
+    def _should_adjust_subtitle_end_time(self, source_sub: Cue, sub_to_adjust: Cue) -> bool:
         if source_sub.end > sub_to_adjust.end:
-            return abs(source_sub.end.total_seconds() - sub_to_adjust.end.total_seconds()) < MAX_SECONDS_DIFF
+            return source_sub.end - sub_to_adjust.end < MAX_MILLISECONDS_DIFF
 
         return False
 
-    def _is_subtitle_ending_before_second_start(self, sub_one: srt.Subtitle, sub_two: srt.Subtitle) -> bool:
+    def _is_subtitle_ending_before_second_start(self, sub_one: Cue, sub_two: Cue) -> bool:
         return sub_one.end < sub_two.start
 
-    def add_pinyin_to_subtitle(
+    def read_subtitles(self, path: str) -> list[Cue]:
+        with self._file_system.open(file=path, encoding='utf-8') as fi:
+            return self.parse_subtitles(fi, self._file_system.get_file_stat(path).size)
+
+    def parse_subtitles(self, lines: Iterable[str], size: int | None = None) -> list[Cue]:
+        '''
+        Like `read_subtitles`, for subtitles that are not in a file, like an extraction pipe.
+        Parameters:
+        size: Bytes of the subtitles to trace, when known.
+        '''
+        with self._tracer.span('parse srt') as span:
+            subtitles = sort_and_reindex(iter_srt(lines))
+            span.set('cues', len(subtitles))
+            if size is not None:
+                span.set('bytes', size)
+            return subtitles
+
+    def write_subtitles(self, path: str, subtitles: Iterable[Cue]) -> None:
+        with self._tracer.span('write') as span:
+            subtitles = list(subtitles)
+            self._file_system.write(path, compose(subtitles))
+            span.set('cues', len(subtitles))
+            span.set('bytes', self._file_system.get_file_stat(path).size)
+
+    def write_subtitles_stream(self, path: str, subtitles: Iterable[Cue]) -> None:
+        '''
+        Writes each subtitle as soon as it is produced. The subtitles are expected
+        to be nearly sorted, only a small window of them is reordered.
+        The subtitles are parsed and transformed while they are written, so the span
+        of the write includes those stages.
+        '''
+        with self._tracer.span('write stream') as span:
+            self._file_system.write_chunks(path, compose_stream(subtitles))
+            span.set('bytes', self._file_system.get_file_stat(path).size)
+
+    def convert_pinyin(self, chinese_subs: list[Cue]) -> list[str]:
+        '''The pinyin of each subtitle, with tone marks'''
+        with self._tracer.span('pinyin', cues=len(chinese_subs)):
+            return self._pinyin_backend.convert_lines(
+                [sub.content for sub in chinese_subs])
+
+    def add_pinyin(
             self,
-            src_path_chinese: str,
-            out_path: str,
-            keep_chinese: bool = True) -> None:
-        converted_subs: list[srt.Subtitle] = []
-
-        with self._file_system.open(file=src_path_chinese, encoding='utf-8') as fi:
-            subs = srt.parse(fi)
-            srt.sort_and_reindex(subs, start_index=1, in_place=True, skip=True)
-
-            for sub in subs:
-                content = sub.content
-                new_content = content + '\n' if keep_chinese else ''
-                new_content += self._get_text_with_color(
-                    text=self._to_pinyin(content), color=Color.CYAN)
-                sub.content = new_content
-                converted_subs.append(sub)
-
-            self._file_system.write(out_path, srt.compose(converted_subs))
-
-    def add_language_to_subtitle(
+            chinese_subs: Iterable[Cue],
+            keep_chinese: bool = True,
+            pinyin_style: PinyinStyle = PinyinStyle.TONE_MARKS) -> list[Cue]:
+        chinese_subs = list(chinese_subs)
+        return self.combine_pinyin(
+            chinese_subs,
+            apply_pinyin_style(self.convert_pinyin(chinese_subs), pinyin_style),
+            keep_chinese)
+
+    def combine_pinyin(
             self,
-            src_path: str,
-            src_other_language_path: str,
-            out_path: str,
+            chinese_subs: list[Cue],
+            pinyin_contents: list[str],
+            keep_chinese: bool = True) -> list[Cue]:
+        '''
+        New subtitles with the pinyin of `convert_pinyin` below the Chinese, or instead of it.
+        The given subtitles are not modified, so the pinyin can be combined several times.
+        '''
+        converted_subs: list[Cue] = []
+        for sub, pinyin_content in zip(chinese_subs, pinyin_contents):
+            content = sub.content
+            new_content = content + '\n' if keep_chinese else ''
+            new_content += self._get_text_with_color(
+                text=pinyin_content, color=Color.CYAN)
+            converted_subs.append(Cue(
+                start=sub.start, end=sub.end, content=new_content,
+                index=sub.index, proprietary=sub.proprietary))
+
+        return converted_subs
+
+    def iter_add_pinyin(
+            self,
+            chinese_subs: Iterable[Cue],
+            keep_chinese: bool = True,
+            pinyin_style: PinyinStyle = PinyinStyle.TONE_MARKS) -> Iterator[Cue]:
+        '''
+        Lazy version of `add_pinyin`, the pinyin is converted in small batches of subtitles.
+        '''
+        chinese_subs_iterator = iter(chinese_subs)
+        while True:
+            batch = list(itertools.islice(
+                chinese_subs_iterator, STREAMING_PINYIN_BATCH_SIZE))
+            if len(batch) == 0:
+                return
+            yield from self.add_pinyin(batch, keep_chinese, pinyin_style)
+
+    def add_language(
+            self,
+            subs: Iterable[Cue],
+            other_language_subs: Iterable[Cue],
             src_color: Color | None = None,
-            src_other_color: Color | None = None) -> None:
-        converted_subs: list[srt.Subtitle] = []
-
-        with self._file_system.open(file=src_path, encoding='utf-8') as src_file,\
-                self._file_system.open(file=src_other_language_path, encoding='utf-8') as src_other_file:
-            original_subs = srt.parse(src_file)
-            additional_subs = srt.parse(src_other_file)
-
-            srt.sort_and_reindex(original_subs, start_index=1,
-                                 in_place=True, skip=True)
-            srt.sort_and_reindex(additional_subs, start_index=1,
-                                 in_place=True, skip=True)
-
-            original_sub = next(original_subs, None)
-            additional_sub = next(additional_subs, None)
+            src_other_color: Color | None = None,
+            strategy: MergeStrategy = MergeStrategy.TWO_POINTER) -> list[Cue]:
+        '''
+        Merges both subtitles by their timings. The given subtitles are modified.
+        '''
+        with self._tracer.span('merge', strategy=strategy.value) as span:
+            merged_subs = list(self.merge_languages(
+                subs, other_language_subs, src_color, src_other_color, strategy))
+            span.set('cues', len(merged_subs))
+            return merged_subs
+
+    def iter_add_language(
+            self,
+            subs: Iterable[Cue],
+            other_language_subs: Iterable[Cue],
+            src_color: Color | None = None,
+            src_other_color: Color | None = None) -> Iterator[Cue]:
+        '''
+        Lazy version of `add_language`, both subtitles are consumed as the merge advances.
+        '''
+        original_subs = iter(subs)
+        additional_subs = iter(other_language_subs)
+
+        original_sub = next(original_subs, None)
+        additional_sub = next(additional_subs, None)
+
+        while original_sub is not None or additional_sub is not None:
+            if original_sub is not None and (additional_sub is None or self._is_subtitle_ending_before_second_start(original_sub, additional_sub)):
+                if src_color is not None:
+                    self._add_color_to_subtitle_content(
+                        original_sub, src_color)
+
+                yield original_sub
+                original_sub = next(original_subs, None)
+
+            elif additional_sub is not None and (original_sub is None or self._is_subtitle_ending_before_second_start(additional_sub, original_sub)):
+                yield additional_sub
+                additional_sub = next(additional_subs, None)
+
+            elif original_sub is not None and additional_sub is not None:
+                if self._should_merge_subtitles(sub_one=original_sub, sub_two=additional_sub):
+                    if self._should_adjust_subtitle_start_time(source_sub=original_sub, sub_to_adjust=additional_sub):
+
+                        additional_sub.start = original_sub.start
+                    if self._should_adjust_subtitle_end_time(source_sub=original_sub, sub_to_adjust=additional_sub):
+                        additional_sub.end = original_sub.end
+
+                    if self._should_adjust_subtitle_start_time(source_sub=additional_sub, sub_to_adjust=original_sub):
+                        original_sub.start = additional_sub.start
+                    if self._should_adjust_subtitle_end_time(source_sub=additional_sub, sub_to_adjust=original_sub):
+                        original_sub.end = additional_sub.end
 
-            while original_sub is not None or additional_sub is not None:
-                if original_sub is not None and (additional_sub is None or self._is_subtitle_ending_before_second_start(original_sub, additional_sub)):
                     if src_color is not None:
                         self._add_color_to_subtitle_content(
                             original_sub, src_color)
 
-                    converted_subs.append(original_sub)
-                    original_sub = next(original_subs, None)
-
-                elif additional_sub is not None and (original_sub is None or self._is_subtitle_ending_before_second_start(additional_sub, original_sub)):
-                    converted_subs.append(additional_sub)
-                    additional_sub = next(additional_subs, None)
-
-                elif original_sub is not None and additional_sub is not None:
-                    if self._should_merge_subtitles(sub_one=original_sub, sub_two=additional_sub):
-                        if self._should_adjust_subtitle_start_time(source_sub=original_sub, sub_to_adjust=additional_sub):
+                    original_sub.content = additional_sub.content + '\n' + original_sub.content
+                    yield original_sub
 
-                            additional_sub.start = original_sub.start
-                        if self._should_adjust_subtitle_end_time(source_sub=original_sub, sub_to_adjust=additional_sub):
-                            additional_sub.end = original_sub.end
-
-                        if self._should_adjust_subtitle_start_time(source_sub=additional_sub, sub_to_adjust=original_sub):
-                            original_sub.start = additional_sub.start
-                        if self._should_adjust_subtitle_end_time(source_sub=additional_sub, sub_to_adjust=original_sub):
-                            original_sub.end = additional_sub.end
-
-                        if src_color is not None:
-                            self._add_color_to_subtitle_content(
-                                original_sub, src_color)
+                else:
+                    if src_color is not None:
+                        self._add_color_to_subtitle_content(
+                            original_sub, src_color)
 
-                        original_sub.content = additional_sub.content + '\n' + original_sub.content
-                        converted_subs.append(original_sub)
+                    yield original_sub
 
-                    else:
-                        if src_color is not None:
-                            self._add_color_to_subtitle_content(
-                                original_sub, src_color)
+                    if src_other_color is not None:
+                        self._add_color_to_subtitle_content(
+                            additional_sub, src_other_color)
 
-                        converted_subs.append(original_sub)
+                    yield additional_sub
 
-                        if src_other_color is not None:
-                            self._add_color_to_subtitle_content(
-                                additional_sub, src_other_color)
+                original_sub = next(original_subs, None)
+                additional_sub = next(additional_subs, None)
+            else:
+                pass
 
-                        converted_subs.append(additional_sub)
+    def _add_language_with_interval_index(
+            self,
+            subs: Iterable[Cue],
+            other_language_subs: Iterable[Cue],
+            src_color: Color | None = None,
+            src_other_color: Color | None = None) -> list[Cue]:
+        subs = list(subs)
+        other_language_subs = list(other_language_subs)
+        starts = [sub.start for sub in subs]
+        other_starts = [sub.start for sub in other_language_subs]
+        matches = match_intervals(
+            starts,
+            [sub.end for sub in subs],
+            other_starts,
+            [sub.end for sub in other_language_subs],
+            max_diff=MAX_MILLISECONDS_DIFF)
+
+        converted_subs: list[Cue] = []
+        for index in sorted(range(len(subs)), key=starts.__getitem__):
+            sub = subs[index]
+            if src_color is not None:
+                self._add_color_to_subtitle_content(sub, src_color)
+            other_indexes = matches[index]
+            if len(other_indexes) > 0:
+                matched_subs = [other_language_subs[other_index]
+                                for other_index in other_indexes]
+                sub.start = min(sub.start, matched_subs[0].start)
+                sub.end = max([sub.end] + [other.end for other in matched_subs])
+                sub.content = '\n'.join(
+                    [other.content for other in matched_subs] + [sub.content])
+            converted_subs.append(sub)
+
+        matched_other_indexes = {other_index for other_indexes in matches
+                                 for other_index in other_indexes}
+        unmatched_other_subs: list[Cue] = []
+        for other_index in sorted(range(len(other_language_subs)), key=other_starts.__getitem__):
+            if other_index in matched_other_indexes:
+                continue
+            other = other_language_subs[other_index]
+            if src_other_color is not None:
+                self._add_color_to_subtitle_content(other, src_other_color)
+            unmatched_other_subs.append(other)
+
+        if len(unmatched_other_subs) == 0:
+            return converted_subs
+        return list(heapq.merge(converted_subs, unmatched_other_subs, key=attrgetter('start', 'end')))
+
+    def merge_languages(
+            self,
+            subs: Iterable[Cue],
+            other_language_subs: Iterable[Cue],
+            src_color: Color | None = None,
+            src_other_color: Color | None = None,
+            strategy: MergeStrategy = MergeStrategy.TWO_POINTER) -> Iterable[Cue]:
+        '''
+        Lazy when using MergeStrategy.TWO_POINTER, since the other strategies need every subtitle.
+        '''
+        if strategy == MergeStrategy.INTERVAL_INDEX:
+            return self._add_language_with_interval_index(
+                subs, other_language_subs, src_color, src_other_color)
+        return self.iter_add_language(subs, other_language_subs, src_color, src_other_color)
 
-                    original_sub = next(original_subs, None)
-                    additional_sub = next(additional_subs, None)
-                else:
-                    pass
+    def add_pinyin_to_subtitle(
+            self,
+            src_path_chinese: str,
+            out_path: str,
+            keep_chinese: bool = True,
+            streaming: bool = False) -> None:
+        '''
+        streaming: Parse, convert and write the subtitles one by one, so the memory
+        used does not grow with the number of subtitles. The source is expected to be sorted.
+        '''
+        if streaming:
+            with self._file_system.open(file=src_path_chinese, encoding='utf-8') as fi:
+                self.write_subtitles_stream(
+                    out_path, self.iter_add_pinyin(iter_srt(fi), keep_chinese))
+            return
+
+        converted_subs = self.add_pinyin(
+            self.read_subtitles(src_path_chinese), keep_chinese)
+        self.write_subtitles(out_path, converted_subs)
 
-        self._file_system.write(out_path, srt.compose(converted_subs))
+    def add_language_to_subtitle(
+            self,
+            src_path: str,
+            src_other_language_path: str,
+            out_path: str,
+            src_color: Color | None = None,
+            src_other_color: Color | None = None,
+            streaming: bool = False,
+            strategy: MergeStrategy = MergeStrategy.TWO_POINTER) -> None:
+        '''
+        streaming: Parse, merge and write the subtitles one by one, so the memory
+        used does not grow with the number of subtitles. The sources are expected to be sorted.
+        Only MergeStrategy.TWO_POINTER merges lazily, other strategies are written as a stream
+        once merged.
+        '''
+        if streaming:
+            with self._file_system.open(file=src_path, encoding='utf-8') as src_file, \
+                    self._file_system.open(file=src_other_language_path, encoding='utf-8') as src_other_file:
+                self.write_subtitles_stream(out_path, self.merge_languages(
+                    iter_srt(src_file),
+                    iter_srt(src_other_file),
+                    src_color=src_color,
+                    src_other_color=src_other_color,
+                    strategy=strategy))
+            return
+
+        converted_subs = self.add_language(
+            self.read_subtitles(src_path),
+            self.read_subtitles(src_other_language_path),
+            src_color=src_color,
+            src_other_color=src_other_color,
+            strategy=strategy)
+        self.write_subtitles(out_path, converted_subs)
@@ -0,0 +1,159 @@
+from collections import deque
+from threading import Event
+from typing import Callable, NamedTuple
+import logging
+import time
+from app.generate_profile import GenerateProfile
+from app.sidecar_index import VIDEO_EXTENSIONS, SidecarIndex, is_generated_file
+from app.subtitle_dto import SubtitleExternalExtension, SubtitleGenerateResult
+from app.subtitle_service import LoadResult, SubtitleService
+from infra.file_system_interface import FileStat, IFileSystem
+
+DEFAULT_POLL_INTERVAL_SECONDS = 2.0
+DEFAULT_SETTLE_SECONDS = 10.0
+SIDECAR_EXTENSIONS = tuple(extension.value for extension in SubtitleExternalExtension)
+
+logger = logging.getLogger(__name__)
+
+
+class WatchResult(NamedTuple):
+    path: str
+    result: SubtitleGenerateResult
+    # The exception raised by a FAILED generation
+    error: str | None = None
+
+
+class _PendingFile(NamedTuple):
+    stat: FileStat
+    changed_at: float
+
+
+class FolderWatcher:
+    '''
+    Polls a directory for new or changed videos and sidecar subtitles, and generates
+    the subtitle of each video with a saved profile, reusing the same service so its
+    pinyin and probe caches stay warm between videos.
+    A file is only processed once its size and modification time have not changed
+    for `settle_seconds`, so files still being downloaded or copied are not read.
+    A changed sidecar subtitle queues every video of the directory again, the service
+    should be incremental so the videos it does not affect are skipped.
+    A video whose generation raises is reported as FAILED, and the watch goes on.
+    '''
+
+    def __init__(
+            self,
+            subtitle_service: SubtitleService,
+            file_system: IFileSystem,
+            dir_path: str,
+            profile: GenerateProfile,
+            settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+            clock: Callable[[], float] = time.monotonic) -> None:
+        '''
+        Parameters:
+        clock: Returns the current time in seconds, to measure how long files have been unchanged.
+        '''
+        self._subtitle_service = subtitle_service
+        self._file_system = file_system
+        self._dir_path = dir_path
+        self._profile = profile
+        self._settle_seconds = settle_seconds
+        self._clock = clock
+        self._pending: dict[str, _PendingFile] = {}
+        self._processed: dict[str, FileStat] = {}
+        self._queue: deque[str] = deque()
+        # The files of the directory listed by the last scan
+        self._file_names: list[str] = []
+
+    def _get_watched_files(self) -> list[str]:
+        self._file_names = self._file_system.list_files(self._dir_path)
+        listed_file_names = set(self._file_names)
+        return [self._file_system.join_path(self._dir_path, file_name)
+                for file_name in sorted(self._file_names)
+                if file_name.endswith(VIDEO_EXTENSIONS)
+                or (file_name.endswith(SIDECAR_EXTENSIONS) and not is_generated_file(file_name, listed_file_names))]
+
+    def _get_stat(self, path: str) -> FileStat | None:
+        try:
+            return self._file_system.get_file_stat(path)
+        except FileNotFoundError:
+            return None
+
+    def _enqueue(self, video_path: str) -> None:
+        if video_path not in self._queue:
+            self._queue.append(video_path)
+
+    def _scan(self) -> None:
+        '''Queues the files that have been unchanged for long enough since they changed'''
+        now = self._clock()
+        settled_sidecar = False
+        for path in self._get_watched_files():
+            stat = self._get_stat(path)
+            if stat is None or self._processed.get(path) == stat:
+                continue
+
+            pending = self._pending.get(path)
+            if pending is None or pending.stat != stat:
+                self._pending[path] = _PendingFile(stat=stat, changed_at=now)
+                continue
+            if now - pending.changed_at < self._settle_seconds:
+                continue
+
+            del self._pending[path]
+            self._processed[path] = stat
+            if path.endswith(VIDEO_EXTENSIONS):
+                self._enqueue(path)
+            else:
+                settled_sidecar = True
+
+        if settled_sidecar:
+            for video_path in [path for path in self._processed
+                               if path.endswith(VIDEO_EXTENSIONS)]:
+                self._enqueue(video_path)
+
+    def _generate(self, video_path: str, sidecar_index: SidecarIndex) -> SubtitleGenerateResult:
+        if self._subtitle_service.load_path(video_path, sidecar_index) != LoadResult.FILE_LOADED:
+            return SubtitleGenerateResult.NOT_LOADED
+
+        additional_subtitle = self._profile.get_additional_subtitle()
+        if additional_subtitle is None:
+            return self._subtitle_service.generate_chinese_subtitle_with_pinyin(
+                self._profile.chinese_subtitle_id)
+        return self._subtitle_service.generate_subtitle_with_additional_language(
+            self._profile.chinese_subtitle_id, additional_subtitle)
+
+    def poll(self) -> list[WatchResult]:
+        '''Scans the directory once and generates the queued videos, in name order'''
+        self._scan()
+        if len(self._queue) == 0:
+            return []
+
+        # Indexed from the listing of the scan, instead of listing the directory for each video
+        sidecar_index = SidecarIndex(self._file_system, self._dir_path, self._file_names)
+        results: list[WatchResult] = []
+        while len(self._queue) > 0:
+            video_path = self._queue.popleft()
+            try:
+                result = WatchResult(path=video_path, result=self._generate(video_path, sidecar_index))
+            except Exception as exception:
+                logger.exception('Failed to generate %s', video_path)
+                result = WatchResult(
+                    path=video_path, result=SubtitleGenerateResult.FAILED, error=repr(exception))
+            results.append(result)
+        return results
+
+    def run(
+            self,
+            on_results: Callable[[list[WatchResult]], None],
+            stop: Event,
+            poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS) -> None:
+        '''
+        Polls until `stop` is set.
+
+        Parameters:
+        on_results: Called after each poll that generated videos.
+        '''
+        while not stop.is_set():
+            results = self.poll()
+            if len(results) > 0:
+                on_results(results)
+            stop.wait(poll_interval_seconds)
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from app.subtitle_service import AddAdditionalLanguage, AddAdditionalLanguageMode
+from infra.file_system_interface import IFileSystem
+
+
+class GenerateProfile(BaseModel):
+    '''
+    The subtitles chosen to generate a video, saved so the same choice can be applied
+    to the videos of the same show without asking again.
+    External subtitle IDs depend on the files of the directory, so embedded IDs are
+    preferred for profiles.
+    '''
+    chinese_subtitle_id: int | str
+    additional_mode: AddAdditionalLanguageMode | None = None
+    additional_subtitle_id: int | str | None = None
+
+    def get_additional_subtitle(self) -> AddAdditionalLanguage | None:
+        if self.additional_mode is None or self.additional_subtitle_id is None:
+            return None
+        return AddAdditionalLanguage(
+            mode=self.additional_mode, subtitle_id=self.additional_subtitle_id)
+
+    def save(self, file_system: IFileSystem, path: str) -> None:
+        file_system.write(path, self.json(indent=2))
+
+    @staticmethod
+    def load(file_system: IFileSystem, path: str) -> 'GenerateProfile':
+        return GenerateProfile.parse_raw(file_system.read(path))
@@ -0,0 +1,97 @@
+import hashlib
+import json
+from app import __version__ as tool_version
+from app.core.pinyin_backend import get_pypinyin_version
+from app.subtitle_dto import SubtitleExternalDto, SubtitleLanguageDto
+from infra.file_system_interface import IFileSystem
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE_SUFFIX = '.manifest.json'
+
+
+class GenerationManifest:
+    '''
+    Records the inputs a subtitle was generated from in a manifest next to it, so a video
+    whose inputs have not changed is not generated again. The inputs are the size and
+    modification time of the video, the chosen tracks, the hash of the external subtitles,
+    the mode and the version of the tool and of pypinyin.
+    The output size and modification time are recorded too, so an output that was
+    removed or edited afterwards is generated again.
+    '''
+
+    def __init__(self, file_system: IFileSystem) -> None:
+        self._file_system = file_system
+
+    def _get_manifest_path(self, output_file_path: str) -> str:
+        return output_file_path + MANIFEST_FILE_SUFFIX
+
+    def _hash_file(self, path: str) -> str:
+        '''Subtitles are read as text, so the decoded content is hashed'''
+        return hashlib.sha1(self._file_system.read(path).encode('utf-8')).hexdigest()
+
+    def get_inputs(
+            self,
+            video_file_path: str,
+            sources: list[SubtitleLanguageDto | SubtitleExternalDto],
+            merge_strategy: str) -> dict:
+        '''
+        The inputs shared by the outputs of a video, so the external subtitles are only
+        hashed once. Each output gets its inputs from these with `get_output_inputs`.
+        Parameters:
+        sources: The chinese subtitle source first, then the additional language one, if any.
+        '''
+        video_stat = self._file_system.get_file_stat(video_file_path)
+        return {
+            'version': MANIFEST_VERSION,
+            'tool_version': tool_version,
+            'pypinyin_version': get_pypinyin_version(),
+            'video': {
+                'path': video_file_path,
+                'size': video_stat.size,
+                'mtime_ns': video_stat.mtime_ns,
+            },
+            'sources': [{'track_id': source.id}
+                        if isinstance(source, SubtitleLanguageDto)
+                        else {'path': source.path, 'sha1': self._hash_file(source.path)}
+                        for source in sources],
+            'merge_strategy': merge_strategy,
+        }
+
+    def get_output_inputs(self, inputs: dict, mode: str, with_other_source: bool) -> dict:
+        '''
+        Parameters:
+        inputs: The inputs of the video, from `get_inputs`.
+        mode: The generate mode, `CHINESE_WITH_PINYIN` or an additional language mode.
+        with_other_source: Whether the output adds the additional language source.
+        '''
+        return {
+            **inputs,
+            'sources': inputs['sources'] if with_other_source else inputs['sources'][:1],
+            'mode': mode,
+        }
+
+    def is_up_to_date(self, output_file_path: str, inputs: dict) -> bool:
+        '''Whether the output exists unchanged and was generated from the same inputs'''
+        manifest_path = self._get_manifest_path(output_file_path)
+        if not self._file_system.path_exists(manifest_path) \
+                or not self._file_system.path_exists(output_file_path):
+            return False
+
+        try:
+            manifest = json.loads(self._file_system.read(manifest_path))
+        except ValueError:
+            return False
+
+        output_stat = self._file_system.get_file_stat(output_file_path)
+        return manifest.get('inputs') == inputs \
+            and manifest.get('output') == {'size': output_stat.size, 'mtime_ns': output_stat.mtime_ns}
+
+    def write(self, output_file_path: str, inputs: dict) -> None:
+        '''To be called once the output has been generated from the given inputs'''
+        output_stat = self._file_system.get_file_stat(output_file_path)
+        manifest = {
+            'inputs': inputs,
+            'output': {'size': output_stat.size, 'mtime_ns': output_stat.mtime_ns},
+        }
+        self._file_system.write(self._get_manifest_path(output_file_path),
+                                json.dumps(manifest, indent=2))
@@ -0,0 +1,99 @@
+import os
+from typing import Collection, NamedTuple
+from app.generation_manifest import MANIFEST_FILE_SUFFIX
+from app.subtitle_dto import SubtitleExternalDto, SubtitleExternalExtension
+from infra.file_info_reader_interface import Language
+from infra.file_system_interface import IFileSystem
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv')
+SIDECAR_EXTENSIONS = {extension.value: extension for extension in SubtitleExternalExtension}
+# The default suffix of the subtitles generated by the tool, which are not sources
+GENERATED_SUFFIX = ' generated.srt'
+# Language suffixes of sidecar subtitles, like `video.zh.srt`, in lower case
+_LANGUAGE_TAGS: dict[str, Language] = {
+    **{tag: Language.CHINESE for tag in ('zh', 'chi', 'zho', 'chs', 'cht', 'sc', 'tc',
+                                         'zh-hans', 'zh-hant', 'zh-cn', 'zh-tw', 'zh-hk')},
+    **{tag: Language.ENGLISH for tag in ('en', 'eng', 'en-us', 'en-gb')},
+}
+
+
+class _Sidecar(NamedTuple):
+    subtitle: SubtitleExternalDto
+    # The video of the directory the subtitle belongs to, None when there is none
+    video_stem: str | None
+
+
+def is_generated_file(file_name: str, file_names: Collection[str]) -> bool:
+    '''
+    Whether a file of the directory is a subtitle generated by the tool, with any output suffix,
+    as every generated subtitle has its manifest next to it. The default suffix is also checked,
+    for the subtitles generated before the manifests.
+    '''
+    return file_name.endswith(GENERATED_SUFFIX) or file_name + MANIFEST_FILE_SUFFIX in file_names
+
+
+def get_sidecar_language(tag: str) -> Language | str | None:
+    '''The language of a suffix like `zh` or `en.forced`, None when there is no suffix'''
+    if tag == '':
+        return None
+    language_tag = tag.split('.')[0].lower()
+    return _LANGUAGE_TAGS.get(language_tag, language_tag)
+
+
+class SidecarIndex:
+    '''
+    Maps each video of a directory to its sidecar subtitles, the `.srt` and `.ass` files
+    named like the video followed by an optional suffix, like `video.srt` or `video.zh.ass`.
+    The subtitles generated by the tool are not sidecars.
+    The directory is listed once when the index is created.
+    The ID of a sidecar is its suffix and extension, like `ext-zh.ass`, so the sidecars of
+    every video of the directory with the same suffix have the same ID.
+    '''
+
+    def __init__(self, file_system: IFileSystem, dir_path: str, file_names: list[str] | None = None) -> None:
+        '''
+        Parameters:
+        file_names: The files of the directory when they have already been listed,
+        so the directory is not listed again.
+        '''
+        self._dir_path = dir_path
+        file_names = sorted(file_system.list_files(dir_path) if file_names is None else file_names)
+        listed_file_names = set(file_names)
+        video_stems = {os.path.splitext(file_name)[0] for file_name in file_names
+                       if file_name.endswith(VIDEO_EXTENSIONS)}
+
+        # Each sidecar is indexed under every stem it may belong to, so `video.zh.srt` is a
+        # sidecar of `video.mkv` and `video.zh.mkv`, and belongs to the longest one that exists.
+        self._sidecars_by_stem: dict[str, list[_Sidecar]] = {}
+        for file_name in file_names:
+            name, extension = os.path.splitext(file_name)
+            if extension not in SIDECAR_EXTENSIONS or is_generated_file(file_name, listed_file_names):
+                continue
+            stems = self._get_stems(name)
+            video_stem = next((stem for stem in stems if stem in video_stems), None)
+            for stem in stems:
+                tag = name[len(stem) + 1:]
+                self._sidecars_by_stem.setdefault(stem, []).append(_Sidecar(
+                    subtitle=SubtitleExternalDto(
+                        id=f'ext-{tag}{extension}' if tag != '' else f'ext-{extension[1:]}',
+                        path=file_system.join_path(dir_path, file_name),
+                        extension=SIDECAR_EXTENSIONS[extension],
+                        language=get_sidecar_language(tag)),
+                    video_stem=video_stem))
+
+    def _get_stems(self, name: str) -> list[str]:
+        '''The name and each of its prefixes ending before a dot, the longest first'''
+        stems = [name]
+        while '.' in name:
+            name = name.rsplit('.', 1)[0]
+            stems.append(name)
+        return stems
+
+    def get_dir_path(self) -> str:
+        return self._dir_path
+
+    def get_sidecars(self, video_path: str) -> list[SubtitleExternalDto]:
+        '''The sidecar subtitles of a video of the directory, in name order'''
+        video_stem = os.path.splitext(os.path.basename(video_path))[0]
+        return [sidecar.subtitle for sidecar in self._sidecars_by_stem.get(video_stem, [])
+                if sidecar.video_stem is None or sidecar.video_stem == video_stem]
@@ -18,6 +18,7 @@ class SubtitleExternalDto(BaseModel):
     id: str
     path: str
     extension: SubtitleExternalExtension
+    language: Language | str | None = None
 
 
 class SubtitleGenerateResult(Enum):
@@ -26,3 +27,22 @@ class SubtitleGenerateResult(Enum):
     NO_SUBTITLES_FOUND = 'NO_SUBTITLES_FOUND'
     NO_CHINESE_FOUND = 'NO_CHINESE_FOUND'
     CODEC_NOT_SUPPORTED = 'CODEC_NOT_SUPPORTED'
+    SKIPPED_UP_TO_DATE = 'SKIPPED_UP_TO_DATE'
+    # The generation raised, like a corrupt video that cannot be extracted
+    FAILED = 'FAILED'
+
+
+class BatchFileResult(BaseModel):
+    path: str
+    result: SubtitleGenerateResult
+    order: int
+    worker_pid: int
+    started_at: float
+    finished_at: float
+
+
+class BatchGenerateReport(BaseModel):
+    result: SubtitleGenerateResult
+    workers: int
+    parallel: bool
+    files: list[BatchFileResult]
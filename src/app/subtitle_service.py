@@ -1,17 +1,36 @@
+from concurrent.futures import Executor
+from contextlib import ExitStack
 from enum import Enum
-from typing import List, NamedTuple, Tuple
-from infra.file_info_reader_interface import IFileInfoReader, Language, TrackSubCodec
-from infra.file_system_interface import IFileSystem
+from typing import TYPE_CHECKING, Callable, Iterable, NamedTuple, Tuple
+from infra.file_info_reader_async_interface import IFileInfoReaderAsync
+from infra.file_info_reader_interface import IFileInfoReader, Language, SubtitleTrack, TrackSubCodec
+from infra.file_system_interface import FileStat, IFileSystem
+from infra.tracer import NullTracer
+from infra.tracer_interface import ITracer, SpanRecord
+from infra.track_cache import TrackCache
 from app.exceptions.path_not_loaded_exception import PathNotLoadedException
+from app.core.ass_parser import iter_ass_sorted
+from app.core.cue import Cue
+from app.core.pinyin_memo import PinyinMemo, PinyinMemoDelta
+from app.core.pinyin_style import PinyinStyle, apply_pinyin_style
+from app.core.srt_stream import iter_srt
 from app.core.subtitle_converter import SubtitleConverter
-from app.core.subtitle_manipulator import Color, SubtitleManipulator
-from app.subtitle_dto import SubtitleExternalExtension, SubtitleLanguageDto, SubtitleExternalDto, SubtitleGenerateResult
+from app.core.subtitle_manipulator import Color, MergeStrategy, SubtitleManipulator
+from app.generation_manifest import GenerationManifest
+from app.sidecar_index import SidecarIndex
+from app.subtitle_dto import BatchFileResult, BatchGenerateReport, SubtitleExternalExtension, SubtitleLanguageDto, SubtitleExternalDto, SubtitleGenerateResult
 import os
+import time
 
-TEMP_EXTRACTED_ASS_FILE_PATH = 'temp_extracted_ass'
-TEMP_PINYIN_SRT_FILE_PATH = 'temp_pinyin.srt'
+if TYPE_CHECKING:
+    # Only needed when profiling, cProfile and tracemalloc are imported by `generate_profiled`
+    from infra.stage_profiler import StageProfile
 
 supported_sub_codecs = [TrackSubCodec.ASS, TrackSubCodec.SRT]
+successful_results = [SubtitleGenerateResult.SUCCESS,
+                      SubtitleGenerateResult.SKIPPED_UP_TO_DATE]
+CHINESE_WITH_PINYIN_MODE = 'CHINESE_WITH_PINYIN'
+DEFAULT_OUTPUT_SUFFIX = ' generated.srt'
 
 
 class AddAdditionalLanguageMode(Enum):
@@ -25,28 +44,135 @@ class AddAdditionalLanguage(NamedTuple):
     subtitle_id: int | str
 
 
+class OutputSpec(NamedTuple):
+    '''
+    A subtitle generated by `generate_outputs`.
+    mode: How the additional language is added, None for the Chinese subtitle with pinyin.
+    suffix: Replaces the extension of the video in the path of the subtitle.
+    '''
+    mode: AddAdditionalLanguageMode | None = None
+    pinyin_style: PinyinStyle = PinyinStyle.TONE_MARKS
+    suffix: str = DEFAULT_OUTPUT_SUFFIX
+
+
+class GenerationRequest(NamedTuple):
+    '''The subtitles generated for every video of the loaded path'''
+    chinese_subtitle_id: int | str
+    # Only needed by the outputs with an additional language
+    other_subtitle_id: int | str | None
+    outputs: list[OutputSpec]
+
+
+def _to_generation_request(
+        chinese_subtitle_id: int | str,
+        additional_subtitle: AddAdditionalLanguage | None) -> GenerationRequest:
+    if additional_subtitle is None:
+        return GenerationRequest(chinese_subtitle_id, None, [OutputSpec()])
+    return GenerationRequest(
+        chinese_subtitle_id, additional_subtitle.subtitle_id, [OutputSpec(mode=additional_subtitle.mode)])
+
+
+SubtitleSource = SubtitleLanguageDto | SubtitleExternalDto
+
+
+class MediaContext(NamedTuple):
+    '''The subtitles of a video, probed and listed once per loaded path'''
+    file_path: str
+    embedded_subtitles: list[SubtitleLanguageDto]
+    external_subtitles: list[SubtitleExternalDto]
+
+
+class JobOutput(NamedTuple):
+    spec: OutputSpec
+    output_file_path: str
+    manifest_inputs: dict | None
+
+
+class GenerationJob(NamedTuple):
+    '''A video whose sources are resolved, with its outputs that are not up to date'''
+    file_path: str
+    sources: list[SubtitleSource]
+    outputs: list[JobOutput]
+
+
+class WorkerDelta(NamedTuple):
+    '''What a generation recorded in a worker, to be merged into the main process'''
+    pinyin_memo: PinyinMemoDelta
+    spans: list[SpanRecord]
+
+
+class ProfiledGeneration(NamedTuple):
+    result: SubtitleGenerateResult
+    stages: list['StageProfile']
+
+
 class LoadResult(Enum):
     FILE_LOADED = 'FILE_LOADED'
     DIR_LOADED = 'DIR_LOADED'
     INVALID_PATH = 'INVALID_PATH'
 
 
-class ValidatedFilePath(NamedTuple):
-    path: str
-    is_temp: bool
-
-
 class SubtitleService:
     _file_path: str | None = None
     _file_path_load_result: LoadResult | None
-    _supported_extensions: list[str] = [
-        extension.value for extension in SubtitleExternalExtension]
+    _sidecar_index: SidecarIndex | None = None
 
     def __init__(
             self, file_info_reader: IFileInfoReader,
-            file_system: IFileSystem):
+            file_system: IFileSystem,
+            executor_factory: Callable[[int], Executor] | None = None,
+            pinyin_memo: PinyinMemo | None = None,
+            streaming: bool = False,
+            merge_strategy: MergeStrategy = MergeStrategy.TWO_POINTER,
+            incremental: bool = False,
+            file_info_reader_async: IFileInfoReaderAsync | None = None,
+            tracer: ITracer | None = None,
+            pipe_extraction: bool = False,
+            track_cache: TrackCache | None = None):
+        '''
+        Parameters:
+        executor_factory: Creates the executor used by `generate_batch` given the number of workers.
+        The default `ProcessPoolExecutor` spreads the videos across processes, so the file info
+        reader and file system must be picklable.
+        pinyin_memo: Memoized pinyin shared by every generation of this service.
+        streaming: Parse, transform and write the subtitles one by one instead of
+        loading the whole subtitles in memory. The SRT subtitles are expected to be nearly sorted,
+        while the ASS ones, which can be in any order, are sorted in memory when parsed.
+        merge_strategy: How the subtitles of both languages are paired when adding a language.
+        incremental: Skip the videos whose generated subtitle is up to date, according to
+        the manifest written next to it.
+        file_info_reader_async: Probes the videos and extracts the tracks of `generate_batch_async`.
+        When not given, the videos are probed one after the other and the tracks extracted in threads.
+        tracer: Records the time spent in each stage of every generation.
+        pipe_extraction: Parse the embedded track while it is extracted through a pipe,
+        instead of extracting it to a scratch file first. Only used when a single embedded track
+        is needed, since several tracks are extracted reading the video once.
+        Not used by `generate_batch_async`, which extracts the tracks before sending them to the workers.
+        track_cache: Keeps the extracted tracks, so generating other modes of a video does not
+        extract its tracks again. The tracks parsed through a pipe are read from it, but not stored.
+        '''
         self._file_info_reader = file_info_reader
         self._file_system = file_system
+        self._executor_factory = executor_factory
+        self._pinyin_memo = pinyin_memo or PinyinMemo()
+        self._streaming = streaming
+        self._merge_strategy = merge_strategy
+        self._incremental = incremental
+        self._file_info_reader_async = file_info_reader_async
+        self._tracer = tracer or NullTracer()
+        self._pipe_extraction = pipe_extraction
+        self._track_cache = track_cache
+        self._media_contexts: dict[str, MediaContext] = {}
+        # The suffixes of the subtitles this service generates, which are not sidecars
+        self._output_suffixes = {DEFAULT_OUTPUT_SUFFIX}
+        self._generation_manifest = GenerationManifest(file_system)
+
+    def _create_executor(self, workers: int) -> Executor:
+        if self._executor_factory is not None:
+            return self._executor_factory(workers)
+        # Imported when needed, since multiprocessing slows down the start of the tool
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(workers)
 
     def _get_file_path(self) -> Tuple[str, LoadResult]:
         if self._file_path is None or self._file_path_load_result is None:
@@ -62,36 +188,162 @@ class SubtitleService:
         base, _ = os.path.splitext(file_path)
         return base + append_to_base
 
-    def _get_external_file_id(self, index: int) -> str:
-        return f'ext-{index}'
-
     def _is_embedded_subtitle(self, id: int | str) -> bool:
         if isinstance(id, int):
             return True
         return id.isnumeric()
 
-    def _get_external_subtitle_extension(self, file_path: str) -> SubtitleExternalExtension | None:
-        _, extension = os.path.splitext(file_path)
-        if extension in self._supported_extensions:
-            return SubtitleExternalExtension(extension)
-        return None
-
-    def _get_subtitle_srt_file_path(
+    def _get_sidecar_index(self, dir_path: str) -> SidecarIndex:
+        '''The directory is only listed again when loading a path'''
+        if self._sidecar_index is None \
+                or os.path.normpath(self._sidecar_index.get_dir_path()) != os.path.normpath(dir_path):
+            self._sidecar_index = SidecarIndex(self._file_system, dir_path)
+        return self._sidecar_index
+
+    def _get_sidecars(self, video_path: str) -> list[SubtitleExternalDto]:
+        output_suffixes = tuple(self._output_suffixes)
+        return [sidecar for sidecar in self._get_sidecar_index(
+                    self._file_system.get_dir_path(video_path)).get_sidecars(video_path)
+                if not sidecar.path.endswith(output_suffixes)]
+
+    def _to_media_context(self, file_path: str, subtitle_tracks: list[SubtitleTrack]) -> MediaContext:
+        media_context = MediaContext(
+            file_path=file_path,
+            embedded_subtitles=[
+                SubtitleLanguageDto(id=track.id, language=track.language, codec=track.codec)
+                for track in subtitle_tracks if track.codec in supported_sub_codecs],
+            external_subtitles=self._get_sidecars(file_path))
+        self._media_contexts[file_path] = media_context
+        return media_context
+
+    def _get_media_context(self, file_path: str) -> MediaContext:
+        '''Probes the video the first time, then reuses its subtitles until another path is loaded'''
+        media_context = self._media_contexts.get(file_path)
+        if media_context is None:
+            media_context = self._to_media_context(
+                file_path, self._file_info_reader.get_subtitle_tracks(file_path))
+        return media_context
+
+    async def _get_media_context_async(self, file_path: str) -> MediaContext:
+        '''
+        Like `_get_media_context`, probing through the async file info reader, so the probes are
+        bounded by it. The contexts and sidecars are only updated on the event loop.
+        Without an async reader, the videos are probed one after the other.
+        '''
+        media_context = self._media_contexts.get(file_path)
+        if media_context is not None:
+            return media_context
+        if self._file_info_reader_async is None:
+            return self._get_media_context(file_path)
+        subtitle_tracks = await self._file_info_reader_async.get_subtitle_tracks(file_path)
+        return self._media_contexts.get(file_path) or self._to_media_context(file_path, subtitle_tracks)
+
+    def _get_listed_file_path(self) -> str | None:
+        '''The loaded video, or the first video when a directory is loaded'''
+        file_path, file_path_type = self._get_file_path()
+        if file_path_type != LoadResult.DIR_LOADED:
+            return file_path
+        return next(iter(self._get_supported_files_in_dir(file_path)), None)
+
+    def _read_subtitles(self, subtitle_path: str, is_ass: bool, open_files: ExitStack) -> Iterable[Cue]:
+        if self._streaming:
+            subtitle_file = open_files.enter_context(
+                self._file_system.open(file=subtitle_path, encoding='utf-8'))
+            return iter_ass_sorted(subtitle_file) if is_ass else iter_srt(subtitle_file)
+        if is_ass:
+            return SubtitleConverter(self._file_system, self._tracer).read_ass_subtitles(subtitle_path)
+        return SubtitleManipulator(self._file_system, self._pinyin_memo, self._tracer).read_subtitles(subtitle_path)
+
+    def _read_extracting_subtitles(
             self,
             file_path: str,
+            source: SubtitleLanguageDto,
+            open_files: ExitStack) -> Iterable[Cue]:
+        '''The track is extracted while it is parsed, the extraction ends when closing `open_files`'''
+        lines = open_files.enter_context(self._file_info_reader.stream_subtitle(file_path, source.id))
+        is_ass = source.codec is TrackSubCodec.ASS
+        if self._streaming:
+            return iter_ass_sorted(lines) if is_ass else iter_srt(lines)
+        if is_ass:
+            return SubtitleConverter(self._file_system, self._tracer).parse_ass_subtitles(lines)
+        return SubtitleManipulator(self._file_system, self._pinyin_memo, self._tracer).parse_subtitles(lines)
+
+    def _get_track_file_paths(self, sources: list[SubtitleSource], scratch: ExitStack) -> dict[int, str]:
+        '''
+        All embedded sources are extracted with a single call, so the video is read once.
+        mkvextract needs real files to write to, so the tracks are extracted into a
+        scratch directory unique to this job, which is removed when leaving `scratch`.
+        Returns the file each embedded track is extracted to, empty when there are none.
+        '''
+        embedded_sources = [source for source in sources
+                            if isinstance(source, SubtitleLanguageDto)]
+        if len(embedded_sources) == 0:
+            return {}
+
+        scratch_dir = self._file_system.create_temp_dir()
+        scratch.callback(self._file_system.remove_dir, scratch_dir)
+        return {source.id: self._file_system.join_path(scratch_dir, f'track_{source.id}')
+                for source in embedded_sources}
+
+    def _count_embedded_sources(self, sources: list[SubtitleSource]) -> int:
+        return sum(1 for source in sources if isinstance(source, SubtitleLanguageDto))
+
+    def _read_sources(
+            self,
+            job: GenerationJob,
+            track_file_paths: dict[int, str],
+            open_files: ExitStack) -> list[Iterable[Cue]]:
+        '''
+        When streaming, the subtitles are parsed while they are consumed before closing `open_files`.
+        The embedded tracks without a file in `track_file_paths` are extracted while they are parsed.
+        '''
+        return [(self._read_subtitles(track_file_paths[source.id], source.codec is TrackSubCodec.ASS, open_files)
+                 if source.id in track_file_paths
+                 else self._read_extracting_subtitles(job.file_path, source, open_files))
+                if isinstance(source, SubtitleLanguageDto)
+                else self._read_subtitles(source.path, source.extension == SubtitleExternalExtension.ASS, open_files)
+                for source in job.sources]
+
+    def _write_subtitles(self, manipulator: SubtitleManipulator, output_file_path: str, subtitles: Iterable[Cue]) -> None:
+        if self._streaming:
+            manipulator.write_subtitles_stream(output_file_path, subtitles)
+        else:
+            manipulator.write_subtitles(output_file_path, subtitles)
+
+    def _add_pinyin(
+            self,
+            manipulator: SubtitleManipulator,
+            chinese_subtitles: Iterable[Cue],
+            keep_chinese: bool,
+            pinyin_style: PinyinStyle) -> Iterable[Cue]:
+        if self._streaming:
+            return manipulator.iter_add_pinyin(chinese_subtitles, keep_chinese, pinyin_style)
+        return manipulator.add_pinyin(chinese_subtitles, keep_chinese, pinyin_style)
+
+    def _add_language(
+            self,
+            manipulator: SubtitleManipulator,
+            subtitles: Iterable[Cue],
+            other_subtitles: Iterable[Cue],
+            src_color: Color | None = None) -> Iterable[Cue]:
+        if self._streaming:
+            return manipulator.merge_languages(
+                subtitles, other_subtitles, src_color=src_color, strategy=self._merge_strategy)
+        return manipulator.add_language(
+            subtitles, other_subtitles, src_color=src_color, strategy=self._merge_strategy)
+
+    def _get_subtitle_source(
+            self,
             subtitle_id: int | str,
-            output_file_path: str,
-            validate_is_chinese: bool = True,) -> ValidatedFilePath | SubtitleGenerateResult:
-        embedded_subtitles = [subtitle for subtitle in self.get_embedded_subtitles()
+            media_context: MediaContext,
+            validate_is_chinese: bool = True,) -> SubtitleSource | SubtitleGenerateResult:
+        embedded_subtitles = [subtitle for subtitle in media_context.embedded_subtitles
                               if (validate_is_chinese == False) or (subtitle.language == Language.CHINESE)]
-        external_subtitles = self.get_external_subtitles()
+        external_subtitles = media_context.external_subtitles
 
         if len(embedded_subtitles) == 0 and len(external_subtitles) == 0:
             return SubtitleGenerateResult.NO_SUBTITLES_FOUND
 
-        ass_file_path: str | None = None
-        srt_file_path: str | None = None
-        is_temp_subtitle = True
         if len(embedded_subtitles) > 0:
             if self._is_embedded_subtitle(subtitle_id):
                 embedded_subtitle = next((sub for sub in embedded_subtitles
@@ -103,49 +355,21 @@ class SubtitleService:
                 if embedded_subtitle.codec not in supported_sub_codecs:
                     return SubtitleGenerateResult.CODEC_NOT_SUPPORTED
 
-                if embedded_subtitle.codec is TrackSubCodec.ASS:
-                    ass_file_path = TEMP_EXTRACTED_ASS_FILE_PATH
-                    self._file_info_reader.extract_subtitle(
-                        file_path,
-                        embedded_subtitle.id,
-                        ass_file_path)
-                elif embedded_subtitle.codec is TrackSubCodec.SRT:
-                    srt_file_path = output_file_path
-                    self._file_info_reader.extract_subtitle(
-                        file_path,
-                        embedded_subtitle.id,
-                        srt_file_path)
+                return embedded_subtitle
 
             elif len(external_subtitles) == 0:
                 return SubtitleGenerateResult.NO_CHINESE_FOUND
 
-        if srt_file_path is None and len(external_subtitles) > 0:
+        if len(external_subtitles) > 0:
             if not self._is_embedded_subtitle(subtitle_id):
                 source_subtitle = next((sub for sub in external_subtitles
-                                        if sub.id == subtitle_id))
+                                        if sub.id == subtitle_id), None)
                 if (source_subtitle is not None):
-                    if source_subtitle.extension == SubtitleExternalExtension.ASS:
-                        ass_file_path = source_subtitle.path
-                    elif source_subtitle.extension == SubtitleExternalExtension.SRT:
-                        srt_file_path = source_subtitle.path
-                        is_temp_subtitle = False
-
-        if ass_file_path is not None:
-            srt_file_path = output_file_path
-            converter = SubtitleConverter(self._file_system)
-            converter.convert_ass_to_srt(
-                ass_file_path, srt_file_path)
-            if ass_file_path == TEMP_EXTRACTED_ASS_FILE_PATH:
-                self._file_system.remove(ass_file_path)
-
-        if srt_file_path is None:
-            return SubtitleGenerateResult.NO_SUBTITLES_FOUND
+                    return source_subtitle
 
-        return ValidatedFilePath(is_temp=is_temp_subtitle, path=srt_file_path)
+        return SubtitleGenerateResult.NO_SUBTITLES_FOUND
 
-    def _generate_subtitle(self,
-                           chinese_subtitle_id: int | str,
-                           additional_subtitle: AddAdditionalLanguage | None = None) -> SubtitleGenerateResult:
+    def _generate_subtitle(self, request: GenerationRequest) -> SubtitleGenerateResult:
         try:
             file_path, file_path_type = self._get_file_path()
         except:
@@ -153,128 +377,399 @@ class SubtitleService:
 
         if file_path_type == LoadResult.DIR_LOADED:
             supported_files = self._get_supported_files_in_dir(file_path)
-            result = SubtitleGenerateResult.NO_SUBTITLES_FOUND
+            results: list[SubtitleGenerateResult] = []
             for file in supported_files:
-                result = self._generate_subtitle_for_path(
-                    file, chinese_subtitle_id, additional_subtitle)
-                if result != SubtitleGenerateResult.SUCCESS:
-                    return result
+                result = self._generate_subtitle_for_path(file, request)
+                results.append(result)
+                if result not in successful_results:
+                    break
 
-            return result
+            return self._combine_results(results)
 
         else:
-            return self._generate_subtitle_for_path(file_path, chinese_subtitle_id, additional_subtitle)
-
-    def _generate_chinese_with_pinyin(self, chinese_subtitle_path: ValidatedFilePath, output_file_path: str) -> None:
-        manipulator = SubtitleManipulator(self._file_system)
-        manipulator.add_pinyin_to_subtitle(
-            src_path_chinese=chinese_subtitle_path.path,
-            out_path=output_file_path,
-            keep_chinese=True
-        )
-
-    def _generate_chinese_with_other_language_and_pinyin(self, chinese_subtitle_path: ValidatedFilePath, other_subtitle_path: ValidatedFilePath, output_file_path: str) -> None:
-        manipulator = SubtitleManipulator(self._file_system)
-        manipulator.add_pinyin_to_subtitle(
-            src_path_chinese=chinese_subtitle_path.path,
-            out_path=TEMP_PINYIN_SRT_FILE_PATH,
-            keep_chinese=True
-        )
-        manipulator.add_language_to_subtitle(
-            src_path=TEMP_PINYIN_SRT_FILE_PATH,
-            src_other_language_path=other_subtitle_path.path,
-            out_path=output_file_path,
-        )
-        self._file_system.remove(TEMP_PINYIN_SRT_FILE_PATH)
-
-    def _generate_other_language_with_pinyin(self, chinese_subtitle_path: ValidatedFilePath, other_subtitle_path: ValidatedFilePath, output_file_path: str) -> None:
-        manipulator = SubtitleManipulator(self._file_system)
-        manipulator.add_pinyin_to_subtitle(
-            src_path_chinese=chinese_subtitle_path.path,
-            out_path=TEMP_PINYIN_SRT_FILE_PATH,
-            keep_chinese=False
-        )
-        manipulator.add_language_to_subtitle(
-            src_path=TEMP_PINYIN_SRT_FILE_PATH,
-            src_other_language_path=other_subtitle_path.path,
-            out_path=output_file_path)
-
-        self._file_system.remove(TEMP_PINYIN_SRT_FILE_PATH)
-
-    def _generate_chinese_with_other_language(self, chinese_subtitle_path: ValidatedFilePath, other_subtitle_path: ValidatedFilePath, output_file_path: str) -> None:
-        manipulator = SubtitleManipulator(self._file_system)
-        manipulator.add_language_to_subtitle(
-            src_path=chinese_subtitle_path.path,
-            src_other_language_path=other_subtitle_path.path,
-            out_path=output_file_path,
-            src_color=Color.CYAN)
-
-    def _generate_subtitle_for_path(
+            return self._generate_subtitle_for_path(file_path, request)
+
+    def _combine_results(self, results: list[SubtitleGenerateResult]) -> SubtitleGenerateResult:
+        '''The first non successful result, or SKIPPED_UP_TO_DATE when no video was generated'''
+        if len(results) == 0:
+            return SubtitleGenerateResult.NO_SUBTITLES_FOUND
+        result = next((result for result in results if result not in successful_results),
+                      SubtitleGenerateResult.SUCCESS)
+        if all(result == SubtitleGenerateResult.SKIPPED_UP_TO_DATE for result in results):
+            return SubtitleGenerateResult.SKIPPED_UP_TO_DATE
+        return result
+
+    def _generate_chinese_with_pinyin(self, chinese_subtitles: Iterable[Cue], output_file_path: str, pinyin_style: PinyinStyle) -> None:
+        manipulator = SubtitleManipulator(self._file_system, self._pinyin_memo, self._tracer)
+        self._write_subtitles(
+            manipulator,
+            output_file_path,
+            self._add_pinyin(manipulator, chinese_subtitles, keep_chinese=True, pinyin_style=pinyin_style))
+
+    def _generate_chinese_with_other_language_and_pinyin(self, chinese_subtitles: Iterable[Cue], other_subtitles: Iterable[Cue], output_file_path: str, pinyin_style: PinyinStyle) -> None:
+        manipulator = SubtitleManipulator(self._file_system, self._pinyin_memo, self._tracer)
+        pinyin_subtitles = self._add_pinyin(
+            manipulator, chinese_subtitles, keep_chinese=True, pinyin_style=pinyin_style)
+        self._write_subtitles(
+            manipulator,
+            output_file_path,
+            self._add_language(manipulator, pinyin_subtitles, other_subtitles))
+
+    def _generate_other_language_with_pinyin(self, chinese_subtitles: Iterable[Cue], other_subtitles: Iterable[Cue], output_file_path: str, pinyin_style: PinyinStyle) -> None:
+        manipulator = SubtitleManipulator(self._file_system, self._pinyin_memo, self._tracer)
+        pinyin_subtitles = self._add_pinyin(
+            manipulator, chinese_subtitles, keep_chinese=False, pinyin_style=pinyin_style)
+        self._write_subtitles(
+            manipulator,
+            output_file_path,
+            self._add_language(manipulator, pinyin_subtitles, other_subtitles))
+
+    def _generate_chinese_with_other_language(self, chinese_subtitles: Iterable[Cue], other_subtitles: Iterable[Cue], output_file_path: str) -> None:
+        manipulator = SubtitleManipulator(self._file_system, self._pinyin_memo, self._tracer)
+        self._write_subtitles(
+            manipulator,
+            output_file_path,
+            self._add_language(manipulator, chinese_subtitles, other_subtitles, src_color=Color.CYAN))
+
+    def _get_manifest_mode(self, spec: OutputSpec) -> str:
+        '''The tone marks keep the mode of the manifests written before the pinyin styles'''
+        mode = CHINESE_WITH_PINYIN_MODE if spec.mode is None else spec.mode.value
+        if spec.pinyin_style == PinyinStyle.TONE_MARKS:
+            return mode
+        return f'{mode}:{spec.pinyin_style.value}'
+
+    def _prepare_output(self, file_path: str, video_inputs: dict | None, spec: OutputSpec) -> JobOutput | None:
+        '''
+        None when the output is up to date
+        Parameters:
+        video_inputs: The manifest inputs of the video, None when not incremental.
+        '''
+        output_file_path = self._get_base_file_path_appending(file_path, spec.suffix)
+        if video_inputs is None:
+            return JobOutput(spec=spec, output_file_path=output_file_path, manifest_inputs=None)
+
+        manifest_inputs = self._generation_manifest.get_output_inputs(
+            video_inputs,
+            mode=self._get_manifest_mode(spec),
+            # Without the other language when this output does not add it
+            with_other_source=spec.mode is not None)
+        if self._generation_manifest.is_up_to_date(output_file_path, manifest_inputs):
+            return None
+        return JobOutput(spec=spec, output_file_path=output_file_path, manifest_inputs=manifest_inputs)
+
+    def _prepare_generation(
             self,
-            file_path: str,
-            chinese_subtitle_id: int | str,
-            additional_subtitle: AddAdditionalLanguage | None = None) -> SubtitleGenerateResult:
+            media_context: MediaContext,
+            request: GenerationRequest) -> GenerationJob | SubtitleGenerateResult:
+        '''Returns the result instead when the video cannot, or does not need to, be generated'''
+        file_path = media_context.file_path
+        chinese_source = self._get_subtitle_source(
+            subtitle_id=request.chinese_subtitle_id,
+            media_context=media_context)
+
+        if isinstance(chinese_source, SubtitleGenerateResult):
+            return chinese_source
+
+        sources = [chinese_source]
+        if request.other_subtitle_id is not None and any(spec.mode is not None for spec in request.outputs):
+            other_source = self._get_subtitle_source(
+                subtitle_id=request.other_subtitle_id,
+                media_context=media_context,
+                validate_is_chinese=False)
+
+            if isinstance(other_source, SubtitleGenerateResult):
+                return other_source
+
+            sources.append(other_source)
 
-        temp_file_paths: List[str] = []
-        chinese_file_path = self._get_subtitle_srt_file_path(
+        video_inputs = self._generation_manifest.get_inputs(
+            video_file_path=file_path,
+            sources=sources,
+            merge_strategy=self._merge_strategy.value) if self._incremental else None
+        outputs = [output for output in (self._prepare_output(file_path, video_inputs, spec) for spec in request.outputs)
+                   if output is not None]
+        if len(outputs) == 0:
+            return SubtitleGenerateResult.SKIPPED_UP_TO_DATE
+        if all(output.spec.mode is None for output in outputs):
+            # The other language is not extracted when only the outputs without it are outdated
+            sources = sources[:1]
+
+        return GenerationJob(
             file_path=file_path,
-            subtitle_id=chinese_subtitle_id,
-            output_file_path='temp_one.srt')
+            sources=sources,
+            outputs=outputs)
+
+    def _restore_cached_tracks(
+            self,
+            file_path: str,
+            track_file_paths: dict[int, str]) -> Tuple[FileStat | None, dict[int, str]]:
+        '''
+        Copies the cached tracks to their files.
+        Returns the stat of the video the cache is keyed on, and the tracks that still have to be extracted.
+        '''
+        if self._track_cache is None:
+            return (None, track_file_paths)
+
+        file_stat = self._file_system.get_file_stat(file_path)
+        return (file_stat, {track_id: track_file_path for track_id, track_file_path in track_file_paths.items()
+                            if not self._track_cache.get(file_path, file_stat, track_id, track_file_path)})
+
+    def _store_tracks(self, file_path: str, file_stat: FileStat | None, track_file_paths: dict[int, str]) -> None:
+        if self._track_cache is None or file_stat is None:
+            return
+        for track_id, track_file_path in track_file_paths.items():
+            self._track_cache.put(file_path, file_stat, track_id, track_file_path)
+
+    def _extract_tracks(self, file_path: str, track_file_paths: dict[int, str]) -> None:
+        with self._tracer.span('extract', tracks=len(track_file_paths)) as span:
+            file_stat, missing_track_file_paths = self._restore_cached_tracks(file_path, track_file_paths)
+            if len(missing_track_file_paths) > 0:
+                self._file_info_reader.extract_subtitles(file_path, missing_track_file_paths)
+                self._store_tracks(file_path, file_stat, missing_track_file_paths)
+            span.set('cached', len(track_file_paths) - len(missing_track_file_paths))
+            span.set('bytes', self._get_tracks_size(track_file_paths))
+
+    def _get_cached_track_file_paths(
+            self,
+            file_path: str,
+            sources: list[SubtitleSource],
+            scratch: ExitStack) -> dict[int, str]:
+        '''The files of the embedded tracks found in the track cache, the other tracks are parsed through a pipe'''
+        if self._track_cache is None:
+            return {}
+
+        track_file_paths = self._get_track_file_paths(sources, scratch)
+        _, missing_track_file_paths = self._restore_cached_tracks(file_path, track_file_paths)
+        return {track_id: track_file_path for track_id, track_file_path in track_file_paths.items()
+                if track_id not in missing_track_file_paths}
+
+    def _get_tracks_size(self, track_file_paths: dict[int, str]) -> int:
+        return sum(self._file_system.get_file_stat(track_file_path).size
+                   for track_file_path in track_file_paths.values())
+
+    def _prepare_generation_traced(
+            self,
+            file_path: str,
+            request: GenerationRequest) -> GenerationJob | SubtitleGenerateResult:
+        '''The probe of the video and the check of its manifests'''
+        with self._tracer.span('prepare', file=file_path):
+            return self._prepare_generation(self._get_media_context(file_path), request)
+
+    def _generate_job(self, job: GenerationJob, track_file_paths: dict[int, str]) -> None:
+        '''Generates the outputs once the embedded tracks have been extracted'''
+        with self._tracer.span('output', file=job.file_path, outputs=len(job.outputs)), ExitStack() as open_files:
+            subtitles_list = self._read_sources(job, track_file_paths, open_files)
+            if len(job.outputs) == 1:
+                output = job.outputs[0]
+                self._generate_output(subtitles_list, output.output_file_path, output.spec)
+            else:
+                self._generate_outputs(subtitles_list, job.outputs)
 
-        if isinstance(chinese_file_path, SubtitleGenerateResult):
-            return chinese_file_path
+        for output in job.outputs:
+            if output.manifest_inputs is not None:
+                self._generation_manifest.write(
+                    output.output_file_path, output.manifest_inputs)
 
-        if chinese_file_path.is_temp:
-            temp_file_paths.append(chinese_file_path.path)
+    def _generate_subtitle_for_path(self, file_path: str, request: GenerationRequest) -> SubtitleGenerateResult:
+        with self._tracer.span('generate', file=file_path) as span:
+            result = self._generate_traced_subtitle_for_path(file_path, request)
+            span.set('result', result.value)
+            return result
 
-        output_file_path = self._get_base_file_path_appending(
-            file_path, ' generated.srt')
+    def _generate_traced_subtitle_for_path(self, file_path: str, request: GenerationRequest) -> SubtitleGenerateResult:
+        job = self._prepare_generation_traced(file_path, request)
+        if isinstance(job, SubtitleGenerateResult):
+            return job
 
-        if additional_subtitle is None:
-            self._generate_chinese_with_pinyin(
-                chinese_subtitle_path=chinese_file_path,
-                output_file_path=output_file_path)
-        else:
-            other_subtitle_path = self._get_subtitle_srt_file_path(
-                file_path=file_path,
-                subtitle_id=additional_subtitle.subtitle_id,
-                output_file_path='temp_two.srt',
-                validate_is_chinese=False)
+        if self._pipe_extraction and self._count_embedded_sources(job.sources) == 1:
+            with ExitStack() as scratch:
+                self._generate_job(job, self._get_cached_track_file_paths(file_path, job.sources, scratch))
+            return SubtitleGenerateResult.SUCCESS
 
-            if isinstance(other_subtitle_path, SubtitleGenerateResult):
-                return other_subtitle_path
+        with ExitStack() as scratch:
+            track_file_paths = self._get_track_file_paths(job.sources, scratch)
+            if len(track_file_paths) > 0:
+                self._extract_tracks(file_path, track_file_paths)
+            self._generate_job(job, track_file_paths)
 
-            if other_subtitle_path.is_temp:
-                temp_file_paths.append(other_subtitle_path.path)
+        return SubtitleGenerateResult.SUCCESS
 
-            if additional_subtitle.mode == AddAdditionalLanguageMode.WITH_CHINESE_AND_PINYIN:
+    def _generate_output(
+            self,
+            subtitles_list: list[Iterable[Cue]],
+            output_file_path: str,
+            spec: OutputSpec) -> None:
+        chinese_subtitles, *other_subtitles_list = subtitles_list
+
+        if spec.mode is None:
+            self._generate_chinese_with_pinyin(
+                chinese_subtitles=chinese_subtitles,
+                output_file_path=output_file_path,
+                pinyin_style=spec.pinyin_style)
+        else:
+            other_subtitles = other_subtitles_list[0]
+
+            if spec.mode == AddAdditionalLanguageMode.WITH_CHINESE_AND_PINYIN:
                 self._generate_chinese_with_other_language_and_pinyin(
-                    chinese_subtitle_path=chinese_file_path,
-                    other_subtitle_path=other_subtitle_path,
-                    output_file_path=output_file_path)
+                    chinese_subtitles=chinese_subtitles,
+                    other_subtitles=other_subtitles,
+                    output_file_path=output_file_path,
+                    pinyin_style=spec.pinyin_style)
 
-            elif additional_subtitle.mode == AddAdditionalLanguageMode.WITHOUT_PINYIN:
+            elif spec.mode == AddAdditionalLanguageMode.WITHOUT_PINYIN:
                 self._generate_chinese_with_other_language(
-                    chinese_subtitle_path=chinese_file_path,
-                    other_subtitle_path=other_subtitle_path,
+                    chinese_subtitles=chinese_subtitles,
+                    other_subtitles=other_subtitles,
                     output_file_path=output_file_path)
 
-            elif additional_subtitle.mode == AddAdditionalLanguageMode.WITH_PINYIN:
+            elif spec.mode == AddAdditionalLanguageMode.WITH_PINYIN:
                 self._generate_other_language_with_pinyin(
-                    chinese_subtitle_path=chinese_file_path,
-                    other_subtitle_path=other_subtitle_path,
-                    output_file_path=output_file_path)
+                    chinese_subtitles=chinese_subtitles,
+                    other_subtitles=other_subtitles,
+                    output_file_path=output_file_path,
+                    pinyin_style=spec.pinyin_style)
             else:
                 raise Exception(
-                    f'Invalid AddAdditionalLanguageMode: {additional_subtitle.mode}')
-
-        for temp_file_path in temp_file_paths:
-            self._file_system.remove(temp_file_path)
-
-        return SubtitleGenerateResult.SUCCESS
-
-    def load_path(self, file_path: str) -> LoadResult:
+                    f'Invalid AddAdditionalLanguageMode: {spec.mode}')
+
+    def _generate_outputs(self, subtitles_list: list[Iterable[Cue]], outputs: list[JobOutput]) -> None:
+        '''
+        Generates several outputs from the same subtitles, which are parsed once and kept in memory,
+        even when streaming. The pinyin is converted once, then written in the style of each output.
+        '''
+        chinese_subtitles, *other_subtitles_list = [list(subtitles) for subtitles in subtitles_list]
+        manipulator = SubtitleManipulator(self._file_system, self._pinyin_memo, self._tracer)
+        pinyin_contents: list[str] | None = None
+        styled_pinyin_contents: dict[PinyinStyle, list[str]] = {}
+        for output in outputs:
+            spec = output.spec
+            if spec.mode != AddAdditionalLanguageMode.WITHOUT_PINYIN:
+                if pinyin_contents is None:
+                    pinyin_contents = manipulator.convert_pinyin(chinese_subtitles)
+                if spec.pinyin_style not in styled_pinyin_contents:
+                    styled_pinyin_contents[spec.pinyin_style] = apply_pinyin_style(pinyin_contents, spec.pinyin_style)
+
+            with self._tracer.span('output file', mode=self._get_manifest_mode(spec)):
+                if spec.mode is None:
+                    subtitles = manipulator.combine_pinyin(
+                        chinese_subtitles, styled_pinyin_contents[spec.pinyin_style], keep_chinese=True)
+                elif spec.mode == AddAdditionalLanguageMode.WITHOUT_PINYIN:
+                    # The merge colors and retimes the given subtitles, so each output merges copies of them
+                    subtitles = self._add_language(
+                        manipulator,
+                        [cue.copy() for cue in chinese_subtitles],
+                        [cue.copy() for cue in other_subtitles_list[0]],
+                        src_color=Color.CYAN)
+                else:
+                    subtitles = self._add_language(
+                        manipulator,
+                        manipulator.combine_pinyin(
+                            chinese_subtitles,
+                            styled_pinyin_contents[spec.pinyin_style],
+                            keep_chinese=spec.mode == AddAdditionalLanguageMode.WITH_CHINESE_AND_PINYIN),
+                        [cue.copy() for cue in other_subtitles_list[0]])
+                self._write_subtitles(manipulator, output.output_file_path, subtitles)
+
+    def _generate_batch_file(
+            self,
+            file_path: str,
+            order: int,
+            request: GenerationRequest) -> Tuple[BatchFileResult, WorkerDelta]:
+        '''
+        Also returns the pinyin memoized and the spans recorded by this generation, to be
+        merged into the main process when the file is generated by a worker process.
+        '''
+        started_at = time.time()
+        result = self._generate_subtitle_for_path(file_path, request)
+        file_result = BatchFileResult(
+            path=file_path,
+            result=result,
+            order=order,
+            worker_pid=os.getpid(),
+            started_at=started_at,
+            finished_at=time.time())
+        return (file_result, self._take_worker_delta())
+
+    def _take_worker_delta(self) -> WorkerDelta:
+        return WorkerDelta(
+            pinyin_memo=self._pinyin_memo.take_delta(),
+            spans=self._tracer.take_spans())
+
+    def _merge_worker_delta(self, worker_delta: WorkerDelta) -> None:
+        self._pinyin_memo.merge_delta(worker_delta.pinyin_memo)
+        self._tracer.merge_spans(worker_delta.spans)
+
+    async def _extract_subtitles_async(self, file_path: str, track_file_paths: dict[int, str]) -> None:
+        if self._file_info_reader_async is not None:
+            await self._file_info_reader_async.extract_subtitles(file_path, track_file_paths)
+        else:
+            import asyncio
+            await asyncio.to_thread(self._file_info_reader.extract_subtitles, file_path, track_file_paths)
+
+    async def _extract_tracks_async(self, file_path: str, track_file_paths: dict[int, str]) -> None:
+        import asyncio
+        with self._tracer.span('extract', tracks=len(track_file_paths)) as span:
+            file_stat, missing_track_file_paths = await asyncio.to_thread(
+                self._restore_cached_tracks, file_path, track_file_paths)
+            if len(missing_track_file_paths) > 0:
+                await self._extract_subtitles_async(file_path, missing_track_file_paths)
+                await asyncio.to_thread(self._store_tracks, file_path, file_stat, missing_track_file_paths)
+            span.set('cached', len(track_file_paths) - len(missing_track_file_paths))
+            span.set('bytes', self._get_tracks_size(track_file_paths))
+
+    def _generate_job_in_worker(self, job: GenerationJob, track_file_paths: dict[int, str]) -> Tuple[int, WorkerDelta]:
+        self._generate_job(job, track_file_paths)
+        return (os.getpid(), self._take_worker_delta())
+
+    async def _generate_batch_file_async(
+            self,
+            executor: Executor,
+            file_path: str,
+            order: int,
+            request: GenerationRequest) -> BatchFileResult:
+        import asyncio
+        started_at = time.time()
+        worker_pid = os.getpid()
+        with self._tracer.span('generate', file=file_path) as span:
+            with self._tracer.span('prepare', file=file_path):
+                media_context = await self._get_media_context_async(file_path)
+                job = self._prepare_generation(media_context, request)
+            if isinstance(job, SubtitleGenerateResult):
+                result = job
+            else:
+                with ExitStack() as scratch:
+                    track_file_paths = self._get_track_file_paths(job.sources, scratch)
+                    if len(track_file_paths) > 0:
+                        await self._extract_tracks_async(file_path, track_file_paths)
+                    worker_pid, worker_delta = await asyncio.get_running_loop().run_in_executor(
+                        executor, self._generate_job_in_worker, job, track_file_paths)
+                if worker_pid != os.getpid():
+                    self._merge_worker_delta(worker_delta)
+                result = SubtitleGenerateResult.SUCCESS
+            span.set('result', result.value)
+
+        return BatchFileResult(
+            path=file_path,
+            result=result,
+            order=order,
+            worker_pid=worker_pid,
+            started_at=started_at,
+            finished_at=time.time())
+
+    def _get_batch_files(self, file_path: str, file_path_type: LoadResult) -> list[str]:
+        if file_path_type == LoadResult.DIR_LOADED:
+            return self._get_supported_files_in_dir(file_path)
+        return [file_path]
+
+    def load_path(self, file_path: str, sidecar_index: SidecarIndex | None = None) -> LoadResult:
+        '''
+        Parameters:
+        sidecar_index: The sidecar subtitles of the directory of the path, when they have
+        already been indexed, so the directory is not listed again.
+        '''
         self._file_path = file_path
+        self._sidecar_index = sidecar_index
+        self._media_contexts = {}
         if not self._file_system.path_exists(file_path):
             self._file_path_load_result = LoadResult.INVALID_PATH
         elif self._file_system.path_is_dir(file_path):
@@ -285,53 +780,192 @@ class SubtitleService:
         return self._file_path_load_result
 
     def get_embedded_subtitles(self) -> list[SubtitleLanguageDto]:
-        file_path, file_path_type = self._get_file_path()
+        '''
+        The supported embedded subtitles of the loaded video, or of the first video when
+        a directory is loaded. Each video of the directory is generated with its own ones.
+        '''
+        file_path = self._get_listed_file_path()
+        if file_path is None:
+            return []
+        return self._get_media_context(file_path).embedded_subtitles
 
+    def get_sidecar_index(self) -> SidecarIndex:
+        '''The sidecar subtitles of the directory of the loaded path, listed once until another path is loaded'''
+        file_path, file_path_type = self._get_file_path()
         if file_path_type == LoadResult.DIR_LOADED:
-            supported_files = self._get_supported_files_in_dir(file_path)
-            if len(supported_files) == 0:
-                return []
+            return self._get_sidecar_index(file_path)
+        return self._get_sidecar_index(self._file_system.get_dir_path(file_path))
 
-            file_info = self._file_info_reader.get_file_info(
-                supported_files[0])
-        else:
-            file_info = self._file_info_reader.get_file_info(file_path)
-
-        if file_info is None:
+    def get_external_subtitles(self) -> list[SubtitleExternalDto]:
+        '''
+        The sidecar subtitles of the loaded video, or of the first video when a
+        directory is loaded, like `get_embedded_subtitles`.
+        '''
+        file_path = self._get_listed_file_path()
+        if file_path is None:
             return []
+        return self._get_media_context(file_path).external_subtitles
 
-        all_available_tracks = [track for track in file_info.tracks
-                                if track.codec in supported_sub_codecs]
+    def get_pinyin_memo(self) -> PinyinMemo:
+        return self._pinyin_memo
 
-        return list(map(lambda track: SubtitleLanguageDto(
-            id=track.id, language=track.properties.language, codec=track.codec),
-            all_available_tracks))
-
-    def get_external_subtitles(self) -> list[SubtitleExternalDto]:
-        file_path, _ = self._get_file_path()
-        external_subtitles: list[SubtitleExternalDto] = []
-        dir_path = self._file_system.get_dir_path(file_path)
-        subtitle_files = [self._file_system.join_path(dir_path, f)
-                          for f in self._file_system.list_dir(dir_path)]
-
-        for i, path in enumerate(subtitle_files):
-            extension = self._get_external_subtitle_extension(path)
-            if extension is not None:
-                external_subtitles.append(
-                    SubtitleExternalDto(path=path,
-                                        id=self._get_external_file_id(i),
-                                        extension=extension))
-
-        return external_subtitles
+    def get_tracer(self) -> ITracer:
+        return self._tracer
 
     def generate_chinese_subtitle_with_pinyin(
             self,
             subtitle_id: int | str) -> SubtitleGenerateResult:
 
-        return self._generate_subtitle(subtitle_id)
+        return self._generate_subtitle(_to_generation_request(subtitle_id, None))
 
     def generate_subtitle_with_additional_language(
             self,
             chinese_subtitle_id: int | str,
             other_subtitle: AddAdditionalLanguage) -> SubtitleGenerateResult:
-        return self._generate_subtitle(chinese_subtitle_id, other_subtitle)
+        return self._generate_subtitle(_to_generation_request(chinese_subtitle_id, other_subtitle))
+
+    def generate_outputs(
+            self,
+            chinese_subtitle_id: int | str,
+            outputs: list[OutputSpec],
+            other_subtitle_id: int | str | None = None) -> SubtitleGenerateResult:
+        '''
+        Generates several subtitles for each video, sharing the extraction and parsing of its
+        tracks and the conversion to pinyin. In incremental mode only the outputs that are not
+        up to date are generated, and the video is skipped when all of them are.
+
+        Parameters:
+        outputs: The mode, pinyin style and suffix of each subtitle, the suffixes must differ.
+        other_subtitle_id: The additional language, needed by the outputs with a mode.
+        '''
+        if len(outputs) == 0:
+            raise ValueError('No outputs to generate')
+        if len({output.suffix for output in outputs}) != len(outputs):
+            raise ValueError('Each output needs its own suffix')
+        if other_subtitle_id is None and any(output.mode is not None for output in outputs):
+            raise ValueError('The outputs with an additional language need other_subtitle_id')
+
+        new_suffixes = {output.suffix for output in outputs} - self._output_suffixes
+        if len(new_suffixes) > 0:
+            self._output_suffixes |= new_suffixes
+            # The subtitles listed before may include outputs with these suffixes
+            self._media_contexts = {}
+        return self._generate_subtitle(GenerationRequest(chinese_subtitle_id, other_subtitle_id, outputs))
+
+    def generate_profiled(
+            self,
+            chinese_subtitle_id: int | str,
+            additional_subtitle: AddAdditionalLanguage | None = None,
+            stages: Iterable[str] | None = None) -> ProfiledGeneration:
+        '''
+        Generates the loaded path like `generate_subtitle_with_additional_language`, or
+        `generate_chinese_subtitle_with_pinyin` without an additional subtitle, profiling
+        each stage with cProfile and tracemalloc. The videos are generated sequentially
+        in this process, so every stage of every video is profiled.
+
+        Parameters:
+        stages: Names of the spans to profile, the probe, extraction, parse, pinyin, merge
+        and write stages by default.
+        '''
+        from infra.stage_profiler import DEFAULT_PROFILED_STAGES, StageProfiler
+
+        tracer = self._tracer
+        profiler = StageProfiler(tracer, stages or DEFAULT_PROFILED_STAGES)
+        self._tracer = profiler
+        profiler.start()
+        try:
+            result = self._generate_subtitle(_to_generation_request(chinese_subtitle_id, additional_subtitle))
+        finally:
+            profiler.stop()
+            self._tracer = tracer
+        return ProfiledGeneration(result=result, stages=profiler.get_profiles())
+
+    def generate_batch(
+            self,
+            chinese_subtitle_id: int | str,
+            additional_subtitle: AddAdditionalLanguage | None = None,
+            max_workers: int | None = None) -> BatchGenerateReport:
+        '''
+        Generates the subtitle of every video of the loaded path, spreading the videos
+        across up to `max_workers` workers (defaults to the number of CPUs).
+        Unlike the sequential generation, a failing video does not stop the others.
+        The report result is the first non successful result in directory order.
+        Videos skipped because they are up to date count as successful.
+        '''
+        try:
+            file_path, file_path_type = self._get_file_path()
+        except PathNotLoadedException:
+            return BatchGenerateReport(
+                result=SubtitleGenerateResult.NOT_LOADED, workers=0, parallel=False, files=[])
+
+        request = _to_generation_request(chinese_subtitle_id, additional_subtitle)
+        supported_files = self._get_batch_files(file_path, file_path_type)
+        workers = min(max_workers or os.cpu_count() or 1, len(supported_files))
+        # Listed before the service is sent to the workers, so it is listed only once
+        self.get_sidecar_index()
+        if workers > 1:
+            with self._create_executor(workers) as executor:
+                futures = [executor.submit(self._generate_batch_file, file, order, request)
+                           for order, file in enumerate(supported_files)]
+                batch_results = [future.result() for future in futures]
+        else:
+            batch_results = [self._generate_batch_file(file, order, request)
+                             for order, file in enumerate(supported_files)]
+
+        file_results = [file_result for file_result, _ in batch_results]
+        for file_result, worker_delta in batch_results:
+            if file_result.worker_pid != os.getpid():
+                self._merge_worker_delta(worker_delta)
+
+        return BatchGenerateReport(
+            result=self._combine_results(
+                [file_result.result for file_result in file_results]),
+            workers=workers,
+            parallel=workers > 1,
+            files=file_results)
+
+    async def generate_batch_async(
+            self,
+            chinese_subtitle_id: int | str,
+            additional_subtitle: AddAdditionalLanguage | None = None,
+            max_workers: int | None = None) -> BatchGenerateReport:
+        '''
+        Like `generate_batch`, but the tracks of every video are extracted concurrently,
+        bounded by the async file info reader, while up to `max_workers` workers generate
+        the videos already extracted.
+        When a video fails, or this is cancelled, the videos still running are cancelled
+        and their extraction processes killed.
+        '''
+        # Imported when needed, since asyncio slows down the start of the tool
+        import asyncio
+        try:
+            file_path, file_path_type = self._get_file_path()
+        except PathNotLoadedException:
+            return BatchGenerateReport(
+                result=SubtitleGenerateResult.NOT_LOADED, workers=0, parallel=False, files=[])
+
+        request = _to_generation_request(chinese_subtitle_id, additional_subtitle)
+        supported_files = self._get_batch_files(file_path, file_path_type)
+        workers = min(max_workers or os.cpu_count() or 1, len(supported_files))
+        file_results: list[BatchFileResult] = []
+        if workers > 0:
+            # Listed before the videos are probed, so it is listed only once
+            self.get_sidecar_index()
+            with self._create_executor(workers) as executor:
+                tasks = [asyncio.ensure_future(self._generate_batch_file_async(
+                    executor, file, order, request))
+                    for order, file in enumerate(supported_files)]
+                try:
+                    file_results = list(await asyncio.gather(*tasks))
+                except BaseException:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    raise
+
+        return BatchGenerateReport(
+            result=self._combine_results(
+                [file_result.result for file_result in file_results]),
+            workers=workers,
+            parallel=workers > 1,
+            files=file_results)
@@ -0,0 +1,117 @@
+'''
+Synthetic subtitles for the benchmarks, built from the lines of the test fixtures,
+so they keep their style: direction marks, multi-line dialogues, mixed latin text...
+'''
+from datetime import timedelta
+import random
+import re
+import srt
+from tests.fixture_file_file_info import CHINESE_SUBTITLE_ASS, CHINESE_SUBTITLE_SRT_UNMATCHED_TIMINGS_SRT, ENGLISH_SUBTITLE_UNMATCHED_TIMINGS_SRT
+
+DIRECTION_MARKS = ['\u200e', '\u202a']
+CHINESE_PUNCTUATION = ['', '', '？', '！', '…', '，']
+
+_HAN_REGEX = re.compile(r'[\u4e00-\u9fff]+')
+
+
+def _get_chinese_words() -> list[str]:
+    '''Splits the chinese fixture lines into words of one to three characters'''
+    words: list[str] = []
+    text = CHINESE_SUBTITLE_SRT_UNMATCHED_TIMINGS_SRT + CHINESE_SUBTITLE_ASS
+    for han_run in _HAN_REGEX.findall(text):
+        position = 0
+        while position < len(han_run):
+            length = 1 + (position * 7 + len(han_run)) % 3
+            words.append(han_run[position:position + length])
+            position += length
+    return words
+
+
+def _get_english_words() -> list[str]:
+    return [word for sub in srt.parse(ENGLISH_SUBTITLE_UNMATCHED_TIMINGS_SRT)
+            for word in sub.content.split()]
+
+
+class CorpusGenerator:
+    '''
+    Generates the same corpus for the same seed. The lines are random, but some of them
+    repeat like openings and recurring sentences do.
+    '''
+
+    def __init__(self, seed: int = 0) -> None:
+        self._random = random.Random(seed)
+        self._chinese_words = _get_chinese_words()
+        self._english_words = _get_english_words()
+
+    def _chinese_sentence(self) -> str:
+        words = self._random.choices(
+            self._chinese_words, k=self._random.randint(2, 8))
+        return ''.join(words) + self._random.choice(CHINESE_PUNCTUATION)
+
+    def _chinese_content(self) -> str:
+        mark = self._random.choice(DIRECTION_MARKS)
+        if self._random.random() < 0.1:
+            return f'{mark}-{self._chinese_sentence()}\n{mark}-{self._chinese_sentence()}'
+        if self._random.random() < 0.05:
+            return f'{mark}VIDEO {self._chinese_sentence()}'
+        return mark + self._chinese_sentence()
+
+    def _english_content(self) -> str:
+        words = self._random.choices(
+            self._english_words, k=self._random.randint(3, 14))
+        if len(words) > 7:
+            return ' '.join(words[:7]) + '\n' + ' '.join(words[7:])
+        return ' '.join(words)
+
+    def _timings(self, cue_count: int) -> list[tuple[timedelta, timedelta]]:
+        timings: list[tuple[timedelta, timedelta]] = []
+        start = 5_000
+        for _ in range(cue_count):
+            duration = self._random.randint(800, 4_000)
+            timings.append((timedelta(milliseconds=start),
+                           timedelta(milliseconds=start + duration)))
+            start += duration + self._random.randint(80, 2_000)
+        return timings
+
+    def _with_repetitions(self, contents: list[str]) -> list[str]:
+        for index in range(len(contents)):
+            if index > 0 and self._random.random() < 0.15:
+                contents[index] = contents[self._random.randrange(index)]
+        return contents
+
+    def chinese_and_english_srt(self, cue_count: int) -> tuple[str, str]:
+        '''A chinese subtitle and its english translation, with slightly different timings'''
+        timings = self._timings(cue_count)
+        chinese = self._with_repetitions(
+            [self._chinese_content() for _ in range(cue_count)])
+        english = self._with_repetitions(
+            [self._english_content() for _ in range(cue_count)])
+
+        chinese_subs = [srt.Subtitle(index=None, start=start, end=end, content=content)
+                        for (start, end), content in zip(timings, chinese)]
+        english_subs = [srt.Subtitle(
+            index=None,
+            start=start + timedelta(milliseconds=self._random.randint(-200, 200)),
+            end=end + timedelta(milliseconds=self._random.randint(-200, 200)),
+            content=content)
+            for (start, end), content in zip(timings, english)]
+        return (srt.compose(chinese_subs), srt.compose(english_subs))
+
+    def chinese_srt(self, cue_count: int) -> str:
+        return self.chinese_and_english_srt(cue_count)[0]
+
+    def chinese_ass(self, cue_count: int) -> str:
+        '''Uses the script info and styles of the chinese ASS fixture'''
+        header = CHINESE_SUBTITLE_ASS[:CHINESE_SUBTITLE_ASS.index(
+            'Dialogue:')]
+        contents = self._with_repetitions(
+            [self._chinese_content().replace('\n', '\\N') for _ in range(cue_count)])
+
+        def ass_timestamp(time: timedelta) -> str:
+            centiseconds = time // timedelta(milliseconds=10)
+            return f'{centiseconds // 360_000}:{centiseconds // 6000 % 60:02}:' \
+                f'{centiseconds // 100 % 60:02}.{centiseconds % 100:02}'
+
+        dialogues = [f'Dialogue: 0,{ass_timestamp(start)},{ass_timestamp(end)},Default,,0,0,0,,{content}\n'
+                     for (start, end), content in zip(self._timings(cue_count), contents)]
+        return header + ''.join(dialogues)
@@ -0,0 +1,61 @@
+'''
+Measures extracting a subtitle track from a large Matroska file by memory mapping it and
+skipping the video frames, compared with running `mkvextract` when it is installed.
+Run from the `src` directory: `python3 -m benchmarks.extract`
+'''
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from benchmarks.matroska import SUBTITLE, VIDEO, TrackSpec, block_group, build_cluster, build_matroska, simple_block
+from infra.file_info_reader import FileInfoReader
+from infra.file_info_reader_matroska import FileInfoReaderMatroska
+from infra.file_system import FileSystem
+
+
+def write_video(file_path: str, clusters: int, frame_bytes: int) -> None:
+    '''A cluster per second, each with a video frame and a subtitle event'''
+    with open(file_path, 'wb') as file:
+        file.write(build_matroska(
+            [TrackSpec(VIDEO, 'V_MPEG4/ISO/AVC'), TrackSpec(SUBTITLE, 'S_TEXT/UTF8', 'chi')],
+            clusters=[build_cluster(index * 1000, [
+                simple_block(1, 0, bytes(frame_bytes)),
+                block_group(2, 0, 900, f'第{index}句字幕'.encode('utf-8')),
+            ]) for index in range(clusters)]))
+
+
+def measure(name: str, extract_subtitle, video_path: str, output_path: str, repeat: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        # The subtitle track is after the video track
+        extract_subtitle(video_path, 1, output_path)
+    seconds = (time.perf_counter() - started_at) / repeat
+    print(f'{name:<10} {seconds * 1000:8.1f} ms per extraction, {os.path.getsize(output_path)} bytes of subtitles')
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clusters', type=int, default=1400)
+    parser.add_argument('--frame-bytes', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir_path:
+        video_path = os.path.join(dir_path, 'video.mkv')
+        output_path = os.path.join(dir_path, 'track.srt')
+        write_video(video_path, args.clusters, args.frame_bytes)
+        print(f'{os.path.getsize(video_path)} bytes of Matroska file')
+
+        native_reader = FileInfoReaderMatroska(FileInfoReader(), FileSystem())
+        native_seconds = measure('matroska', native_reader.extract_subtitle, video_path, output_path, args.repeat)
+        if shutil.which('mkvextract') is None:
+            print('mkvextract not installed, not compared with the Matroska extractor')
+            return
+        mkvextract_seconds = measure('mkvextract', FileInfoReader().extract_subtitle, video_path, output_path, args.repeat)
+        print(f'matroska is {mkvextract_seconds / native_seconds:.1f}x faster than mkvextract')
+
+
+if __name__ == '__main__':
+    main()
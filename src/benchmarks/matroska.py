@@ -0,0 +1,124 @@
+'''
+Builds small Matroska files, with the elements read by the tool, to benchmark and test
+reading them without mkvtoolnix.
+'''
+from typing import NamedTuple
+from infra import matroska_probe as ids
+from infra.matroska_extractor import BLOCK_DURATION_ID, BLOCK_GROUP_ID, BLOCK_ID, CLUSTER_TIMESTAMP_ID, SIMPLE_BLOCK_ID
+
+VIDEO = 1
+AUDIO = 2
+SUBTITLE = 17
+VOID_ID = 0xEC
+
+
+class TrackSpec(NamedTuple):
+    type: int
+    codec_id: str
+    language: str | None = None
+    language_bcp47: str | None = None
+    codec_private: bytes | None = None
+    # The algorithm and settings of the compression of the frames, like (0, b'') for zlib
+    compression: tuple[int, bytes] | None = None
+    # Nanoseconds
+    default_duration: int | None = None
+
+
+def encode_id(element_id: int) -> bytes:
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big')
+
+
+def encode_size(size: int) -> bytes:
+    length = 1
+    # The size with all its bits set means unknown size
+    while size >= (1 << (7 * length)) - 1:
+        length += 1
+    return ((1 << (7 * length)) | size).to_bytes(length, 'big')
+
+
+def element(element_id: int, *children: bytes) -> bytes:
+    data = b''.join(children)
+    return encode_id(element_id) + encode_size(len(data)) + data
+
+
+def uint_element(element_id: int, value: int, length: int | None = None) -> bytes:
+    return element(element_id, value.to_bytes(length or max(1, (value.bit_length() + 7) // 8), 'big'))
+
+
+def string_element(element_id: int, value: str) -> bytes:
+    return element(element_id, value.encode('utf-8'))
+
+
+def build_track_entry(number: int, track: TrackSpec) -> bytes:
+    children = [
+        uint_element(ids.TRACK_NUMBER_ID, number),
+        uint_element(ids.TRACK_TYPE_ID, track.type),
+        string_element(ids.CODEC_ID_ID, track.codec_id),
+    ]
+    if track.language is not None:
+        children.append(string_element(ids.LANGUAGE_ID, track.language))
+    if track.language_bcp47 is not None:
+        children.append(string_element(ids.LANGUAGE_BCP47_ID, track.language_bcp47))
+    if track.codec_private is not None:
+        children.append(element(ids.CODEC_PRIVATE_ID, track.codec_private))
+    if track.default_duration is not None:
+        children.append(uint_element(ids.DEFAULT_DURATION_ID, track.default_duration))
+    if track.compression is not None:
+        algorithm, settings = track.compression
+        children.append(element(ids.CONTENT_ENCODINGS_ID, element(
+            ids.CONTENT_ENCODING_ID,
+            uint_element(ids.CONTENT_ENCODING_SCOPE_ID, 1),
+            element(ids.CONTENT_COMPRESSION_ID,
+                    uint_element(ids.CONTENT_COMP_ALGO_ID, algorithm),
+                    element(ids.CONTENT_COMP_SETTINGS_ID, settings)))))
+    return element(ids.TRACK_ENTRY_ID, *children)
+
+
+def _encode_block(track_number: int, relative_timestamp: int, flags: int, frame: bytes) -> bytes:
+    return encode_size(track_number) + relative_timestamp.to_bytes(2, 'big', signed=True) + bytes([flags]) + frame
+
+
+def simple_block(track_number: int, relative_timestamp: int, frame: bytes) -> bytes:
+    '''A block without duration, like the video and audio frames'''
+    return element(SIMPLE_BLOCK_ID, _encode_block(track_number, relative_timestamp, 0x80, frame))
+
+
+def block_group(track_number: int, relative_timestamp: int, duration: int, frame: bytes) -> bytes:
+    '''A block with duration, like the subtitle events'''
+    return element(
+        BLOCK_GROUP_ID,
+        element(BLOCK_ID, _encode_block(track_number, relative_timestamp, 0, frame)),
+        uint_element(BLOCK_DURATION_ID, duration))
+
+
+def build_cluster(timestamp: int, blocks: list[bytes]) -> bytes:
+    return element(ids.CLUSTER_ID, uint_element(CLUSTER_TIMESTAMP_ID, timestamp), *blocks)
+
+
+def build_matroska(
+        tracks: list[TrackSpec],
+        clusters: list[bytes] | None = None,
+        tracks_after_clusters: bool = False,
+        doc_type: str = 'matroska') -> bytes:
+    '''
+    Parameters:
+    clusters: The encoded clusters of the segment.
+    tracks_after_clusters: To write the tracks at the end, found with a seek head, like files
+    whose header is rewritten after being muxed.
+    '''
+    ebml = element(ids.EBML_ID, string_element(ids.DOC_TYPE_ID, doc_type))
+    tracks_element = element(ids.TRACKS_ID, *[build_track_entry(index + 1, track)
+                                              for index, track in enumerate(tracks)])
+    info = element(ids.INFO_ID, element(VOID_ID, bytes(16)))
+    clusters_data = b''.join(clusters or [])
+    if not tracks_after_clusters:
+        return ebml + element(ids.SEGMENT_ID, info, tracks_element, clusters_data)
+
+    def build_seek_head(tracks_position: int) -> bytes:
+        return element(ids.SEEK_HEAD_ID, element(
+            ids.SEEK_ID,
+            element(ids.SEEK_ID_ID, encode_id(ids.TRACKS_ID)),
+            uint_element(ids.SEEK_POSITION_ID, tracks_position, length=8)))
+
+    tracks_position = len(build_seek_head(0)) + len(info) + len(clusters_data)
+    return ebml + element(ids.SEGMENT_ID, build_seek_head(tracks_position), info, clusters_data, tracks_element)
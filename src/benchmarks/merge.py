@@ -0,0 +1,77 @@
+'''
+Compares the strategies of `SubtitleManipulator.add_language` on large subtitles.
+Run from the `src` directory: `python3 -m benchmarks.merge`
+'''
+import argparse
+import random
+import time
+from app.core.cue import Cue
+from app.core.subtitle_manipulator import MergeStrategy, SubtitleManipulator
+from infra.file_system_fake import FileSystemFake
+
+
+def generate_subtitles(cue_count: int, seed: int) -> tuple[list[Cue], list[Cue]]:
+    '''
+    Chinese and english subtitles with slightly different timings. Some english
+    subtitles are split in two, like translations that do not follow the original lines.
+    '''
+    randomizer = random.Random(seed)
+    chinese: list[Cue] = []
+    english: list[Cue] = []
+    start = 0
+    for index in range(cue_count):
+        duration = randomizer.randint(800, 4000)
+        chinese.append(Cue(
+            start=start, end=start + duration, content=f'中文字幕{index}', index=index + 1))
+
+        english_start = start + randomizer.randint(-300, 300)
+        english_end = start + duration + randomizer.randint(-300, 300)
+        if randomizer.random() < 0.1:
+            middle = (english_start + english_end) // 2
+            english.append(Cue(
+                start=english_start, end=middle, content=f'English {index} (1)'))
+            english.append(Cue(
+                start=middle + 50, end=english_end, content=f'English {index} (2)'))
+        else:
+            english.append(Cue(
+                start=english_start, end=english_end, content=f'English {index}'))
+
+        start += duration + randomizer.randint(100, 1500)
+
+    return (chinese, english)
+
+
+def copy_subtitles(subtitles: list[Cue]) -> list[Cue]:
+    return [Cue(start=sub.start, end=sub.end, content=sub.content, index=sub.index)
+            for sub in subtitles]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cues', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    chinese, english = generate_subtitles(args.cues, args.seed)
+    manipulator = SubtitleManipulator(FileSystemFake())
+    print(f'{len(chinese)} chinese and {len(english)} english subtitles')
+
+    for strategy in MergeStrategy:
+        best = float('inf')
+        merged_count = 0
+        for _ in range(args.repeat):
+            subs, other_subs = copy_subtitles(chinese), copy_subtitles(english)
+            started_at = time.perf_counter()
+            merged = manipulator.add_language(
+                subs, other_subs, strategy=strategy)
+            best = min(best, time.perf_counter() - started_at)
+            merged_count = len(merged)
+
+        unmerged_count = merged_count - len(chinese)
+        print(f'{strategy.value:<15} {best:8.3f}s  {len(chinese) / best:12,.0f} cues/s  '
+              f'{unmerged_count} english subtitles not merged')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+'''
+Compares decoding the `mkvmerge -J` output of a video with pydantic and with the probe
+decoder, which only decodes the subtitle tracks, and probing a Matroska file by reading
+its header and running `mkvmerge` when it is installed.
+Run from the `src` directory: `python3 -m benchmarks.probe`
+'''
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from benchmarks.matroska import AUDIO, SUBTITLE, VIDEO, TrackSpec, build_matroska, element
+from infra.file_info_reader import FileInfoReader
+from infra.file_info_reader_interface import FileInfoDto, get_subtitle_tracks
+from infra.file_info_reader_matroska import FileInfoReaderMatroska
+from infra.file_system import FileSystem
+from infra.matroska_probe import CLUSTER_ID
+from infra.probe_decoder import decode_subtitle_tracks
+
+
+def generate_probe_output(subtitle_count: int, attachment_count: int) -> bytes:
+    '''Like the output of an anime episode, with many subtitle languages and embedded fonts'''
+    tracks = [
+        {'codec': 'AVC/H.264/MPEG-4p10', 'id': 0, 'type': 'video',
+         'properties': {'language': 'und', 'pixel_dimensions': '1920x1080', 'codec_id': 'V_MPEG4/ISO/AVC',
+                        'default_track': True, 'number': 1, 'uid': 1}},
+        {'codec': 'AAC', 'id': 1, 'type': 'audio',
+         'properties': {'language': 'chi', 'audio_channels': 2, 'audio_sampling_frequency': 48000,
+                        'codec_id': 'A_AAC', 'default_track': True, 'number': 2, 'uid': 2}},
+    ]
+    for index in range(subtitle_count):
+        tracks.append({
+            'codec': 'SubStationAlpha' if index % 2 == 0 else 'SubRip/SRT',
+            'id': index + 2,
+            'type': 'subtitles',
+            'properties': {'language': 'chi' if index == 0 else 'eng', 'codec_id': 'S_TEXT/ASS',
+                           'encoding': 'UTF-8', 'text_subtitles': True, 'number': index + 3,
+                           'uid': index + 3, 'track_name': f'Subtitle {index}'}})
+    return json.dumps({
+        'container': {'type': 'Matroska', 'recognized': True, 'supported': True,
+                      'properties': {'duration': 1420000000000, 'title': 'Episode', 'writing_application': 'mkvmerge'}},
+        'file_name': 'video.mkv',
+        'attachments': [{'content_type': 'font/ttf', 'file_name': f'font_{index}.ttf', 'id': index + 1,
+                         'size': 1_000_000, 'properties': {'uid': index}}
+                        for index in range(attachment_count)],
+        'chapters': [{'num_entries': 6}],
+        'global_tags': [],
+        'track_tags': [],
+        'tracks': tracks,
+    }).encode('utf-8')
+
+
+def measure(name: str, decode, probe_input: bytes | str, repeat: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        decode(probe_input)
+    seconds = (time.perf_counter() - started_at) / repeat
+    print(f'{name:<10} {seconds * 1_000_000:8.1f} us per probe')
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subtitles', type=int, default=20)
+    parser.add_argument('--attachments', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5000)
+    parser.add_argument('--cluster-bytes', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    raw_json = generate_probe_output(args.subtitles, args.attachments)
+    print(f'{len(raw_json)} bytes of mkvmerge output')
+    pydantic_seconds = measure(
+        'pydantic', lambda raw: get_subtitle_tracks(FileInfoDto.parse_raw(raw)), raw_json, args.repeat)
+    decoder_seconds = measure(
+        'decoder', decode_subtitle_tracks, raw_json, args.repeat)
+    print(f'decoder is {pydantic_seconds / decoder_seconds:.1f}x faster')
+
+    tracks = [TrackSpec(VIDEO, 'V_MPEG4/ISO/AVC'), TrackSpec(AUDIO, 'A_AAC', 'chi')]
+    tracks += [TrackSpec(SUBTITLE, 'S_TEXT/ASS' if index % 2 == 0 else 'S_TEXT/UTF8', 'chi' if index == 0 else 'eng')
+               for index in range(args.subtitles)]
+    with tempfile.TemporaryDirectory() as dir_path:
+        video_path = os.path.join(dir_path, 'video.mkv')
+        with open(video_path, 'wb') as file:
+            file.write(build_matroska(tracks, clusters=[element(CLUSTER_ID, bytes(args.cluster_bytes))]))
+        print(f'{os.path.getsize(video_path)} bytes of Matroska file')
+
+        native_reader = FileInfoReaderMatroska(FileInfoReader(), FileSystem())
+        native_seconds = measure('matroska', native_reader.get_subtitle_tracks, video_path, args.repeat)
+        if shutil.which('mkvmerge') is None:
+            print('mkvmerge not installed, not compared with the Matroska reader')
+            return
+        mkvmerge_seconds = measure(
+            'mkvmerge', FileInfoReader().get_subtitle_tracks, video_path, max(1, args.repeat // 100))
+        print(f'matroska is {mkvmerge_seconds / native_seconds:.1f}x faster than mkvmerge')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+'''
+Measures the cold start of the tool: the time a new interpreter takes to import `main`
+compared with an empty interpreter, the modules that take the longest to import, and
+whether modules only needed later are imported at start.
+Run from the `src` directory: `python3 -m benchmarks.startup`
+'''
+from typing import NamedTuple
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE_PATH = os.path.join(
+    os.path.dirname(__file__), 'baselines', 'startup.json')
+DEFAULT_REPEAT = 15
+DEFAULT_TOLERANCE = 0.3
+# Smaller differences are noise of starting a process, not regressions
+MIN_DIFF_SECONDS = 0.01
+# Modules that must only be imported by the stages that need them
+DEFERRED_MODULES = ['pypinyin', 'prompt_toolkit', 'srt', 'multiprocessing']
+
+COMMANDS = {
+    'python': [sys.executable, '-c', 'pass'],
+    'import main': [sys.executable, '-c', 'import main'],
+    'main --help': [sys.executable, 'main.py', '--help'],
+}
+
+
+class StartupResult(NamedTuple):
+    name: str
+    median_seconds: float
+    min_seconds: float
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_microseconds: int
+    cumulative_microseconds: int
+
+
+def measure_command(name: str, repeat: int) -> StartupResult:
+    durations: list[float] = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        subprocess.run(COMMANDS[name], cwd=SRC_DIR_PATH, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - started_at)
+    return StartupResult(
+        name=name,
+        median_seconds=statistics.median(durations),
+        min_seconds=min(durations))
+
+
+def measure_imports(module: str = 'main') -> list[ImportTime]:
+    '''Import times reported by `python -X importtime`, the slowest first'''
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC_DIR_PATH, check=True, capture_output=True, text=True).stderr
+
+    import_times: list[ImportTime] = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, name = line[len('import time:'):].split('|')
+        import_times.append(ImportTime(
+            module=name.strip(),
+            self_microseconds=int(self_time),
+            cumulative_microseconds=int(cumulative_time)))
+    return sorted(import_times, key=lambda import_time: import_time.cumulative_microseconds, reverse=True)
+
+
+def get_deferred_modules_imported(module: str = 'main') -> list[str]:
+    code = f'import json, sys, {module}; ' \
+        f'print(json.dumps([name for name in {DEFERRED_MODULES!r} if name in sys.modules]))'
+    output = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR_PATH,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def compare_with_baseline(results: list[StartupResult], baseline: dict, tolerance: float) -> list[str]:
+    '''
+    Returns a message for each command slower than the baseline. The time of an empty
+    interpreter is subtracted, so a slower machine does not look like a regression.
+    '''
+    baseline_results = {result['name']: result['median_seconds']
+                        for result in baseline.get('results', [])}
+    current_results = {result.name: result.median_seconds for result in results}
+    python_seconds = current_results.get('python', 0.0)
+    baseline_python_seconds = baseline_results.get('python', 0.0)
+
+    regressions: list[str] = []
+    for result in results:
+        if result.name == 'python' or result.name not in baseline_results:
+            continue
+        own_seconds = result.median_seconds - python_seconds
+        baseline_own_seconds = baseline_results[result.name] - baseline_python_seconds
+        if own_seconds > baseline_own_seconds * (1 + tolerance) \
+                and own_seconds - baseline_own_seconds > MIN_DIFF_SECONDS:
+            regressions.append(
+                f'{result.name}: {own_seconds * 1000:.0f} ms over the interpreter start, '
+                f'baseline {baseline_own_seconds * 1000:.0f} ms')
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--top', type=int, default=15,
+                        help='Number of the slowest imports to show')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown compared with the baseline')
+    parser.add_argument('--check', action='store_true',
+                        help='Exit with an error when there are regressions')
+    args = parser.parse_args()
+
+    results = [measure_command(name, args.repeat) for name in COMMANDS]
+    for result in results:
+        print(f'{result.name:<12} median {result.median_seconds * 1000:7.1f} ms '
+              f'min {result.min_seconds * 1000:7.1f} ms')
+
+    import_times = measure_imports()[:args.top]
+    print('\nSlowest imports of main (cumulative, self):')
+    for import_time in import_times:
+        print(f'{import_time.cumulative_microseconds / 1000:7.1f} ms '
+              f'{import_time.self_microseconds / 1000:7.1f} ms  {import_time.module}')
+
+    deferred_modules_imported = get_deferred_modules_imported()
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [result._asdict() for result in results],
+        'imports': [import_time._asdict() for import_time in import_times],
+    }
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        return
+
+    regressions = [f'{module} is imported at start'
+                   for module in deferred_modules_imported]
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions += compare_with_baseline(
+                results, json.load(baseline_file), args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if args.check and len(regressions) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+'''
+Benchmarks the hot paths of the subtitle core on synthetic corpora, and compares the
+results with a stored baseline. Run from the `src` directory: `python3 -m benchmarks.suite`
+'''
+from typing import Callable, NamedTuple
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from app.core.subtitle_converter import SubtitleConverter
+from app.core.subtitle_manipulator import SubtitleManipulator
+from benchmarks.corpus import CorpusGenerator
+from infra.file_info_reader_interface import FileInfoDto
+from infra.file_system_fake import FileSystemFake
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_BASELINE_PATH = os.path.join(
+    os.path.dirname(__file__), 'baselines', 'baseline.json')
+DEFAULT_TOLERANCE = 0.2
+# Smaller memory differences are noise of the interpreter, not regressions
+MIN_MEMORY_DIFF_BYTES = 64 * 1024
+PROBE_FIXTURE_PATH = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'fixture_file_info_ass.json')
+
+CHINESE_PATH = 'bench/chinese.srt'
+ENGLISH_PATH = 'bench/english.srt'
+ASS_PATH = 'bench/chinese.ass'
+OUTPUT_PATH = 'bench/output.srt'
+
+
+class BenchmarkCase(NamedTuple):
+    '''
+    setup: Given the corpus size, prepares the data and returns the function to measure
+    and the number of items it processes.
+    '''
+    name: str
+    unit: str
+    setup: Callable[[int], tuple[Callable[[], object], int]]
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    size: int
+    unit: str
+    items: int
+    seconds: float
+    items_per_second: float
+    peak_memory_bytes: int
+
+
+def _setup_add_pinyin_to_subtitle(size: int) -> tuple[Callable[[], object], int]:
+    file_system = FileSystemFake(initial_files={
+        CHINESE_PATH: CorpusGenerator().chinese_srt(size)})
+    manipulator = SubtitleManipulator(file_system)
+    return (lambda: manipulator.add_pinyin_to_subtitle(CHINESE_PATH, OUTPUT_PATH), size)
+
+
+def _setup_add_language_to_subtitle(size: int) -> tuple[Callable[[], object], int]:
+    chinese, english = CorpusGenerator().chinese_and_english_srt(size)
+    file_system = FileSystemFake(initial_files={
+        CHINESE_PATH: chinese, ENGLISH_PATH: english})
+    manipulator = SubtitleManipulator(file_system)
+    return (lambda: manipulator.add_language_to_subtitle(CHINESE_PATH, ENGLISH_PATH, OUTPUT_PATH), size)
+
+
+def _setup_convert_ass_to_srt(size: int) -> tuple[Callable[[], object], int]:
+    file_system = FileSystemFake(initial_files={
+        ASS_PATH: CorpusGenerator().chinese_ass(size)})
+    converter = SubtitleConverter(file_system)
+    return (lambda: converter.convert_ass_to_srt(ASS_PATH, OUTPUT_PATH), size)
+
+
+def _setup_read_ass_subtitles(size: int) -> tuple[Callable[[], object], int]:
+    file_system = FileSystemFake(initial_files={
+        ASS_PATH: CorpusGenerator().chinese_ass(size)})
+    converter = SubtitleConverter(file_system)
+    return (lambda: converter.read_ass_subtitles(ASS_PATH), size)
+
+
+def _setup_parse_probe(size: int) -> tuple[Callable[[], object], int]:
+    '''One probe is parsed for each 100 cues, about one video per subtitle file'''
+    with open(PROBE_FIXTURE_PATH, encoding='utf-8') as probe_file:
+        raw_probe = probe_file.read()
+    probe_count = max(size // 100, 1)
+
+    def parse_probes() -> None:
+        for _ in range(probe_count):
+            FileInfoDto.parse_raw(raw_probe)
+
+    return (parse_probes, probe_count)
+
+
+def _setup_to_pinyin(size: int) -> tuple[Callable[[], object], int]:
+    manipulator = SubtitleManipulator(FileSystemFake())
+    lines = [line for line in CorpusGenerator().chinese_srt(size).splitlines()
+             if line != '' and '-->' not in line and not line.isdigit()]
+
+    def to_pinyin() -> None:
+        for line in lines:
+            manipulator._to_pinyin(line)
+
+    return (to_pinyin, len(lines))
+
+
+CASES = [
+    BenchmarkCase('add_pinyin_to_subtitle', 'cues',
+                  _setup_add_pinyin_to_subtitle),
+    BenchmarkCase('add_language_to_subtitle', 'cues',
+                  _setup_add_language_to_subtitle),
+    BenchmarkCase('convert_ass_to_srt', 'cues', _setup_convert_ass_to_srt),
+    BenchmarkCase('read_ass_subtitles', 'cues', _setup_read_ass_subtitles),
+    BenchmarkCase('FileInfoDto.parse_raw', 'probes', _setup_parse_probe),
+    BenchmarkCase('_to_pinyin', 'lines', _setup_to_pinyin),
+]
+
+
+def run_case(case: BenchmarkCase, size: int, repeat: int) -> BenchmarkResult:
+    '''
+    The time is the best of `repeat` runs. The peak memory is measured on a separate run,
+    since tracing the allocations slows it down.
+    '''
+    run, items = case.setup(size)
+    best = float('inf')
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started_at)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=case.name,
+        size=size,
+        unit=case.unit,
+        items=items,
+        seconds=best,
+        items_per_second=items / best,
+        peak_memory_bytes=peak_memory)
+
+
+def compare_with_baseline(
+        results: list[BenchmarkResult],
+        baseline: dict,
+        tolerance: float) -> list[str]:
+    '''Returns a message for each result slower or using more memory than the baseline'''
+    baseline_results = {(result['name'], result['size']): result
+                        for result in baseline.get('results', [])}
+    regressions: list[str] = []
+    for result in results:
+        baseline_result = baseline_results.get((result.name, result.size))
+        if baseline_result is None:
+            continue
+        if result.items_per_second < baseline_result['items_per_second'] * (1 - tolerance):
+            regressions.append(
+                f'{result.name} ({result.size}): {result.items_per_second:,.0f} {result.unit}/s, '
+                f'baseline {baseline_result["items_per_second"]:,.0f} {result.unit}/s')
+        if result.peak_memory_bytes > baseline_result['peak_memory_bytes'] * (1 + tolerance) \
+                and result.peak_memory_bytes - baseline_result['peak_memory_bytes'] > MIN_MEMORY_DIFF_BYTES:
+            regressions.append(
+                f'{result.name} ({result.size}): peak memory {result.peak_memory_bytes:,} bytes, '
+                f'baseline {baseline_result["peak_memory_bytes"]:,} bytes')
+    return regressions
+
+
+def to_report(results: list[BenchmarkResult], previous_report: dict | None = None) -> dict:
+    '''Results of the previous report that were not measured again are kept'''
+    measured = {(result.name, result.size) for result in results}
+    previous_results = [] if previous_report is None else [
+        result for result in previous_report.get('results', [])
+        if (result['name'], result['size']) not in measured]
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': previous_results + [result._asdict() for result in results],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Number of cues of each corpus')
+    parser.add_argument('--cases', nargs='+', choices=[case.name for case in CASES],
+                        help='Only run these cases')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown or memory increase compared with the baseline')
+    parser.add_argument('--check', action='store_true',
+                        help='Exit with an error when there are regressions')
+    args = parser.parse_args()
+
+    results: list[BenchmarkResult] = []
+    for case in CASES:
+        if args.cases is not None and case.name not in args.cases:
+            continue
+        for size in args.sizes:
+            result = run_case(case, size, args.repeat)
+            results.append(result)
+            print(f'{result.name:<26} {result.size:>8} {result.seconds:9.3f}s '
+                  f'{result.items_per_second:14,.0f} {result.unit}/s '
+                  f'{result.peak_memory_bytes / 1_000_000:9.1f} MB')
+
+    report = to_report(results)
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+
+    baseline: dict | None = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(to_report(results, baseline), baseline_file, indent=2)
+        return
+
+    if baseline is None:
+        return
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if args.check and len(regressions) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
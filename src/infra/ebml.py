@@ -0,0 +1,95 @@
+from typing import BinaryIO, Iterator, NamedTuple
+from infra.exceptions.unsupported_matroska_exception import UnsupportedMatroskaException
+
+# Size of elements whose end is only known when the next element starts, like live streams
+UNKNOWN_SIZE = -1
+
+
+class ElementHeader(NamedTuple):
+    '''
+    id: Kept with its length marker, like the IDs of the specification (0x1A45DFA3).
+    data_position: Offset of the data of the element in the file.
+    '''
+    id: int
+    size: int
+    data_position: int
+
+    def get_end_position(self) -> int | None:
+        return None if self.size == UNKNOWN_SIZE else self.data_position + self.size
+
+
+def read_vint(file: BinaryIO, keep_marker: bool = False) -> tuple[int, int] | None:
+    '''
+    Reads a variable size integer, returns its value and length, or None at the end of the file.
+    Parameters:
+    keep_marker: To read element IDs, which keep the bit marking their length.
+    '''
+    first_byte = file.read(1)
+    if len(first_byte) == 0:
+        return None
+    byte = first_byte[0]
+    if byte == 0:
+        raise UnsupportedMatroskaException('Variable size integer longer than 8 bytes')
+
+    length = 9 - byte.bit_length()
+    rest = file.read(length - 1)
+    if len(rest) != length - 1:
+        raise UnsupportedMatroskaException('Truncated variable size integer')
+    value = byte if keep_marker else byte & ((1 << (8 - length)) - 1)
+    for rest_byte in rest:
+        value = (value << 8) | rest_byte
+    return (value, length)
+
+
+def read_element_header(file: BinaryIO) -> ElementHeader | None:
+    '''Reads the header of the element at the current position, None at the end of the file'''
+    element_id = read_vint(file, keep_marker=True)
+    if element_id is None:
+        return None
+    size = read_vint(file)
+    if size is None:
+        raise UnsupportedMatroskaException('Truncated element header')
+
+    value, length = size
+    return ElementHeader(
+        id=element_id[0],
+        size=UNKNOWN_SIZE if value == (1 << (7 * length)) - 1 else value,
+        data_position=file.tell())
+
+
+def read_data(file: BinaryIO, header: ElementHeader) -> bytes:
+    '''The data of an element whose header has just been read'''
+    if header.size == UNKNOWN_SIZE:
+        raise UnsupportedMatroskaException(f'Unknown size of element {header.id:#x}')
+    data = file.read(header.size)
+    if len(data) != header.size:
+        raise UnsupportedMatroskaException(f'Truncated element {header.id:#x}')
+    return data
+
+
+def read_uint(file: BinaryIO, header: ElementHeader) -> int:
+    return int.from_bytes(read_data(file, header), 'big')
+
+
+def read_string(file: BinaryIO, header: ElementHeader) -> str:
+    '''ASCII and UTF-8 strings, which may be padded with zeros'''
+    return read_data(file, header).rstrip(b'\0').decode('utf-8', errors='replace')
+
+
+def iter_children(file: BinaryIO, parent: ElementHeader) -> Iterator[ElementHeader]:
+    '''
+    The headers of the child elements, the file is positioned at the data of each one when
+    yielded and can be read. Stops at a child of unknown size, since its end is not known.
+    '''
+    end_position = parent.get_end_position()
+    position = parent.data_position
+    while end_position is None or position < end_position:
+        file.seek(position)
+        header = read_element_header(file)
+        if header is None:
+            return
+        yield header
+        child_end_position = header.get_end_position()
+        if child_end_position is None:
+            return
+        position = child_end_position
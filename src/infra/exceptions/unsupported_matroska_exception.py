@@ -0,0 +1,3 @@
+
+class UnsupportedMatroskaException(Exception):
+    """Raised when a file is not a Matroska file that can be read without mkvtoolnix"""
@@ -1,17 +1,133 @@
+from contextlib import contextmanager
+from typing import Iterable, Iterator, NamedTuple
 import subprocess
 import os
-from infra.file_info_reader_interface import IFileInfoReader, FileInfoDto
+import tempfile
+import threading
+from infra.file_info_reader_interface import IFileInfoReader, FileInfoDto, SubtitleTrack
+from infra.probe_decoder import decode_subtitle_tracks
+from infra.tracer import NullTracer
+from infra.tracer_interface import ITracer
+
+DEFAULT_PROBE_TIMEOUT_SECONDS = 60.0
+DEFAULT_EXTRACT_TIMEOUT_SECONDS = 30 * 60.0
 
 
 class FileInfoReader(IFileInfoReader):
+    def __init__(
+            self,
+            probe_timeout_seconds: float | None = DEFAULT_PROBE_TIMEOUT_SECONDS,
+            extract_timeout_seconds: float | None = DEFAULT_EXTRACT_TIMEOUT_SECONDS,
+            mkvmerge_path: str = 'mkvmerge',
+            mkvextract_path: str = 'mkvextract',
+            tracer: ITracer | None = None) -> None:
+        '''
+        Parameters:
+        probe_timeout_seconds, extract_timeout_seconds: After which the process is killed and
+        `subprocess.TimeoutExpired` raised. None to wait without limit.
+        '''
+        self._probe_timeout_seconds = probe_timeout_seconds
+        self._extract_timeout_seconds = extract_timeout_seconds
+        self._mkvmerge_path = mkvmerge_path
+        self._mkvextract_path = mkvextract_path
+        self._tracer = tracer or NullTracer()
+
+    def _probe(self, file_path: str) -> bytes:
+        with self._tracer.span('mkvmerge', file=file_path) as span:
+            raw_json = subprocess.check_output(
+                [self._mkvmerge_path, '-J', '-i', file_path],
+                stderr=subprocess.STDOUT,
+                timeout=self._probe_timeout_seconds)
+            span.set('bytes', len(raw_json))
+            return raw_json
+
     def get_file_info(self, file_path: str) -> FileInfoDto:
-        raw_json = subprocess.check_output(
-            ['mkvmerge', '-J', '-i', file_path],
-            stderr=subprocess.STDOUT)
-        return FileInfoDto.parse_raw(raw_json)
+        return FileInfoDto.parse_raw(self._probe(file_path))
+
+    def get_subtitle_tracks(self, file_path: str) -> list[SubtitleTrack]:
+        return decode_subtitle_tracks(self._probe(file_path))
 
     def extract_subtitle(self, file_path: str, track_id: int, output_path: str) -> None:
-        id_and_output = f"{track_id}:{output_path}"
-        subprocess.check_output(
-            ['mkvextract', file_path, 'tracks', id_and_output],
-            stderr=subprocess.STDOUT)
+        self.extract_subtitles(file_path, {track_id: output_path})
+
+    def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        ids_and_outputs = [f"{track_id}:{output_path}"
+                           for track_id, output_path in track_output_paths.items()]
+        with self._tracer.span('mkvextract', file=file_path, tracks=len(ids_and_outputs)):
+            subprocess.check_output(
+                [self._mkvextract_path, file_path, 'tracks', *ids_and_outputs],
+                stderr=subprocess.STDOUT,
+                timeout=self._extract_timeout_seconds)
+
+    @contextmanager
+    def stream_subtitle(self, file_path: str, track_id: int) -> Iterator[Iterable[str]]:
+        '''
+        mkvextract writes the track to a named pipe, which is read while it is written.
+        Both ends of the pipe are opened before starting mkvextract, and the write end is kept
+        open until it exits, so the reader never waits for a pipe mkvextract does not open.
+        The process is killed when the extraction timeout expires, even while the track is
+        being read, or when leaving the context before it finishes.
+        '''
+        with tempfile.TemporaryDirectory() as fifo_dir, \
+                self._tracer.span('mkvextract', file=file_path, tracks=1):
+            fifo_path = os.path.join(fifo_dir, f'track_{track_id}')
+            os.mkfifo(fifo_path)
+            # Opening the read end without blocking lets the write end be opened by this process too
+            read_fd = os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+            with open(read_fd, encoding='utf-8') as track_file:
+                write_fd = os.open(fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+                os.set_blocking(read_fd, True)
+                args = [self._mkvextract_path, file_path, 'tracks', f'{track_id}:{fifo_path}']
+                try:
+                    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                except BaseException:
+                    os.close(write_fd)
+                    raise
+                results: list[_ExtractionResult | BaseException] = []
+                waiter = threading.Thread(
+                    target=_wait_extraction,
+                    args=(process, write_fd, self._extract_timeout_seconds, results),
+                    daemon=True)
+                waiter.start()
+                try:
+                    yield track_file
+                finally:
+                    if process.poll() is None:
+                        process.kill()
+                    waiter.join()
+            errors = [result for result in results if isinstance(result, BaseException)]
+            if len(errors) > 0:
+                raise errors[0]
+            output, timed_out = results[0]
+            if timed_out:
+                raise subprocess.TimeoutExpired(args, self._extract_timeout_seconds or 0, output)
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode, args, output)
+
+
+class _ExtractionResult(NamedTuple):
+    output: bytes
+    timed_out: bool
+
+
+def _wait_extraction(
+        process: subprocess.Popen,
+        write_fd: int,
+        timeout_seconds: float | None,
+        results: list[_ExtractionResult | BaseException]) -> None:
+    '''
+    Waits for mkvextract, keeping its output, and kills it when the timeout expires.
+    Then closes the write end of the pipe kept open by the reader, so the reader reaches the
+    end of the track, or reads an empty track when mkvextract exits without opening the pipe.
+    An error while waiting or closing the pipe is added to the results, to be raised by the reader.
+    '''
+    try:
+        try:
+            results.append(_ExtractionResult(process.communicate(timeout=timeout_seconds)[0], False))
+        except subprocess.TimeoutExpired:
+            process.kill()
+            results.append(_ExtractionResult(process.communicate()[0], True))
+        finally:
+            os.close(write_fd)
+    except BaseException as error:
+        results.append(error)
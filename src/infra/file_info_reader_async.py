@@ -0,0 +1,100 @@
+import os
+import subprocess
+from typing import TYPE_CHECKING
+from infra.file_info_reader import DEFAULT_EXTRACT_TIMEOUT_SECONDS, DEFAULT_PROBE_TIMEOUT_SECONDS
+from infra.file_info_reader_async_interface import IFileInfoReaderAsync
+from infra.file_info_reader_interface import FileInfoDto, SubtitleTrack
+from infra.probe_decoder import decode_subtitle_tracks
+from infra.tracer import NullTracer
+from infra.tracer_interface import ITracer
+
+if TYPE_CHECKING:
+    # Only imported when running, since asyncio slows down the start of the tool
+    import asyncio
+
+
+class FileInfoReaderAsync(IFileInfoReaderAsync):
+    '''
+    Runs mkvmerge and mkvextract as asyncio subprocesses. At most `max_processes` of them
+    run at the same time, the other calls wait for their turn.
+    A call taking longer than its timeout, or cancelled, kills its process. A timeout raises
+    `subprocess.TimeoutExpired` and a failed process `subprocess.CalledProcessError`,
+    like the blocking `FileInfoReader`.
+    '''
+
+    def __init__(
+            self,
+            max_processes: int | None = None,
+            probe_timeout_seconds: float | None = DEFAULT_PROBE_TIMEOUT_SECONDS,
+            extract_timeout_seconds: float | None = DEFAULT_EXTRACT_TIMEOUT_SECONDS,
+            mkvmerge_path: str = 'mkvmerge',
+            mkvextract_path: str = 'mkvextract',
+            tracer: ITracer | None = None) -> None:
+        '''
+        Parameters:
+        max_processes: Defaults to the number of CPUs.
+        probe_timeout_seconds, extract_timeout_seconds: None to wait without limit.
+        '''
+        self._max_processes = max_processes or os.cpu_count() or 1
+        self._probe_timeout_seconds = probe_timeout_seconds
+        self._extract_timeout_seconds = extract_timeout_seconds
+        self._mkvmerge_path = mkvmerge_path
+        self._mkvextract_path = mkvextract_path
+        self._tracer = tracer or NullTracer()
+        self._semaphore: 'asyncio.Semaphore | None' = None
+        self._semaphore_loop: 'asyncio.AbstractEventLoop | None' = None
+
+    def __getstate__(self) -> dict:
+        # The semaphore belongs to the event loop of this process
+        return {**self.__dict__, '_semaphore': None, '_semaphore_loop': None}
+
+    def _get_semaphore(self) -> 'asyncio.Semaphore':
+        import asyncio
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self._max_processes)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run(self, args: list[str], timeout_seconds: float | None, file_path: str) -> bytes:
+        '''The span only measures the process, not the wait for its turn'''
+        import asyncio
+        async with self._get_semaphore():
+            with self._tracer.span(os.path.basename(args[0]), file=file_path) as span:
+                process = await asyncio.create_subprocess_exec(
+                    *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+                try:
+                    output, _ = await asyncio.wait_for(process.communicate(), timeout_seconds)
+                except asyncio.TimeoutError:
+                    await self._kill(process)
+                    raise subprocess.TimeoutExpired(args, timeout_seconds or 0)
+                except asyncio.CancelledError:
+                    await self._kill(process)
+                    raise
+                span.set('bytes', len(output))
+
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(
+                process.returncode or 0, args, output)
+        return output
+
+    async def _kill(self, process: 'asyncio.subprocess.Process') -> None:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    async def _probe(self, file_path: str) -> bytes:
+        return await self._run([self._mkvmerge_path, '-J', '-i', file_path],
+                               self._probe_timeout_seconds, file_path)
+
+    async def get_file_info(self, file_path: str) -> FileInfoDto:
+        return FileInfoDto.parse_raw(await self._probe(file_path))
+
+    async def get_subtitle_tracks(self, file_path: str) -> list[SubtitleTrack]:
+        return decode_subtitle_tracks(await self._probe(file_path))
+
+    async def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        ids_and_outputs = [f"{track_id}:{output_path}"
+                           for track_id, output_path in track_output_paths.items()]
+        await self._run([self._mkvextract_path, file_path, 'tracks', *ids_and_outputs],
+                        self._extract_timeout_seconds, file_path)
@@ -0,0 +1,35 @@
+import asyncio
+from infra.file_info_reader_async_interface import IFileInfoReaderAsync
+from infra.file_info_reader_interface import FileInfoDto, IFileInfoReader
+
+
+class FileInfoReaderAsyncFake(IFileInfoReaderAsync):
+    '''
+    Delegates to a blocking file info reader, like `FileInfoReaderFake`, after waiting
+    `delay_seconds`, and records how many calls were running at the same time.
+    '''
+
+    def __init__(self, file_info_reader: IFileInfoReader, delay_seconds: float = 0.0) -> None:
+        self._file_info_reader = file_info_reader
+        self._delay_seconds = delay_seconds
+        self._running_calls = 0
+        self._max_running_calls = 0
+
+    def get_max_running_calls(self) -> int:
+        return self._max_running_calls
+
+    async def _wait(self) -> None:
+        self._running_calls += 1
+        self._max_running_calls = max(self._max_running_calls, self._running_calls)
+        try:
+            await asyncio.sleep(self._delay_seconds)
+        finally:
+            self._running_calls -= 1
+
+    async def get_file_info(self, file_path: str) -> FileInfoDto:
+        await self._wait()
+        return self._file_info_reader.get_file_info(file_path)
+
+    async def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        await self._wait()
+        self._file_info_reader.extract_subtitles(file_path, track_output_paths)
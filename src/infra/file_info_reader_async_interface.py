@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from infra.file_info_reader_interface import FileInfoDto, SubtitleTrack, get_subtitle_tracks
+
+
+class IFileInfoReaderAsync(ABC):
+    '''Like `IFileInfoReader`, but the calls for different files can run concurrently'''
+
+    @abstractmethod
+    async def get_file_info(self, file_path: str) -> FileInfoDto:
+        pass
+
+    async def get_subtitle_tracks(self, file_path: str) -> list[SubtitleTrack]:
+        '''Like `IFileInfoReader.get_subtitle_tracks`'''
+        return get_subtitle_tracks(await self.get_file_info(file_path))
+
+    @abstractmethod
+    async def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        pass
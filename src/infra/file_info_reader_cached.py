@@ -0,0 +1,188 @@
+import hashlib
+import json
+from typing import ContextManager, Iterable, NamedTuple
+from infra.file_info_reader_async_interface import IFileInfoReaderAsync
+from infra.file_info_reader_interface import FileInfoDto, IFileInfoReader, SubtitleTrack, get_subtitle_tracks
+from infra.file_system_interface import FileStat, IFileSystem
+from infra.probe_decoder import get_subtitle_tracks_from_dict, subtitle_tracks_to_dict
+
+CACHE_ENTRY_VERSION = 2
+
+
+class ProbeCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    invalidations: int
+
+
+class _CacheEntry(NamedTuple):
+    file_stat: FileStat
+    # Only known when the whole file info was asked for
+    file_info: FileInfoDto | None
+    subtitle_tracks: list[SubtitleTrack]
+
+
+class FileInfoReaderCached(IFileInfoReader):
+    '''
+    Decorates a file info reader, storing the probed file info on disk.
+    Each file has its own cache entry, keyed on its path, size and modification time,
+    so a changed file is probed again and several processes can share the cache directory.
+    Each entry is replaced at once, so another process never reads it half written.
+    The subtitle tracks are stored apart from the whole file info, so they are read
+    without validating the file info with pydantic.
+    '''
+
+    def __init__(
+            self,
+            file_info_reader: IFileInfoReader,
+            file_system: IFileSystem,
+            cache_dir_path: str):
+        self._file_info_reader = file_info_reader
+        self._file_system = file_system
+        self._cache_dir_path = cache_dir_path
+        self._memory_cache: dict[str, _CacheEntry] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._file_system.create_dir(cache_dir_path)
+
+    def _get_entry_path(self, file_path: str) -> str:
+        key = hashlib.sha1(file_path.encode('utf-8')).hexdigest()
+        return self._file_system.join_path(self._cache_dir_path, f'{key}.json')
+
+    def _read_entry(self, file_path: str, file_stat: FileStat) -> _CacheEntry | None:
+        entry_path = self._get_entry_path(file_path)
+        if not self._file_system.path_exists(entry_path):
+            return None
+
+        try:
+            entry = json.loads(self._file_system.read(entry_path))
+        except ValueError:
+            return None
+
+        if entry.get('version') != CACHE_ENTRY_VERSION or entry.get('path') != file_path:
+            return None
+        if entry.get('size') != file_stat.size or entry.get('mtime_ns') != file_stat.mtime_ns:
+            self._invalidations += 1
+            return None
+
+        file_info = entry.get('file_info')
+        return _CacheEntry(
+            file_stat=file_stat,
+            file_info=None if file_info is None else FileInfoDto.parse_obj(file_info),
+            subtitle_tracks=get_subtitle_tracks_from_dict(entry['subtitle_tracks']))
+
+    def _write_entry(self, file_path: str, cache_entry: _CacheEntry) -> None:
+        entry = {
+            'version': CACHE_ENTRY_VERSION,
+            'path': file_path,
+            'size': cache_entry.file_stat.size,
+            'mtime_ns': cache_entry.file_stat.mtime_ns,
+            'subtitle_tracks': subtitle_tracks_to_dict(cache_entry.subtitle_tracks),
+        }
+        if cache_entry.file_info is not None:
+            entry['file_info'] = json.loads(cache_entry.file_info.json())
+        self._file_system.write_atomic(self._get_entry_path(file_path), json.dumps(entry))
+        self._memory_cache[file_path] = cache_entry
+
+    def _get_entry(self, file_path: str, file_stat: FileStat) -> _CacheEntry | None:
+        memory_entry = self._memory_cache.get(file_path)
+        if memory_entry is not None and memory_entry.file_stat == file_stat:
+            return memory_entry
+
+        cache_entry = self._read_entry(file_path, file_stat)
+        if cache_entry is not None:
+            self._memory_cache[file_path] = cache_entry
+        return cache_entry
+
+    def get_stats(self) -> ProbeCacheStats:
+        return ProbeCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            invalidations=self._invalidations)
+
+    def lookup_file_info(self, file_path: str) -> tuple[FileStat, FileInfoDto | None]:
+        '''The stat of the file and its cached file info, None when it has to be probed'''
+        file_stat = self._file_system.get_file_stat(file_path)
+        cache_entry = self._get_entry(file_path, file_stat)
+        if cache_entry is not None and cache_entry.file_info is not None:
+            self._hits += 1
+            return (file_stat, cache_entry.file_info)
+
+        self._misses += 1
+        return (file_stat, None)
+
+    def store_file_info(self, file_path: str, file_stat: FileStat, file_info: FileInfoDto) -> None:
+        self._write_entry(file_path, _CacheEntry(
+            file_stat=file_stat,
+            file_info=file_info,
+            subtitle_tracks=get_subtitle_tracks(file_info)))
+
+    def lookup_subtitle_tracks(self, file_path: str) -> tuple[FileStat, list[SubtitleTrack] | None]:
+        '''The stat of the file and its cached subtitle tracks, None when they have to be probed'''
+        file_stat = self._file_system.get_file_stat(file_path)
+        cache_entry = self._get_entry(file_path, file_stat)
+        if cache_entry is not None:
+            self._hits += 1
+            return (file_stat, cache_entry.subtitle_tracks)
+
+        self._misses += 1
+        return (file_stat, None)
+
+    def store_subtitle_tracks(self, file_path: str, file_stat: FileStat, subtitle_tracks: list[SubtitleTrack]) -> None:
+        self._write_entry(file_path, _CacheEntry(
+            file_stat=file_stat,
+            file_info=None,
+            subtitle_tracks=subtitle_tracks))
+
+    def get_file_info(self, file_path: str) -> FileInfoDto:
+        file_stat, file_info = self.lookup_file_info(file_path)
+        if file_info is None:
+            file_info = self._file_info_reader.get_file_info(file_path)
+            self.store_file_info(file_path, file_stat, file_info)
+        return file_info
+
+    def get_subtitle_tracks(self, file_path: str) -> list[SubtitleTrack]:
+        file_stat, subtitle_tracks = self.lookup_subtitle_tracks(file_path)
+        if subtitle_tracks is None:
+            subtitle_tracks = self._file_info_reader.get_subtitle_tracks(file_path)
+            self.store_subtitle_tracks(file_path, file_stat, subtitle_tracks)
+        return subtitle_tracks
+
+    def extract_subtitle(self, file_path: str, track_id: int, output_path: str) -> None:
+        self._file_info_reader.extract_subtitle(file_path, track_id, output_path)
+
+    def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        self._file_info_reader.extract_subtitles(file_path, track_output_paths)
+
+    def stream_subtitle(self, file_path: str, track_id: int) -> ContextManager[Iterable[str]]:
+        return self._file_info_reader.stream_subtitle(file_path, track_id)
+
+
+class FileInfoReaderCachedAsync(IFileInfoReaderAsync):
+    '''
+    Decorates an async file info reader, sharing the cache entries of `file_info_reader_cached`,
+    so the videos probed by either reader are not probed again by the other one.
+    The entries are read and written on the event loop, only the probes run concurrently.
+    '''
+
+    def __init__(self, file_info_reader_async: IFileInfoReaderAsync, file_info_reader_cached: FileInfoReaderCached):
+        self._file_info_reader_async = file_info_reader_async
+        self._file_info_reader_cached = file_info_reader_cached
+
+    async def get_file_info(self, file_path: str) -> FileInfoDto:
+        file_stat, file_info = self._file_info_reader_cached.lookup_file_info(file_path)
+        if file_info is None:
+            file_info = await self._file_info_reader_async.get_file_info(file_path)
+            self._file_info_reader_cached.store_file_info(file_path, file_stat, file_info)
+        return file_info
+
+    async def get_subtitle_tracks(self, file_path: str) -> list[SubtitleTrack]:
+        file_stat, subtitle_tracks = self._file_info_reader_cached.lookup_subtitle_tracks(file_path)
+        if subtitle_tracks is None:
+            subtitle_tracks = await self._file_info_reader_async.get_subtitle_tracks(file_path)
+            self._file_info_reader_cached.store_subtitle_tracks(file_path, file_stat, subtitle_tracks)
+        return subtitle_tracks
+
+    async def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        await self._file_info_reader_async.extract_subtitles(file_path, track_output_paths)
@@ -1,3 +1,6 @@
+from contextlib import contextmanager
+from io import StringIO
+from typing import Iterable, Iterator
 from infra.file_info_reader_interface import FileInfoDto, IFileInfoReader
 from infra.file_system_interface import IFileSystem
 
@@ -12,14 +15,36 @@ class FileInfoReaderFake(IFileInfoReader):
 
         self._path_to_info = path_to_info
         self._file_system = file_system
+        self._extract_calls: list[tuple[str, list[int]]] = []
+        self._file_info_calls: list[str] = []
 
     def add_extracted_content(self, content: str) -> None:
         self._extracted_content.append(content)
 
+    def get_extract_calls(self) -> list[tuple[str, list[int]]]:
+        '''Returns the file path and track IDs of every extraction call'''
+        return self._extract_calls
+
+    def get_file_info_calls(self) -> list[str]:
+        '''Returns the file path of every file info call'''
+        return self._file_info_calls
+
     def get_file_info(self, file_path: str) -> FileInfoDto:
+        self._file_info_calls.append(file_path)
         return self._path_to_info[file_path]
 
     def extract_subtitle(self, file_path: str, track_id: int, output_path: str) -> None:
-        self._file_system.write(
-            path=output_path,
-            content=self._extracted_content.pop(0))
+        self.extract_subtitles(file_path, {track_id: output_path})
+
+    def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        self._extract_calls.append((file_path, list(track_output_paths.keys())))
+        for output_path in track_output_paths.values():
+            self._file_system.write(
+                path=output_path,
+                content=self._extracted_content.pop(0))
+
+    @contextmanager
+    def stream_subtitle(self, file_path: str, track_id: int) -> Iterator[Iterable[str]]:
+        '''Recorded as an extraction call of the track'''
+        self._extract_calls.append((file_path, [track_id]))
+        yield StringIO(self._extracted_content.pop(0))
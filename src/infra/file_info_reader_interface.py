@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from enum import Enum
+from typing import ContextManager, Iterable
 from pydantic import BaseModel
 
 
@@ -35,11 +36,60 @@ class FileInfoDto(BaseModel):
     tracks: list[TrackInfo]
 
 
+class SubtitleTrack:
+    '''
+    A subtitle track of a video, the only tracks needed to generate subtitles.
+    It is lighter than `TrackInfo`, which validates the track with pydantic when created.
+    '''
+    __slots__ = ('id', 'codec', 'language')
+
+    def __init__(self, id: int, codec: TrackSubCodec | str, language: Language | str) -> None:
+        self.id = id
+        self.codec = codec
+        self.language = language
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SubtitleTrack):
+            return NotImplemented
+        return (self.id, self.codec, self.language) == (other.id, other.codec, other.language)
+
+    def __repr__(self) -> str:
+        return f'SubtitleTrack(id={self.id}, codec={self.codec!r}, language={self.language!r})'
+
+
+def get_subtitle_tracks(file_info: FileInfoDto) -> list[SubtitleTrack]:
+    return [SubtitleTrack(id=track.id, codec=track.codec, language=track.properties.language)
+            for track in file_info.tracks if track.type == TrackType.SUBTITLE]
+
+
 class IFileInfoReader(ABC):
     @abstractmethod
     def get_file_info(self, file_path: str) -> FileInfoDto:
         pass
 
+    def get_subtitle_tracks(self, file_path: str) -> list[SubtitleTrack]:
+        '''
+        Only the subtitle tracks of the file info. Readers that can skip validating
+        the whole file info should override it.
+        '''
+        return get_subtitle_tracks(self.get_file_info(file_path))
+
     @abstractmethod
     def extract_subtitle(self, file_path: str, track_id: int, output_path: str) -> None:
         pass
+
+    @abstractmethod
+    def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        '''
+        Extracts several tracks reading the file only once.
+        track_output_paths: The output path of each track ID, in extraction order.
+        '''
+        pass
+
+    @abstractmethod
+    def stream_subtitle(self, file_path: str, track_id: int) -> ContextManager[Iterable[str]]:
+        '''
+        The lines of a track while it is extracted, without writing it to a file, so it can
+        be parsed before the extraction finishes. The extraction is stopped when leaving the context.
+        '''
+        pass
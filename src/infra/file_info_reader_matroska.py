@@ -0,0 +1,205 @@
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+from infra.exceptions.unsupported_matroska_exception import UnsupportedMatroskaException
+from infra.file_info_reader_async_interface import IFileInfoReaderAsync
+from infra.file_info_reader_interface import (
+    FileInfoDto, IFileInfoReader, Language, SubtitleTrack, TrackInfo, TrackInfoProperties, TrackSubCodec, TrackType)
+from infra.file_system_interface import IFileSystem
+from infra.matroska_extractor import extract_text_tracks, open_text_track
+from infra.matroska_probe import MatroskaTrack, probe_tracks
+from infra.tracer import NullTracer
+from infra.tracer_interface import ITracer
+
+MATROSKA_EXTENSIONS = ('.mkv', '.mka', '.mks', '.webm')
+_TRACK_TYPES = {1: TrackType.VIDEO, 2: TrackType.AUDIO, 17: TrackType.SUBTITLE}
+# The codec names of `mkvmerge -J` for the codec IDs of the tracks, other codecs keep their ID
+_CODEC_NAMES = {
+    'S_TEXT/UTF8': TrackSubCodec.SRT.value,
+    'S_TEXT/ASS': TrackSubCodec.ASS.value,
+    'S_TEXT/SSA': TrackSubCodec.ASS.value,
+    'S_TEXT/WEBVTT': 'WebVTT',
+    'S_TEXT/USF': 'USF',
+    'S_HDMV/PGS': 'HDMV PGS',
+    'S_HDMV/TEXTST': 'HDMV TextST',
+    'S_VOBSUB': 'VobSub',
+    'S_DVBSUB': 'DVBSUB',
+    'S_KATE': 'Kate',
+    'V_MPEG4/ISO/AVC': 'AVC/H.264/MPEG-4p10',
+    'V_MPEGH/ISO/HEVC': 'HEVC/H.265/MPEG-H',
+    'V_AV1': 'AV1',
+    'V_VP8': 'VP8',
+    'V_VP9': 'VP9',
+    'A_AAC': 'AAC',
+    'A_AC3': 'AC-3',
+    'A_EAC3': 'E-AC-3',
+    'A_DTS': 'DTS',
+    'A_FLAC': 'FLAC',
+    'A_OPUS': 'Opus',
+    'A_VORBIS': 'Vorbis',
+    'A_MPEG/L3': 'MP3',
+    'A_TRUEHD': 'TrueHD',
+}
+_SUBTITLE_CODECS: dict[str, TrackSubCodec | str] = {codec.value: codec for codec in TrackSubCodec}
+_LANGUAGES: dict[str, Language | str] = {language.value: language for language in Language}
+
+
+def _get_codec_name(codec_id: str) -> str:
+    # AAC tracks of older files have the profile in their codec ID, like `A_AAC/MPEG4/LC`
+    if codec_id.startswith('A_AAC/'):
+        return _CODEC_NAMES['A_AAC']
+    return _CODEC_NAMES.get(codec_id, codec_id)
+
+
+class _MatroskaReader:
+    '''Reads the tracks of Matroska files, the readers fall back to mkvtoolnix when it returns None'''
+
+    def __init__(self, file_system: IFileSystem, tracer: ITracer | None) -> None:
+        self._file_system = file_system
+        self._tracer = tracer or NullTracer()
+
+    def probe(self, file_path: str) -> list[MatroskaTrack] | None:
+        if not file_path.lower().endswith(MATROSKA_EXTENSIONS):
+            return None
+
+        with self._tracer.span('matroska probe', file=file_path) as span:
+            try:
+                with self._file_system.open_binary(file_path) as file:
+                    tracks = probe_tracks(file)
+            except UnsupportedMatroskaException as exception:
+                span.set('fallback', str(exception))
+                return None
+            if any(track.type not in _TRACK_TYPES for track in tracks):
+                span.set('fallback', 'Unknown track type')
+                return None
+            span.set('tracks', len(tracks))
+            return tracks
+
+    def extract(self, file_path: str, track_output_paths: dict[int, str]) -> bool:
+        '''Writes the tracks to their output paths, False when they have to be extracted by mkvextract'''
+        if not file_path.lower().endswith(MATROSKA_EXTENSIONS):
+            return False
+
+        with self._tracer.span('matroska extract', file=file_path, tracks=len(track_output_paths)) as span:
+            try:
+                with self._file_system.map_file(file_path) as file:
+                    contents = extract_text_tracks(file, list(track_output_paths))
+            except UnsupportedMatroskaException as exception:
+                span.set('fallback', str(exception))
+                return False
+            for track_id, output_path in track_output_paths.items():
+                self._file_system.write(output_path, contents[track_id])
+            return True
+
+    def read_stream(self, file_path: str, track_id: int) -> list[str] | None:
+        '''
+        The lines of the track, in start time order. None when the track has to be streamed by mkvextract.
+        The whole track is read before returning, since some blocks can only be checked when
+        they are decoded, and mkvextract cannot take over once lines have been produced.
+        Reading it from the memory mapped file is fast, it is only a few hundred KB.
+        '''
+        if not file_path.lower().endswith(MATROSKA_EXTENSIONS):
+            return None
+
+        with self._tracer.span('matroska extract', file=file_path, tracks=1) as span:
+            try:
+                with self._file_system.map_file(file_path) as file:
+                    return list(open_text_track(file, track_id))
+            except UnsupportedMatroskaException as exception:
+                span.set('fallback', str(exception))
+                return None
+
+
+def _to_file_info(file_path: str, tracks: list[MatroskaTrack]) -> FileInfoDto:
+    return FileInfoDto(file_name=file_path, tracks=[TrackInfo(
+        codec=_get_codec_name(track.codec_id),
+        type=_TRACK_TYPES[track.type],
+        id=track.id,
+        properties=TrackInfoProperties(language=track.language),
+    ) for track in tracks])
+
+
+def _to_subtitle_tracks(tracks: list[MatroskaTrack]) -> list[SubtitleTrack]:
+    subtitle_tracks: list[SubtitleTrack] = []
+    for track in tracks:
+        if _TRACK_TYPES[track.type] != TrackType.SUBTITLE:
+            continue
+        codec = _get_codec_name(track.codec_id)
+        subtitle_tracks.append(SubtitleTrack(
+            id=track.id,
+            codec=_SUBTITLE_CODECS.get(codec, codec),
+            language=_LANGUAGES.get(track.language, track.language)))
+    return subtitle_tracks
+
+
+class FileInfoReaderMatroska(IFileInfoReader):
+    '''
+    Decorates a file info reader, reading Matroska files without running a process for
+    each file. The tracks are read from the header of the file, and the SRT and ASS tracks
+    are extracted from the memory mapped file, skipping the video and audio frames.
+    The other files, and the Matroska files that cannot be read, are probed and extracted
+    by the decorated reader.
+    '''
+
+    def __init__(self, file_info_reader: IFileInfoReader, file_system: IFileSystem, tracer: ITracer | None = None):
+        self._file_info_reader = file_info_reader
+        self._matroska_reader = _MatroskaReader(file_system, tracer)
+
+    def get_file_info(self, file_path: str) -> FileInfoDto:
+        tracks = self._matroska_reader.probe(file_path)
+        if tracks is None:
+            return self._file_info_reader.get_file_info(file_path)
+        return _to_file_info(file_path, tracks)
+
+    def get_subtitle_tracks(self, file_path: str) -> list[SubtitleTrack]:
+        tracks = self._matroska_reader.probe(file_path)
+        if tracks is None:
+            return self._file_info_reader.get_subtitle_tracks(file_path)
+        return _to_subtitle_tracks(tracks)
+
+    def extract_subtitle(self, file_path: str, track_id: int, output_path: str) -> None:
+        self.extract_subtitles(file_path, {track_id: output_path})
+
+    def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        if not self._matroska_reader.extract(file_path, track_output_paths):
+            self._file_info_reader.extract_subtitles(file_path, track_output_paths)
+
+    @contextmanager
+    def stream_subtitle(self, file_path: str, track_id: int) -> Iterator[Iterable[str]]:
+        lines = self._matroska_reader.read_stream(file_path, track_id)
+        if lines is not None:
+            yield lines
+            return
+        with self._file_info_reader.stream_subtitle(file_path, track_id) as streamed_lines:
+            yield streamed_lines
+
+
+class FileInfoReaderMatroskaAsync(IFileInfoReaderAsync):
+    '''Like `FileInfoReaderMatroska`, reading the Matroska files in a thread'''
+
+    def __init__(
+            self,
+            file_info_reader_async: IFileInfoReaderAsync,
+            file_system: IFileSystem,
+            tracer: ITracer | None = None):
+        self._file_info_reader_async = file_info_reader_async
+        self._matroska_reader = _MatroskaReader(file_system, tracer)
+
+    async def get_file_info(self, file_path: str) -> FileInfoDto:
+        # Imported when needed, since asyncio slows down the start of the tool
+        import asyncio
+        tracks = await asyncio.to_thread(self._matroska_reader.probe, file_path)
+        if tracks is None:
+            return await self._file_info_reader_async.get_file_info(file_path)
+        return _to_file_info(file_path, tracks)
+
+    async def get_subtitle_tracks(self, file_path: str) -> list[SubtitleTrack]:
+        import asyncio
+        tracks = await asyncio.to_thread(self._matroska_reader.probe, file_path)
+        if tracks is None:
+            return await self._file_info_reader_async.get_subtitle_tracks(file_path)
+        return _to_subtitle_tracks(tracks)
+
+    async def extract_subtitles(self, file_path: str, track_output_paths: dict[int, str]) -> None:
+        import asyncio
+        if not await asyncio.to_thread(self._matroska_reader.extract, file_path, track_output_paths):
+            await self._file_info_reader_async.extract_subtitles(file_path, track_output_paths)
@@ -1,6 +1,12 @@
-from infra.file_system_interface import IFileSystem
+from infra.file_system_interface import FileStat, IFileSystem
 from io import TextIOWrapper
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterable, Iterator
+import io
+import mmap
 import os
+import shutil
+import tempfile
 
 
 class FileSystem(IFileSystem):
@@ -13,6 +19,20 @@ class FileSystem(IFileSystem):
     def open(self, file: str, encoding='utf-8') -> TextIOWrapper:
         return open(file=file, encoding=encoding)
 
+    def open_binary(self, file: str) -> BinaryIO:
+        return open(file, 'rb')
+
+    @contextmanager
+    def map_file(self, file: str) -> Iterator[BinaryIO]:
+        with open(file, 'rb') as opened_file:
+            if os.fstat(opened_file.fileno()).st_size == 0:
+                # Empty files cannot be mapped
+                yield io.BytesIO()
+                return
+            with mmap.mmap(opened_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                # The map has the read, seek and tell methods of a binary file
+                yield mapped_file  # type: ignore[misc]
+
     def read(self, path: str) -> str:
         return self.open(path).read()
 
@@ -20,14 +40,70 @@ class FileSystem(IFileSystem):
         with open(path, 'w') as f:
             f.write(content)
 
+    def write_atomic(self, path: str, content: str) -> None:
+        self._replace_with(path, lambda partial_path: self.write(partial_path, content))
+
+    def write_chunks(self, path: str, chunks: Iterable[str]) -> None:
+        with open(path, 'w') as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+    def read_bytes(self, path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def write_bytes(self, path: str, content: bytes) -> None:
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def write_bytes_atomic(self, path: str, content: bytes) -> None:
+        self._replace_with(path, lambda partial_path: self.write_bytes(partial_path, content))
+
+    def _replace_with(self, path: str, write: Callable[[str], None]) -> None:
+        '''Writes a partial file next to the path, then replaces the path with it'''
+        partial_path = f'{path}.{os.getpid()}.partial'
+        try:
+            write(partial_path)
+            os.replace(partial_path, path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
     def remove(self, path: str) -> None:
         os.remove(path)
 
+    def copy_file(self, source_path: str, destination_path: str) -> None:
+        partial_path = f'{destination_path}.{os.getpid()}.partial'
+        shutil.copyfile(source_path, partial_path)
+        os.replace(partial_path, destination_path)
+
+    def touch(self, path: str) -> None:
+        os.utime(path)
+
     def list_dir(self, path: str) -> list[str]:
         return os.listdir(path)
 
+    def list_files(self, path: str) -> list[str]:
+        # scandir knows the type of each entry without a stat call per file
+        with os.scandir(path) as entries:
+            return [entry.name for entry in entries if entry.is_file()]
+
     def get_dir_path(self, file_path: str) -> str:
         return os.path.dirname(file_path)
 
     def join_path(self, parent_dir: str, file_name: str) -> str:
         return os.path.join(parent_dir, file_name)
+
+    def get_file_stat(self, path: str) -> FileStat:
+        stat = os.stat(path)
+        return FileStat(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+    def create_dir(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+
+    def create_temp_dir(self) -> str:
+        return tempfile.mkdtemp(prefix='chinese-subs-')
+
+    def remove_dir(self, path: str) -> None:
+        shutil.rmtree(path)
@@ -1,6 +1,8 @@
+import itertools
 import os
-from infra.file_system_interface import IFileSystem
+from infra.file_system_interface import FileStat, IFileSystem
 from io import BytesIO, TextIOWrapper
+from typing import BinaryIO, ContextManager, Iterable
 
 
 class FileSystemFake(IFileSystem):
@@ -13,6 +15,9 @@ class FileSystemFake(IFileSystem):
         '''
         self._files = initial_files.copy()
         self._directory_path = directory_path
+        self._temp_dir_ids = itertools.count()
+        self._write_counter = itertools.count(1)
+        self._mtimes: dict[str, int] = {}
 
     def get_file_paths(self) -> list[str]:
         return list(self._files.keys())
@@ -32,14 +37,52 @@ class FileSystemFake(IFileSystem):
         buffer = BytesIO(bytes_data)
         return TextIOWrapper(buffer=buffer)
 
+    def open_binary(self, file: str) -> BinaryIO:
+        '''Binary files are kept as latin-1 text, like `read_bytes`'''
+        if file not in self._files:
+            raise FileNotFoundError(file)
+        return BytesIO(self._files[file].encode('latin-1'))
+
+    def map_file(self, file: str) -> ContextManager[BinaryIO]:
+        return self.open_binary(file)
+
     def read(self, path: str) -> str:
         return self._files.get(path, '')
 
     def write(self, path: str, content: str) -> None:
         self._files[path] = content
+        self._mtimes[path] = next(self._write_counter)
+
+    def write_atomic(self, path: str, content: str) -> None:
+        self.write(path, content)
+
+    def write_chunks(self, path: str, chunks: Iterable[str]) -> None:
+        self.write(path, ''.join(chunks))
+
+    def read_bytes(self, path: str) -> bytes:
+        '''Binary files are kept as latin-1 text, which maps every byte to a character'''
+        return self._files.get(path, '').encode('latin-1')
+
+    def write_bytes(self, path: str, content: bytes) -> None:
+        self.write(path, content.decode('latin-1'))
+
+    def write_bytes_atomic(self, path: str, content: bytes) -> None:
+        self.write_bytes(path, content)
 
     def remove(self, path: str) -> None:
         self._files.pop(path)
+        self._mtimes.pop(path, None)
+
+    def copy_file(self, source_path: str, destination_path: str) -> None:
+        if source_path not in self._files:
+            raise FileNotFoundError(source_path)
+        self.write(destination_path, self._files[source_path])
+
+    def touch(self, path: str) -> None:
+        '''Counts as a write for the modification time'''
+        if path not in self._files:
+            raise FileNotFoundError(path)
+        self._mtimes[path] = next(self._write_counter)
 
     def list_dir(self, path: str) -> list[str]:
         file_list = [os.path.basename(f) for f in self._files.keys()
@@ -47,8 +90,32 @@ class FileSystemFake(IFileSystem):
 
         return file_list
 
+    def list_files(self, path: str) -> list[str]:
+        return self.list_dir(path)
+
     def get_dir_path(self, file_path: str) -> str:
         return os.path.dirname(file_path)
 
     def join_path(self, parent_dir: str, file_name: str) -> str:
         return os.path.join(parent_dir, file_name)
+
+    def get_file_stat(self, path: str) -> FileStat:
+        '''
+        The modification time is the number of the last write to the file,
+        or 0 for the initial files.
+        '''
+        if path not in self._files:
+            raise FileNotFoundError(path)
+        return FileStat(size=len(self._files[path].encode('utf-8')),
+                        mtime_ns=self._mtimes.get(path, 0))
+
+    def create_dir(self, path: str) -> None:
+        pass
+
+    def create_temp_dir(self) -> str:
+        return f'tmp/chinese-subs-{next(self._temp_dir_ids)}'
+
+    def remove_dir(self, path: str) -> None:
+        for file_path in [f for f in self._files.keys()
+                          if f.startswith(path + os.sep)]:
+            self._files.pop(file_path)
@@ -1,5 +1,11 @@
 from abc import ABC, abstractmethod
 from io import TextIOWrapper
+from typing import BinaryIO, ContextManager, Iterable, NamedTuple
+
+
+class FileStat(NamedTuple):
+    size: int
+    mtime_ns: int
 
 
 class IFileSystem(ABC):
@@ -15,6 +21,19 @@ class IFileSystem(ABC):
     def open(self, file: str, encoding='utf-8') -> TextIOWrapper:
         pass
 
+    @abstractmethod
+    def open_binary(self, file: str) -> BinaryIO:
+        '''To read only some parts of a large file, seeking to them'''
+        pass
+
+    @abstractmethod
+    def map_file(self, file: str) -> ContextManager[BinaryIO]:
+        '''
+        Like `open_binary`, but the file is memory mapped, so only the pages of the parts
+        read are loaded, and skipping a part with `seek` does not read it.
+        '''
+        pass
+
     @abstractmethod
     def read(self, path: str) -> str:
         pass
@@ -23,10 +42,43 @@ class IFileSystem(ABC):
     def write(self, path: str, content: str) -> None:
         pass
 
+    @abstractmethod
+    def write_atomic(self, path: str, content: str) -> None:
+        '''Like `write`, but the file is replaced at once, so it is never seen half written'''
+        pass
+
+    @abstractmethod
+    def write_chunks(self, path: str, chunks: Iterable[str]) -> None:
+        '''Writes each chunk as soon as it is produced, without joining them in memory'''
+        pass
+
+    @abstractmethod
+    def read_bytes(self, path: str) -> bytes:
+        pass
+
+    @abstractmethod
+    def write_bytes(self, path: str, content: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def write_bytes_atomic(self, path: str, content: bytes) -> None:
+        '''Like `write_bytes`, but the file is replaced at once, so it is never seen half written'''
+        pass
+
     @abstractmethod
     def remove(self, path: str) -> None:
         pass
 
+    @abstractmethod
+    def copy_file(self, source_path: str, destination_path: str) -> None:
+        '''The destination is replaced at once, so it is never seen half written'''
+        pass
+
+    @abstractmethod
+    def touch(self, path: str) -> None:
+        '''Sets the modification time of an existing file to now'''
+        pass
+
     @abstractmethod
     def get_dir_path(self, file_path: str) -> str:
         pass
@@ -35,6 +87,30 @@ class IFileSystem(ABC):
     def list_dir(self, path: str) -> list[str]:
         pass
 
+    @abstractmethod
+    def list_files(self, path: str) -> list[str]:
+        '''Like `list_dir`, without the subdirectories'''
+        pass
+
     @abstractmethod
     def join_path(self, parent_dir: str, file_name: str) -> str:
         pass
+
+    @abstractmethod
+    def get_file_stat(self, path: str) -> FileStat:
+        pass
+
+    @abstractmethod
+    def create_dir(self, path: str) -> None:
+        '''Creates a directory and its parents, if they do not exist yet'''
+        pass
+
+    @abstractmethod
+    def create_temp_dir(self) -> str:
+        '''Creates a new, unique directory for the intermediate files of a job'''
+        pass
+
+    @abstractmethod
+    def remove_dir(self, path: str) -> None:
+        '''Removes a directory and all of its content'''
+        pass
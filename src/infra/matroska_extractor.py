@@ -0,0 +1,243 @@
+from typing import BinaryIO, Iterator, NamedTuple
+import zlib
+from infra.ebml import ElementHeader, iter_children, read_uint, read_vint
+from infra.exceptions.unsupported_matroska_exception import UnsupportedMatroskaException
+from infra.matroska_probe import CLUSTER_ID, ContentEncoding, MatroskaSegment, MatroskaTrack, probe_segment
+
+CLUSTER_TIMESTAMP_ID = 0xE7
+SIMPLE_BLOCK_ID = 0xA3
+BLOCK_GROUP_ID = 0xA0
+BLOCK_ID = 0xA1
+BLOCK_DURATION_ID = 0x9B
+
+SRT_CODEC_ID = 'S_TEXT/UTF8'
+ASS_CODEC_IDS = ('S_TEXT/ASS', 'S_TEXT/SSA')
+_FRAMES_SCOPE = 1
+_CODEC_PRIVATE_SCOPE = 2
+_ZLIB_ALGORITHM = 0
+_HEADER_STRIPPING_ALGORITHM = 3
+_SUPPORTED_ALGORITHMS = (_ZLIB_ALGORITHM, _HEADER_STRIPPING_ALGORITHM)
+_LACING_FLAGS = 0x06
+
+
+class SubtitleBlock(NamedTuple):
+    '''Times in nanoseconds, the duration is 0 when neither the block nor its track has one'''
+    start: int
+    duration: int
+    data: bytes
+
+
+def _decode(data: bytes, content_encodings: list[ContentEncoding], scope: int) -> bytes:
+    for content_encoding in sorted(content_encodings, key=lambda encoding: encoding.order, reverse=True):
+        if content_encoding.scope & scope == 0:
+            continue
+        if content_encoding.type != 0:
+            raise UnsupportedMatroskaException('Encrypted track')
+        if content_encoding.algorithm == _ZLIB_ALGORITHM:
+            try:
+                data = zlib.decompress(data)
+            except zlib.error as error:
+                raise UnsupportedMatroskaException(f'Invalid zlib data: {error}')
+        elif content_encoding.algorithm == _HEADER_STRIPPING_ALGORITHM:
+            data = content_encoding.settings + data
+        else:
+            raise UnsupportedMatroskaException(f'Unsupported compression {content_encoding.algorithm}')
+    return data
+
+
+def _read_block(
+        file: BinaryIO,
+        block: ElementHeader,
+        tracks: dict[int, MatroskaTrack],
+        cluster_timestamp: int) -> tuple[MatroskaTrack, int, bytes] | None:
+    '''
+    The track, timestamp and frame of a block, None when it is not of one of the tracks.
+    Only the track number is read from the other blocks, the rest of their data is skipped.
+    '''
+    track_number = read_vint(file)
+    if track_number is None or track_number[0] not in tracks:
+        return None
+    header = file.read(3)
+    if len(header) != 3:
+        raise UnsupportedMatroskaException('Truncated block')
+    if header[2] & _LACING_FLAGS != 0:
+        raise UnsupportedMatroskaException('Laced subtitle block')
+
+    frame_size = block.size - track_number[1] - len(header)
+    if frame_size < 0:
+        raise UnsupportedMatroskaException('Truncated block')
+    frame = file.read(frame_size)
+    if len(frame) != frame_size:
+        raise UnsupportedMatroskaException('Truncated block')
+    timestamp = cluster_timestamp + int.from_bytes(header[:2], 'big', signed=True)
+    return (tracks[track_number[0]], timestamp, frame)
+
+
+def iter_subtitle_blocks(
+        file: BinaryIO,
+        segment: MatroskaSegment,
+        tracks: list[MatroskaTrack]) -> Iterator[tuple[int, SubtitleBlock]]:
+    '''
+    The track ID and decoded block of the blocks of the tracks, in file order. Every cluster
+    is visited, but only the headers of its elements are read, so the video and audio frames
+    are skipped using their size instead of being read. When the file is memory mapped, their
+    pages are never loaded.
+    The blocks without a duration of their own last the default duration of their track.
+    A simple block, which never has one, of a track without default duration raises an
+    unsupported Matroska exception, as its end is only known by mkvextract.
+    '''
+    tracks_by_number = {track.number: track for track in tracks}
+    scale = segment.timestamp_scale
+
+    def to_subtitle_block(block: tuple[MatroskaTrack, int, bytes], duration: int | None) -> tuple[int, SubtitleBlock]:
+        track, timestamp, frame = block
+        return (track.id, SubtitleBlock(
+            start=timestamp * scale,
+            duration=(track.default_duration or 0) if duration is None else duration * scale,
+            data=_decode(frame, track.content_encodings, _FRAMES_SCOPE)))
+
+    for cluster in iter_children(file, segment.header):
+        if cluster.id != CLUSTER_ID:
+            continue
+        if cluster.get_end_position() is None:
+            raise UnsupportedMatroskaException('Cluster of unknown size')
+
+        cluster_timestamp = 0
+        for child in iter_children(file, cluster):
+            if child.id == CLUSTER_TIMESTAMP_ID:
+                cluster_timestamp = read_uint(file, child)
+            elif child.id == SIMPLE_BLOCK_ID:
+                block = _read_block(file, child, tracks_by_number, cluster_timestamp)
+                if block is not None:
+                    if block[0].default_duration is None:
+                        raise UnsupportedMatroskaException(f'Simple block without duration in track {block[0].id}')
+                    yield to_subtitle_block(block, None)
+            elif child.id == BLOCK_GROUP_ID:
+                block = None
+                duration = None
+                for block_child in iter_children(file, child):
+                    if block_child.id == BLOCK_ID:
+                        block = _read_block(file, block_child, tracks_by_number, cluster_timestamp)
+                        if block is None:
+                            break
+                    elif block_child.id == BLOCK_DURATION_ID:
+                        duration = read_uint(file, block_child)
+                if block is not None:
+                    yield to_subtitle_block(block, duration)
+
+
+def read_subtitle_blocks(
+        file: BinaryIO,
+        segment: MatroskaSegment,
+        tracks: list[MatroskaTrack]) -> dict[int, list[SubtitleBlock]]:
+    '''The decoded blocks of the tracks, by track ID'''
+    blocks: dict[int, list[SubtitleBlock]] = {track.id: [] for track in tracks}
+    for track_id, block in iter_subtitle_blocks(file, segment, tracks):
+        blocks[track_id].append(block)
+    return blocks
+
+
+def _format_srt_time(nanoseconds: int) -> str:
+    milliseconds = round(nanoseconds / 1_000_000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f'{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}'
+
+
+def _format_ass_time(nanoseconds: int) -> str:
+    centiseconds = round(nanoseconds / 10_000_000)
+    hours, centiseconds = divmod(centiseconds, 360_000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    seconds, centiseconds = divmod(centiseconds, 100)
+    return f'{hours}:{minutes:02}:{seconds:02}.{centiseconds:02}'
+
+
+def _decode_text(data: bytes) -> str:
+    return data.decode('utf-8', errors='replace')
+
+
+def _format_srt_cue(index: int, block: SubtitleBlock) -> str:
+    return (f'{index}\n{_format_srt_time(block.start)} --> {_format_srt_time(block.start + block.duration)}\n'
+            f'{_decode_text(block.data).rstrip()}\n\n')
+
+
+def _format_ass_header(codec_private: bytes) -> str:
+    return _decode_text(codec_private).rstrip('\r\n\0') + '\n'
+
+
+def _format_ass_event(block: SubtitleBlock) -> tuple[int, str]:
+    '''
+    The read order and dialogue of a block, which is an event without its times, as
+    `ReadOrder,Layer,Style,Name,MarginL,MarginR,MarginV,Effect,Text`
+    '''
+    fields = _decode_text(block.data).split(',', 8)
+    if len(fields) != 9 or not fields[0].isdigit():
+        raise UnsupportedMatroskaException('Invalid ASS event')
+    return (int(fields[0]), 'Dialogue: ' + ','.join([
+        fields[1], _format_ass_time(block.start), _format_ass_time(block.start + block.duration), *fields[2:]]) + '\n')
+
+
+def to_srt(blocks: list[SubtitleBlock]) -> str:
+    return ''.join(_format_srt_cue(index, block) for index, block in enumerate(blocks, start=1))
+
+
+def to_ass(codec_private: bytes, blocks: list[SubtitleBlock]) -> str:
+    '''
+    The header is the codec private data, the events are written in read order, which is
+    their order in the original file.
+    '''
+    events = sorted((_format_ass_event(block) for block in blocks), key=lambda event: event[0])
+    return _format_ass_header(codec_private) + ''.join(dialogue for _, dialogue in events)
+
+
+def _get_text_tracks(segment: MatroskaSegment, track_ids: list[int]) -> list[MatroskaTrack]:
+    tracks = {track.id: track for track in segment.tracks}
+    for track_id in track_ids:
+        if track_id not in tracks:
+            raise UnsupportedMatroskaException(f'Track {track_id} not found')
+        track = tracks[track_id]
+        if track.codec_id != SRT_CODEC_ID and track.codec_id not in ASS_CODEC_IDS:
+            raise UnsupportedMatroskaException(f'Unsupported codec {track.codec_id}')
+        for content_encoding in track.content_encodings:
+            if content_encoding.type != 0 or content_encoding.algorithm not in _SUPPORTED_ALGORITHMS:
+                raise UnsupportedMatroskaException(f'Unsupported encoding of track {track_id}')
+    return [tracks[track_id] for track_id in track_ids]
+
+
+def _get_codec_private(track: MatroskaTrack) -> bytes:
+    return _decode(track.codec_private or b'', track.content_encodings, _CODEC_PRIVATE_SCOPE)
+
+
+def extract_text_tracks(file: BinaryIO, track_ids: list[int]) -> dict[int, str]:
+    '''
+    The content of the SRT and ASS tracks of a Matroska file, like the files written by mkvextract.
+    Raises `UnsupportedMatroskaException` when a track is of another codec, or cannot be decoded.
+    '''
+    segment = probe_segment(file)
+    tracks = _get_text_tracks(segment, track_ids)
+    blocks = read_subtitle_blocks(file, segment, tracks)
+    return {track.id: to_srt(blocks[track.id]) if track.codec_id == SRT_CODEC_ID
+            else to_ass(_get_codec_private(track), blocks[track.id])
+            for track in tracks}
+
+
+def _iter_text_track_lines(file: BinaryIO, segment: MatroskaSegment, track: MatroskaTrack) -> Iterator[str]:
+    if track.codec_id != SRT_CODEC_ID:
+        yield from _format_ass_header(_get_codec_private(track)).splitlines(keepends=True)
+    for index, (_, block) in enumerate(iter_subtitle_blocks(file, segment, [track]), start=1):
+        text = _format_srt_cue(index, block) if track.codec_id == SRT_CODEC_ID else _format_ass_event(block)[1]
+        yield from text.splitlines(keepends=True)
+
+
+def open_text_track(file: BinaryIO, track_id: int) -> Iterator[str]:
+    '''
+    The lines of an SRT or ASS track, produced while its blocks are read. Unlike `extract_text_tracks`,
+    the ASS events are in file order, which is their start time order, instead of read order.
+    The codec and encodings of the track are checked before returning, but the blocks only
+    while they are read, so `UnsupportedMatroskaException` can also be raised after some lines
+    were produced, like for a simple block without duration or invalid compressed data.
+    '''
+    segment = probe_segment(file)
+    track, = _get_text_tracks(segment, [track_id])
+    return _iter_text_track_lines(file, segment, track)
@@ -0,0 +1,247 @@
+from typing import BinaryIO, NamedTuple
+from infra.ebml import ElementHeader, iter_children, read_data, read_element_header, read_string, read_uint
+from infra.exceptions.unsupported_matroska_exception import UnsupportedMatroskaException
+
+EBML_ID = 0x1A45DFA3
+DOC_TYPE_ID = 0x4282
+SEGMENT_ID = 0x18538067
+SEEK_HEAD_ID = 0x114D9B74
+SEEK_ID = 0x4DBB
+SEEK_ID_ID = 0x53AB
+SEEK_POSITION_ID = 0x53AC
+TRACKS_ID = 0x1654AE6B
+TRACK_ENTRY_ID = 0xAE
+TRACK_NUMBER_ID = 0xD7
+TRACK_TYPE_ID = 0x83
+CODEC_ID_ID = 0x86
+CODEC_PRIVATE_ID = 0x63A2
+DEFAULT_DURATION_ID = 0x23E383
+LANGUAGE_ID = 0x22B59C
+LANGUAGE_BCP47_ID = 0x22B59D
+CONTENT_ENCODINGS_ID = 0x6D80
+CONTENT_ENCODING_ID = 0x6240
+CONTENT_ENCODING_ORDER_ID = 0x5031
+CONTENT_ENCODING_SCOPE_ID = 0x5032
+CONTENT_ENCODING_TYPE_ID = 0x5033
+CONTENT_COMPRESSION_ID = 0x5034
+CONTENT_COMP_ALGO_ID = 0x4254
+CONTENT_COMP_SETTINGS_ID = 0x4255
+INFO_ID = 0x1549A966
+TIMESTAMP_SCALE_ID = 0x2AD7B1
+CLUSTER_ID = 0x1F43B675
+
+DOC_TYPES = ('matroska', 'webm')
+# Default of the Language element in the specification
+DEFAULT_LANGUAGE = 'eng'
+# Nanoseconds of a timestamp unit, so timestamps are in milliseconds by default
+DEFAULT_TIMESTAMP_SCALE = 1_000_000
+# ISO 639-2 codes reported by mkvmerge for the BCP 47 languages of newer files
+_BCP47_LANGUAGES = {
+    'zh': 'chi', 'en': 'eng', 'ja': 'jpn', 'ko': 'kor', 'fr': 'fre', 'de': 'ger', 'es': 'spa',
+    'it': 'ita', 'pt': 'por', 'ru': 'rus', 'ar': 'ara', 'th': 'tha', 'vi': 'vie', 'und': 'und',
+}
+
+
+class ContentEncoding(NamedTuple):
+    '''
+    How the frames or codec private data of a track were encoded when muxed.
+    order: Encodings with a higher order are decoded first.
+    scope: 1 for the frames, 2 for the codec private data, 3 for both.
+    type: 0 for compression, 1 for encryption.
+    algorithm: 0 for zlib, 3 for header stripping, which removes the `settings` bytes from the start of each frame.
+    '''
+    order: int
+    scope: int
+    type: int
+    algorithm: int
+    settings: bytes
+
+
+class MatroskaTrack(NamedTuple):
+    '''
+    id: The ID given by mkvmerge and mkvextract, the position of the track in the file.
+    number: The number of the track in the blocks of the file.
+    type: 1 for video, 2 for audio, 17 for subtitles.
+    language: ISO 639-2 code, like mkvmerge.
+    default_duration: Nanoseconds of each frame without a duration of its own, None when not given.
+    '''
+    id: int
+    number: int
+    type: int
+    codec_id: str
+    language: str
+    codec_private: bytes | None
+    content_encodings: list[ContentEncoding]
+    default_duration: int | None = None
+
+
+class MatroskaSegment(NamedTuple):
+    '''
+    header: To find the positions relative to the segment data, like the ones of the seek head.
+    timestamp_scale: Nanoseconds of a timestamp unit.
+    '''
+    header: ElementHeader
+    timestamp_scale: int
+    tracks: list[MatroskaTrack]
+
+
+def _get_language(language: str | None, language_bcp47: str | None) -> str:
+    if language_bcp47 is None:
+        return language or DEFAULT_LANGUAGE
+    primary_language = language_bcp47.split('-')[0].lower()
+    if primary_language in _BCP47_LANGUAGES:
+        return _BCP47_LANGUAGES[primary_language]
+    if len(primary_language) == 3:
+        return primary_language
+    raise UnsupportedMatroskaException(f'Unknown language {language_bcp47}')
+
+
+def _read_content_encoding(file: BinaryIO, content_encoding: ElementHeader) -> ContentEncoding:
+    order = scope = encoding_type = algorithm = None
+    settings = b''
+    for child in iter_children(file, content_encoding):
+        if child.id == CONTENT_ENCODING_ORDER_ID:
+            order = read_uint(file, child)
+        elif child.id == CONTENT_ENCODING_SCOPE_ID:
+            scope = read_uint(file, child)
+        elif child.id == CONTENT_ENCODING_TYPE_ID:
+            encoding_type = read_uint(file, child)
+        elif child.id == CONTENT_COMPRESSION_ID:
+            for compression_child in iter_children(file, child):
+                if compression_child.id == CONTENT_COMP_ALGO_ID:
+                    algorithm = read_uint(file, compression_child)
+                elif compression_child.id == CONTENT_COMP_SETTINGS_ID:
+                    settings = read_data(file, compression_child)
+    # Defaults of the specification
+    return ContentEncoding(
+        order=order or 0,
+        scope=1 if scope is None else scope,
+        type=encoding_type or 0,
+        algorithm=algorithm or 0,
+        settings=settings)
+
+
+def _read_track_entry(file: BinaryIO, track_entry: ElementHeader, track_id: int) -> MatroskaTrack:
+    number = track_type = codec_id = language = language_bcp47 = codec_private = default_duration = None
+    content_encodings: list[ContentEncoding] = []
+    for child in iter_children(file, track_entry):
+        if child.id == TRACK_NUMBER_ID:
+            number = read_uint(file, child)
+        elif child.id == TRACK_TYPE_ID:
+            track_type = read_uint(file, child)
+        elif child.id == CODEC_ID_ID:
+            codec_id = read_string(file, child)
+        elif child.id == LANGUAGE_ID:
+            language = read_string(file, child)
+        elif child.id == LANGUAGE_BCP47_ID:
+            language_bcp47 = read_string(file, child)
+        elif child.id == CODEC_PRIVATE_ID:
+            codec_private = read_data(file, child)
+        elif child.id == DEFAULT_DURATION_ID:
+            default_duration = read_uint(file, child)
+        elif child.id == CONTENT_ENCODINGS_ID:
+            content_encodings = [_read_content_encoding(file, content_encoding)
+                                 for content_encoding in iter_children(file, child)
+                                 if content_encoding.id == CONTENT_ENCODING_ID]
+
+    if number is None or track_type is None or codec_id is None:
+        raise UnsupportedMatroskaException(f'Incomplete track entry {track_id}')
+    return MatroskaTrack(
+        id=track_id,
+        number=number,
+        type=track_type,
+        codec_id=codec_id,
+        language=_get_language(language, language_bcp47),
+        codec_private=codec_private,
+        content_encodings=content_encodings,
+        default_duration=default_duration)
+
+
+def _read_tracks(file: BinaryIO, tracks: ElementHeader) -> list[MatroskaTrack]:
+    if tracks.size < 0:
+        raise UnsupportedMatroskaException('Unknown size of the tracks')
+    track_entries = [child for child in iter_children(file, tracks)
+                     if child.id == TRACK_ENTRY_ID]
+    return [_read_track_entry(file, track_entry, track_id)
+            for track_id, track_entry in enumerate(track_entries)]
+
+
+def _find_seek_position(file: BinaryIO, seek_head: ElementHeader, element_id: int) -> int | None:
+    '''The position of the element relative to the segment data, according to the seek head'''
+    for seek in iter_children(file, seek_head):
+        if seek.id != SEEK_ID:
+            continue
+        seek_id = seek_position = None
+        for child in iter_children(file, seek):
+            if child.id == SEEK_ID_ID:
+                seek_id = int.from_bytes(read_data(file, child), 'big')
+            elif child.id == SEEK_POSITION_ID:
+                seek_position = read_uint(file, child)
+        if seek_id == element_id and seek_position is not None:
+            return seek_position
+    return None
+
+
+def read_segment_header(file: BinaryIO) -> ElementHeader:
+    '''Checks the EBML header of the file is Matroska and returns the header of its segment'''
+    file.seek(0)
+    ebml = read_element_header(file)
+    if ebml is None or ebml.id != EBML_ID:
+        raise UnsupportedMatroskaException('Not an EBML file')
+    doc_type = DOC_TYPES[0]
+    for child in iter_children(file, ebml):
+        if child.id == DOC_TYPE_ID:
+            doc_type = read_string(file, child)
+    if doc_type not in DOC_TYPES:
+        raise UnsupportedMatroskaException(f'Unsupported document type {doc_type}')
+
+    end_position = ebml.get_end_position()
+    if end_position is None:
+        raise UnsupportedMatroskaException('Unknown size of the EBML header')
+    file.seek(end_position)
+    segment = read_element_header(file)
+    if segment is None or segment.id != SEGMENT_ID:
+        raise UnsupportedMatroskaException('Segment not found')
+    return segment
+
+
+def _read_timestamp_scale(file: BinaryIO, info: ElementHeader) -> int:
+    for child in iter_children(file, info):
+        if child.id == TIMESTAMP_SCALE_ID:
+            return read_uint(file, child)
+    return DEFAULT_TIMESTAMP_SCALE
+
+
+def probe_segment(file: BinaryIO) -> MatroskaSegment:
+    '''
+    Reads the tracks of a Matroska file. The elements before the clusters are skipped using
+    their size, so usually only the first kilobytes of the file are read. When the tracks
+    are after the clusters, they are found with the seek head.
+    '''
+    segment = read_segment_header(file)
+    timestamp_scale = DEFAULT_TIMESTAMP_SCALE
+    tracks: list[MatroskaTrack] | None = None
+    tracks_position: int | None = None
+    for child in iter_children(file, segment):
+        if child.id == INFO_ID:
+            timestamp_scale = _read_timestamp_scale(file, child)
+        elif child.id == TRACKS_ID:
+            tracks = _read_tracks(file, child)
+        elif child.id == SEEK_HEAD_ID and tracks_position is None:
+            tracks_position = _find_seek_position(file, child, TRACKS_ID)
+        elif child.id == CLUSTER_ID:
+            break
+
+    if tracks is None:
+        if tracks_position is None:
+            raise UnsupportedMatroskaException('Tracks not found')
+        file.seek(segment.data_position + tracks_position)
+        tracks_header = read_element_header(file)
+        if tracks_header is None or tracks_header.id != TRACKS_ID:
+            raise UnsupportedMatroskaException('Invalid seek head position of the tracks')
+        tracks = _read_tracks(file, tracks_header)
+    return MatroskaSegment(header=segment, timestamp_scale=timestamp_scale, tracks=tracks)
+
+
+def probe_tracks(file: BinaryIO) -> list[MatroskaTrack]:
+    return probe_segment(file).tracks
@@ -0,0 +1,43 @@
+import json
+from infra.file_info_reader_interface import Language, SubtitleTrack, TrackSubCodec, TrackType
+
+_CODECS: dict[str, TrackSubCodec | str] = {codec.value: codec for codec in TrackSubCodec}
+_LANGUAGES: dict[str, Language | str] = {language.value: language for language in Language}
+# mkvmerge writes `und` when a track has no language
+_UNDETERMINED_LANGUAGE = 'und'
+
+
+def get_subtitle_tracks_from_dict(file_info: dict) -> list[SubtitleTrack]:
+    '''
+    The subtitle tracks of the decoded `mkvmerge -J` output, or of a dumped `FileInfoDto`.
+    Codecs and languages are converted to their enums like `TrackInfo`, the other
+    tracks, attachments, chapters and container properties are ignored.
+    '''
+    subtitle_tracks: list[SubtitleTrack] = []
+    for track in file_info.get('tracks', ()):
+        if track.get('type') != TrackType.SUBTITLE.value:
+            continue
+        codec = track['codec']
+        language = track.get('properties', {}).get('language', _UNDETERMINED_LANGUAGE)
+        subtitle_tracks.append(SubtitleTrack(
+            id=int(track['id']),
+            codec=_CODECS.get(codec, codec),
+            language=_LANGUAGES.get(language, language)))
+    return subtitle_tracks
+
+
+def decode_subtitle_tracks(raw_json: str | bytes) -> list[SubtitleTrack]:
+    '''Decodes the subtitle tracks of the `mkvmerge -J` output, without validating it with pydantic'''
+    return get_subtitle_tracks_from_dict(json.loads(raw_json))
+
+
+def subtitle_tracks_to_dict(subtitle_tracks: list[SubtitleTrack]) -> dict:
+    '''The subtitle tracks in the format of `mkvmerge -J`, to be decoded by `get_subtitle_tracks_from_dict`'''
+    return {'tracks': [{
+        'id': track.id,
+        'type': TrackType.SUBTITLE.value,
+        'codec': track.codec.value if isinstance(track.codec, TrackSubCodec) else track.codec,
+        'properties': {
+            'language': track.language.value if isinstance(track.language, Language) else track.language,
+        },
+    } for track in subtitle_tracks]}
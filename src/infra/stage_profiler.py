@@ -0,0 +1,209 @@
+from contextlib import contextmanager
+from typing import Iterable, Iterator, NamedTuple
+import cProfile
+import io
+import marshal
+import pstats
+import tracemalloc
+from infra.file_system_interface import IFileSystem
+from infra.tracer import NullTracer
+from infra.tracer_interface import ITracer, Span, SpanRecord
+
+# The probe, extraction, subtitle core and write stages, but not the spans wrapping them
+DEFAULT_PROFILED_STAGES = ('prepare', 'extract', 'parse srt', 'parse ass',
+                           'pinyin', 'merge', 'write', 'write stream')
+DEFAULT_TOP_FUNCTIONS = 25
+DEFAULT_TOP_ALLOCATIONS = 15
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+class Allocation(NamedTuple):
+    '''Memory allocated by a line during a stage and still alive when the stage finished'''
+    location: str
+    size_bytes: int
+    count: int
+
+
+class StageProfile(NamedTuple):
+    '''
+    profile: The functions called by the stage, without the stages nested in it.
+    peak_bytes: Largest growth of the traced memory since the start of a call, including nested stages.
+    allocations: The largest allocations of every call, including nested stages.
+    '''
+    name: str
+    calls: int
+    profile: cProfile.Profile
+    peak_bytes: int
+    allocations: list[Allocation]
+
+
+class _Stage:
+    __slots__ = ('calls', 'profile', 'peak_bytes', 'allocations')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.profile = cProfile.Profile()
+        self.peak_bytes = 0
+        self.allocations: dict[str, list[int]] = {}
+
+
+class _RunningStage(NamedTuple):
+    stage: _Stage
+    start_bytes: int
+    # Peak of the nested stages, since measuring them resets the peak
+    peak_bytes: list[int]
+    snapshot: tracemalloc.Snapshot
+
+
+class StageProfiler(ITracer):
+    '''
+    Profiles the spans of the given stages with cProfile, and measures their memory with
+    tracemalloc, while recording the spans with the given tracer.
+    cProfile only profiles one function at a time, so the profile of a stage is paused
+    while a stage nested in it runs. Only the code run in this process and thread is
+    profiled, so the generations must run sequentially.
+    '''
+
+    def __init__(self, tracer: ITracer | None = None, stages: Iterable[str] = DEFAULT_PROFILED_STAGES) -> None:
+        self._tracer = tracer or NullTracer()
+        self._stage_names = frozenset(stages)
+        self._stages: dict[str, _Stage] = {}
+        self._running: list[_RunningStage] = []
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def span(self, name: str, **attributes: object) -> Iterator[Span]:
+        with self._tracer.span(name, **attributes) as span:
+            if name not in self._stage_names or not tracemalloc.is_tracing():
+                yield span
+                return
+
+            self._enter(self._stages.setdefault(name, _Stage()))
+            try:
+                yield span
+            finally:
+                self._exit()
+
+    def _enter(self, stage: _Stage) -> None:
+        if len(self._running) > 0:
+            parent = self._running[-1]
+            parent.stage.profile.disable()
+            parent.peak_bytes[0] = max(
+                parent.peak_bytes[0], tracemalloc.get_traced_memory()[1])
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        self._running.append(_RunningStage(
+            stage=stage, start_bytes=start_bytes, peak_bytes=[start_bytes], snapshot=snapshot))
+        stage.calls += 1
+        stage.profile.enable()
+
+    def _exit(self) -> None:
+        running = self._running.pop()
+        running.stage.profile.disable()
+
+        peak_bytes = max(running.peak_bytes[0], tracemalloc.get_traced_memory()[1])
+        running.stage.peak_bytes = max(
+            running.stage.peak_bytes, peak_bytes - running.start_bytes)
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        for statistic in snapshot.compare_to(running.snapshot, 'lineno'):
+            if statistic.size_diff <= 0:
+                continue
+            frame = statistic.traceback[0]
+            allocation = running.stage.allocations.setdefault(
+                f'{frame.filename}:{frame.lineno}', [0, 0])
+            allocation[0] += statistic.size_diff
+            allocation[1] += max(statistic.count_diff, 0)
+
+        if len(self._running) > 0:
+            parent = self._running[-1]
+            parent.peak_bytes[0] = max(parent.peak_bytes[0], peak_bytes)
+            parent.stage.profile.enable()
+
+    def take_spans(self) -> list[SpanRecord]:
+        return self._tracer.take_spans()
+
+    def merge_spans(self, spans: list[SpanRecord]) -> None:
+        self._tracer.merge_spans(spans)
+
+    def get_profiles(self, top_allocations: int = DEFAULT_TOP_ALLOCATIONS) -> list[StageProfile]:
+        '''The profiled stages, in the order they were first run'''
+        return [StageProfile(
+            name=name,
+            calls=stage.calls,
+            profile=stage.profile,
+            peak_bytes=stage.peak_bytes,
+            allocations=sorted(
+                (Allocation(location=location, size_bytes=size_bytes, count=count)
+                 for location, (size_bytes, count) in stage.allocations.items()),
+                key=lambda allocation: allocation.size_bytes, reverse=True)[:top_allocations])
+            for name, stage in self._stages.items()]
+
+
+def _get_file_name(stage_name: str) -> str:
+    return stage_name.replace(' ', '_')
+
+
+def format_stage_report(stage_profile: StageProfile, top_functions: int = DEFAULT_TOP_FUNCTIONS) -> str:
+    '''The slowest functions by cumulative time, the peak memory and the largest allocations'''
+    stream = io.StringIO()
+    stats = pstats.Stats(stage_profile.profile, stream=stream)
+    stream.write(f'{stage_profile.name}: {stage_profile.calls} calls, '
+                 f'{stats.total_tt:.3f}s profiled, '
+                 f'peak {stage_profile.peak_bytes / 1_000_000:.2f} MB\n')
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_functions)
+    stream.write('Largest allocations still alive at the end of the stage:\n')
+    for allocation in stage_profile.allocations:
+        stream.write(f'{allocation.size_bytes / 1000:10.1f} kB {allocation.count:8} blocks  '
+                     f'{allocation.location}\n')
+    return stream.getvalue()
+
+
+def format_profile_summary(stage_profiles: list[StageProfile]) -> str:
+    lines = [f'{"stage":<16} {"calls":>6} {"profiled":>9} {"peak MB":>8}']
+    for stage_profile in stage_profiles:
+        stats = pstats.Stats(stage_profile.profile, stream=io.StringIO())
+        lines.append(f'{stage_profile.name:<16} {stage_profile.calls:>6} '
+                     f'{stats.total_tt:>8.3f}s '
+                     f'{stage_profile.peak_bytes / 1_000_000:>8.2f}')
+    return '\n'.join(lines)
+
+
+def write_profile_reports(file_system: IFileSystem, dir_path: str, stage_profiles: list[StageProfile]) -> list[str]:
+    '''
+    Writes a `<stage>.pstats` file per stage, which can be opened with `pstats` or snakeviz,
+    a `<stage>.txt` report and a `summary.txt` of every stage.
+    Returns the paths written.
+    '''
+    file_system.create_dir(dir_path)
+    paths: list[str] = []
+    for stage_profile in stage_profiles:
+        stats_path = file_system.join_path(
+            dir_path, f'{_get_file_name(stage_profile.name)}.pstats')
+        # The format of `pstats.Stats.dump_stats`, written through the file system
+        stage_profile.profile.create_stats()
+        file_system.write_bytes(
+            stats_path, marshal.dumps(stage_profile.profile.stats))
+        report_path = file_system.join_path(
+            dir_path, f'{_get_file_name(stage_profile.name)}.txt')
+        file_system.write(report_path, format_stage_report(stage_profile))
+        paths += [stats_path, report_path]
+
+    summary_path = file_system.join_path(dir_path, 'summary.txt')
+    file_system.write(summary_path, format_profile_summary(stage_profiles) + '\n')
+    return paths + [summary_path]
@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
+import os
+import sys
+import threading
+import time
+import uuid
+from infra.tracer_interface import ITracer, Span, SpanRecord
+
+
+class NullTracer(ITracer):
+    '''Records nothing, the default when tracing is not enabled'''
+    _span = Span({})
+
+    @contextmanager
+    def span(self, name: str, **attributes: object) -> Iterator[Span]:
+        yield self._span
+
+    def take_spans(self) -> list[SpanRecord]:
+        return []
+
+    def merge_spans(self, spans: list[SpanRecord]) -> None:
+        pass
+
+
+# Tracers unpickled in a worker process resolve to a single tracer per process,
+# whose spans are taken after each file and merged into the tracer of the main process.
+_process_tracers: dict[str, 'Tracer'] = {}
+
+
+def _get_process_tracer(token: str) -> 'Tracer':
+    tracer = _process_tracers.get(token)
+    if tracer is None:
+        tracer = Tracer(token=token)
+    return tracer
+
+
+def _get_lane() -> int:
+    '''The asyncio task running the span, or its thread, so concurrent spans are not nested'''
+    # Not imported here, since asyncio slows down the start of the tool and no task runs until it is imported
+    asyncio = sys.modules.get('asyncio')
+    try:
+        task = None if asyncio is None else asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Tracer(ITracer):
+    '''Keeps the spans in memory, to be exported once the work is done'''
+
+    def __init__(self, token: str | None = None) -> None:
+        self._spans: list[SpanRecord] = []
+        self._taken = 0
+        self._token = token or uuid.uuid4().hex
+        _process_tracers[self._token] = self
+
+    def __reduce__(self):
+        return (_get_process_tracer, (self._token,))
+
+    @contextmanager
+    def span(self, name: str, **attributes: object) -> Iterator[Span]:
+        span = Span(attributes)
+        start_us = time.time_ns() // 1000
+        started_at = time.perf_counter_ns()
+        try:
+            yield span
+        finally:
+            self._spans.append(SpanRecord(
+                name=name,
+                start_us=start_us,
+                duration_us=(time.perf_counter_ns() - started_at) // 1000,
+                pid=os.getpid(),
+                tid=_get_lane(),
+                attributes=span.attributes))
+
+    def get_spans(self) -> list[SpanRecord]:
+        return list(self._spans)
+
+    def take_spans(self) -> list[SpanRecord]:
+        spans = self._spans[self._taken:]
+        self._taken = len(self._spans)
+        return spans
+
+    def merge_spans(self, spans: list[SpanRecord]) -> None:
+        self._spans.extend(spans)
+        self._taken = len(self._spans)
+
+
+class StageSummary(NamedTuple):
+    name: str
+    count: int
+    total_seconds: float
+    max_seconds: float
+    cues: int
+    bytes: int
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count
+
+
+def to_chrome_trace(spans: list[SpanRecord]) -> dict:
+    '''
+    The spans as complete events of the Chrome trace event format, which can be opened
+    with chrome://tracing or https://ui.perfetto.dev
+    '''
+    return {
+        'traceEvents': [{
+            'name': span.name,
+            'ph': 'X',
+            'ts': span.start_us,
+            'dur': span.duration_us,
+            'pid': span.pid,
+            'tid': span.tid,
+            'args': {key: value if isinstance(value, (int, float, bool)) else str(value)
+                     for key, value in span.attributes.items()},
+        } for span in spans],
+        'displayTimeUnit': 'ms',
+    }
+
+
+def _get_count(span: SpanRecord, key: str) -> int:
+    value = span.attributes.get(key, 0)
+    return value if isinstance(value, int) else 0
+
+
+def summarize(spans: list[SpanRecord]) -> list[StageSummary]:
+    '''Totals of each kind of span, the longest first'''
+    spans_by_name: dict[str, list[SpanRecord]] = {}
+    for span in spans:
+        spans_by_name.setdefault(span.name, []).append(span)
+
+    summaries = [StageSummary(
+        name=name,
+        count=len(named_spans),
+        total_seconds=sum(span.duration_us for span in named_spans) / 1_000_000,
+        max_seconds=max(span.duration_us for span in named_spans) / 1_000_000,
+        cues=sum(_get_count(span, 'cues') for span in named_spans),
+        bytes=sum(_get_count(span, 'bytes') for span in named_spans))
+        for name, named_spans in spans_by_name.items()]
+    return sorted(summaries, key=lambda summary: summary.total_seconds, reverse=True)
+
+
+def format_summary(summaries: list[StageSummary]) -> str:
+    lines = [f'{"stage":<16} {"count":>6} {"total":>9} {"mean":>9} {"max":>9} {"cues":>9} {"MB":>8}']
+    for summary in summaries:
+        lines.append(
+            f'{summary.name:<16} {summary.count:>6} {summary.total_seconds:>8.3f}s '
+            f'{summary.mean_seconds * 1000:>7.1f}ms {summary.max_seconds * 1000:>7.1f}ms '
+            f'{summary.cues:>9} {summary.bytes / 1_000_000:>8.2f}')
+    return '\n'.join(lines)
@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+from typing import ContextManager, NamedTuple
+
+
+class SpanRecord(NamedTuple):
+    '''
+    start_us: Wall clock time the span started at, in microseconds, so the spans
+    of different processes can be compared.
+    tid: Thread the span ran on, or asyncio task when it ran inside one.
+    attributes: Like the file, number of bytes or cues processed.
+    '''
+    name: str
+    start_us: int
+    duration_us: int
+    pid: int
+    tid: int
+    attributes: dict[str, object]
+
+
+class Span:
+    '''An open span, its attributes can be set until it is closed'''
+    __slots__ = ('attributes',)
+
+    def __init__(self, attributes: dict[str, object]) -> None:
+        self.attributes = attributes
+
+    def set(self, key: str, value: object) -> None:
+        self.attributes[key] = value
+
+
+class ITracer(ABC):
+    @abstractmethod
+    def span(self, name: str, **attributes: object) -> ContextManager[Span]:
+        '''Measures the code run inside the context. Spans opened inside it are nested in it.'''
+        pass
+
+    @abstractmethod
+    def take_spans(self) -> list[SpanRecord]:
+        '''
+        Returns the spans closed since the last call, so the spans of a worker process
+        can be merged into the tracer of the main process.
+        '''
+        pass
+
+    @abstractmethod
+    def merge_spans(self, spans: list[SpanRecord]) -> None:
+        pass
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from typing import NamedTuple
+from infra.file_system_interface import FileStat, IFileSystem
+
+TRACK_CACHE_ENTRY_VERSION = 1
+# About a season of subtitle tracks in every language, which take a few hundred KB each
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_ENTRY_EXTENSION = '.track'
+
+
+class TrackCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+
+
+class TrackCache:
+    '''
+    Stores the extracted subtitle tracks on disk, so generating another mode of the same
+    video does not read the whole container again.
+    Each track has its own file, keyed on the path, size and modification time of the video
+    and the ID of the track, so a changed video is extracted again and several processes can
+    share the cache directory. Each track is stored with `copy_file`, which replaces its entry
+    at once, so another process never reads it half written.
+    When the tracks take more than `max_bytes`, the least recently used ones are removed,
+    each read of a track refreshing its modification time.
+    '''
+
+    def __init__(self, file_system: IFileSystem, cache_dir_path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self._file_system = file_system
+        self._cache_dir_path = cache_dir_path
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._file_system.create_dir(cache_dir_path)
+
+    def _get_entry_path(self, file_path: str, file_stat: FileStat, track_id: int) -> str:
+        identity = json.dumps([TRACK_CACHE_ENTRY_VERSION, file_path, file_stat.size, file_stat.mtime_ns, track_id])
+        key = hashlib.sha1(identity.encode('utf-8')).hexdigest()
+        return self._file_system.join_path(self._cache_dir_path, f'{key}{_ENTRY_EXTENSION}')
+
+    def get_stats(self) -> TrackCacheStats:
+        return TrackCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions)
+
+    def get(self, file_path: str, file_stat: FileStat, track_id: int, output_path: str) -> bool:
+        '''
+        Copies the cached track to `output_path`, instead of reading it from the cache
+        directory, so it can be evicted by another process while it is parsed.
+        Returns False when the track is not cached.
+        '''
+        entry_path = self._get_entry_path(file_path, file_stat, track_id)
+        try:
+            self._file_system.copy_file(entry_path, output_path)
+            self._file_system.touch(entry_path)
+        except FileNotFoundError:
+            self._misses += 1
+            return False
+
+        self._hits += 1
+        return True
+
+    def put(self, file_path: str, file_stat: FileStat, track_id: int, track_path: str) -> None:
+        '''Stores the track extracted to `track_path`, then evicts the least recently used tracks'''
+        entry_path = self._get_entry_path(file_path, file_stat, track_id)
+        self._file_system.copy_file(track_path, entry_path)
+        self._evict(keep_path=entry_path)
+
+    def _evict(self, keep_path: str) -> None:
+        entries: list[tuple[int, str, int]] = []
+        for file_name in self._file_system.list_files(self._cache_dir_path):
+            if not file_name.endswith(_ENTRY_EXTENSION):
+                continue
+            entry_path = self._file_system.join_path(self._cache_dir_path, file_name)
+            try:
+                entry_stat = self._file_system.get_file_stat(entry_path)
+            except FileNotFoundError:
+                # Evicted by another process
+                continue
+            entries.append((entry_stat.mtime_ns, entry_path, entry_stat.size))
+
+        total_size = sum(size for _, _, size in entries)
+        for _, entry_path, size in sorted(entries):
+            if total_size <= self._max_bytes:
+                break
+            # A track larger than the cache is still kept until the next one is stored
+            if entry_path == keep_path:
+                continue
+            try:
+                self._file_system.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            self._evictions += 1
@@ -1,11 +1,23 @@
+from threading import Event
 from typing import Literal
+import argparse
+import json
+import os
+from app.folder_watcher import DEFAULT_POLL_INTERVAL_SECONDS, DEFAULT_SETTLE_SECONDS, FolderWatcher, WatchResult
+from app.generate_profile import GenerateProfile
 from app.subtitle_service import AddAdditionalLanguage, AddAdditionalLanguageMode, LoadResult, SubtitleService
 from app.subtitle_dto import SubtitleGenerateResult
+from app.core.pinyin_backend import LazyTablePinyinBackend
+from app.core.pinyin_memo import PinyinMemo
 from infra.file_info_reader import FileInfoReader
+from infra.file_info_reader_async import FileInfoReaderAsync
+from infra.file_info_reader_cached import FileInfoReaderCached, FileInfoReaderCachedAsync
+from infra.file_info_reader_matroska import FileInfoReaderMatroska, FileInfoReaderMatroskaAsync
 from infra.file_system import FileSystem
 from infra.file_info_reader_interface import Language
-from prompt_toolkit import prompt
-from prompt_toolkit.completion import PathCompleter
+from infra.tracer import Tracer, format_summary, summarize, to_chrome_trace
+from infra.track_cache import TrackCache
+from infra.tracer_interface import ITracer
 
 
 CHINESE_WITH_PINYIN: Literal['CHINESE_WITH_PINYIN'] = 'CHINESE_WITH_PINYIN'
@@ -31,12 +43,95 @@ def get_generate_subtitle_mode() -> AddAdditionalLanguageMode | Literal['CHINESE
         return get_generate_subtitle_mode()
 
 
-def main():
-    file_reader = FileInfoReader()
+def get_batch_workers() -> int:
+    default_workers = os.cpu_count() or 1
+    workers = input(
+        f'\nNumber of parallel workers (leave empty for {default_workers}): ')
+    if workers == '':
+        return default_workers
+    if workers.isnumeric() and int(workers) > 0:
+        return int(workers)
+
+    print('Invalid number of workers')
+    return get_batch_workers()
+
+
+def get_cache_dir_path(name: str) -> str:
+    cache_home = os.environ.get(
+        'XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'chinese-subs', name)
+
+
+def create_subtitle_service(
+        file_system: FileSystem,
+        tracer: ITracer | None = None,
+        incremental: bool = True,
+        pipe_extraction: bool = False) -> tuple[SubtitleService, PinyinMemo]:
+    file_reader = FileInfoReaderCached(
+        FileInfoReaderMatroska(FileInfoReader(tracer=tracer), file_system, tracer),
+        file_system,
+        get_cache_dir_path('probe'))
+    pinyin_backend = LazyTablePinyinBackend(
+        file_system, os.path.join(get_cache_dir_path('pinyin'), 'table.bin'))
+    pinyin_memo = PinyinMemo(
+        backend=pinyin_backend,
+        file_system=file_system,
+        memo_file_path=os.path.join(get_cache_dir_path('pinyin'), 'memo.json'))
+    subtitle_service = SubtitleService(
+        file_reader,
+        file_system,
+        pinyin_memo=pinyin_memo,
+        incremental=incremental,
+        pipe_extraction=pipe_extraction,
+        file_info_reader_async=FileInfoReaderCachedAsync(
+            FileInfoReaderMatroskaAsync(FileInfoReaderAsync(tracer=tracer), file_system, tracer),
+            file_reader),
+        tracer=tracer,
+        track_cache=TrackCache(file_system, get_cache_dir_path('tracks')))
+    return (subtitle_service, pinyin_memo)
+
+
+def watch(args: argparse.Namespace, tracer: Tracer | None) -> None:
     file_system = FileSystem()
-    subtitle_service = SubtitleService(file_reader, file_system)
+    if args.profile is None or not file_system.path_exists(args.profile):
+        print('A saved profile is needed to watch a directory, see --save-profile')
+        return
+    if not file_system.path_is_dir(args.watch):
+        print('Directory not found with given path')
+        return
+
+    subtitle_service, pinyin_memo = create_subtitle_service(
+        file_system, tracer, incremental=not args.force, pipe_extraction=args.pipe_extraction)
+    watcher = FolderWatcher(
+        subtitle_service,
+        file_system,
+        args.watch,
+        GenerateProfile.load(file_system, args.profile),
+        settle_seconds=args.settle_seconds)
+
+    def on_results(results: list[WatchResult]) -> None:
+        for watch_result in results:
+            error = '' if watch_result.error is None else f' - {watch_result.error}'
+            print(f'{watch_result.result.value} - {watch_result.path}{error}')
+        pinyin_memo.save()
+
+    print(f'Watching {args.watch}, press Ctrl+C to stop')
+    try:
+        watcher.run(on_results, Event(), args.poll_interval)
+    except KeyboardInterrupt:
+        pinyin_memo.save()
+
+
+def run_interactive(
+        subtitle_service: SubtitleService,
+        pinyin_memo: PinyinMemo,
+        save_profile_path: str | None,
+        profile_stages_dir_path: str | None = None):
     print('*** Chinese subtitle tool ***')
 
+    # Only needed by the interactive mode, and slow to import
+    from prompt_toolkit import prompt
+    from prompt_toolkit.completion import PathCompleter
     path_completer = PathCompleter()
     file_path = prompt('Input video file path: ', completer=path_completer)
     loaded_result = subtitle_service.load_path(file_path)
@@ -71,25 +166,53 @@ def main():
 
     subtitle_id = input('\nInput Chinese subtitle ID: ')
 
+    additional_subtitle: AddAdditionalLanguage | None = None
     if isinstance(mode, AddAdditionalLanguageMode):
         additional_subtitle_id = input(
             '\nInput additional language subtitle ID: ')
 
         if additional_subtitle_id == '':
             print('No additional language subtitle ID provided\n')
-            main()
+            run_interactive(subtitle_service, pinyin_memo,
+                            save_profile_path, profile_stages_dir_path)
             return
 
+        additional_subtitle = AddAdditionalLanguage(
+            mode=mode,
+            subtitle_id=additional_subtitle_id
+        )
+
+    if save_profile_path is not None:
+        GenerateProfile(
+            chinese_subtitle_id=subtitle_id,
+            additional_mode=None if additional_subtitle is None else additional_subtitle.mode,
+            additional_subtitle_id=None if additional_subtitle is None else additional_subtitle.subtitle_id,
+        ).save(FileSystem(), save_profile_path)
+        print(f'Profile saved to {save_profile_path}')
+
+    if profile_stages_dir_path is not None:
+        result = profile_stages(
+            subtitle_service, subtitle_id, additional_subtitle, profile_stages_dir_path)
+    elif loaded_result == LoadResult.DIR_LOADED:
+        # Imported when needed, since asyncio slows down the start of the tool
+        import asyncio
+        report = asyncio.run(subtitle_service.generate_batch_async(
+            subtitle_id, additional_subtitle, max_workers=get_batch_workers()))
+        print(f'\nGenerated {len(report.files)} files using {report.workers} workers')
+        for file_result in report.files:
+            print(f'{file_result.result.value} - {file_result.path} '
+                  f'(worker {file_result.worker_pid}, '
+                  f'{file_result.finished_at - file_result.started_at:.2f}s)')
+        result = report.result
+    elif additional_subtitle is not None:
         result = subtitle_service.generate_subtitle_with_additional_language(
-            subtitle_id,
-            AddAdditionalLanguage(
-                mode=mode,
-                subtitle_id=additional_subtitle_id
-            ))
+            subtitle_id, additional_subtitle)
     else:
         result = subtitle_service.generate_chinese_subtitle_with_pinyin(
             subtitle_id)
 
+    pinyin_memo.save()
+
     if result == SubtitleGenerateResult.CODEC_NOT_SUPPORTED:
         return print('Codec not supported')
     if result == SubtitleGenerateResult.NO_CHINESE_FOUND:
@@ -98,6 +221,65 @@ def main():
         return print('No file loaded')
     if result == SubtitleGenerateResult.SUCCESS:
         return print('Success')
+    if result == SubtitleGenerateResult.SKIPPED_UP_TO_DATE:
+        return print('Already up to date')
+
+
+def profile_stages(
+        subtitle_service: SubtitleService,
+        subtitle_id: int | str,
+        additional_subtitle: AddAdditionalLanguage | None,
+        dir_path: str) -> SubtitleGenerateResult:
+    from infra.stage_profiler import format_profile_summary, write_profile_reports
+
+    print('Profiling, the videos are generated one by one')
+    profiled_generation = subtitle_service.generate_profiled(
+        subtitle_id, additional_subtitle)
+    write_profile_reports(FileSystem(), dir_path, profiled_generation.stages)
+    print(f'\n{format_profile_summary(profiled_generation.stages)}')
+    print(f'Profiles saved to {dir_path}, open the .pstats files with `python3 -m pstats` or snakeviz')
+    return profiled_generation.result
+
+
+def save_trace(tracer: Tracer, trace_path: str) -> None:
+    spans = tracer.get_spans()
+    FileSystem().write(trace_path, json.dumps(to_chrome_trace(spans)))
+    print(f'\n{format_summary(summarize(spans))}')
+    print(f'Trace saved to {trace_path}, open it with https://ui.perfetto.dev')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Adds pinyin and other languages to chinese subtitles')
+    parser.add_argument('--save-profile', metavar='PATH',
+                        help='Save the chosen subtitles as a profile to this file')
+    parser.add_argument('--watch', metavar='DIR',
+                        help='Generate the subtitles of the videos added to this directory, using --profile')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='Profile saved with --save-profile, used by --watch')
+    parser.add_argument('--settle-seconds', type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help='Time a file must be unchanged before it is processed by --watch')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL_SECONDS,
+                        help='Seconds between each scan of the watched directory')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='Save the time spent in each stage as a Chrome trace to this file')
+    parser.add_argument('--profile-stages', metavar='DIR',
+                        help='Profile each stage with cProfile and tracemalloc, and save the reports to this directory')
+    parser.add_argument('--force', action='store_true',
+                        help='Generate every video again, even when its generated subtitles are up to date')
+    parser.add_argument('--pipe-extraction', action='store_true',
+                        help='Parse the embedded track of a video while it is extracted, instead of extracting it first')
+    args = parser.parse_args()
+
+    tracer = Tracer() if args.trace is not None else None
+    if args.watch is not None:
+        watch(args, tracer)
+    else:
+        subtitle_service, pinyin_memo = create_subtitle_service(
+            FileSystem(), tracer, incremental=not args.force, pipe_extraction=args.pipe_extraction)
+        run_interactive(subtitle_service, pinyin_memo,
+                        args.save_profile, args.profile_stages)
+    if tracer is not None:
+        save_trace(tracer, args.trace)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,104 @@
+from io import StringIO
+from unittest import TestCase
+from app.core.ass_parser import iter_ass, iter_ass_sorted
+from app.core.subtitle_converter import SubtitleConverter
+from infra.file_system_fake import FileSystemFake
+from tests.fixture_file_file_info import CHINESE_SUBTITLE_ASS
+
+EVENTS_HEADER = '''[Script Info]
+ScriptType: v4.00+
+
+[Events]
+Format: Layer, Start, End, Style, Actor, MarginL, MarginR, MarginV, Effect, Text
+'''
+
+
+class TestIterAss(TestCase):
+    def test_parse_dialogues(self):
+        '''
+            Given the chinese ASS fixture
+            When parsing it
+            Then returns a subtitle for each dialogue
+        '''
+        subtitles = list(iter_ass(StringIO(CHINESE_SUBTITLE_ASS)))
+
+        self.assertEqual([(sub.start, sub.end, sub.content) for sub in subtitles], [
+            (6_850, 9_970, '\u200eVIDEO 原创动画剧集'),
+            (80_350, 82_970, '\u200e真不愧是天下第一刺客'),
+        ])
+
+    def test_override_tags_and_line_breaks(self):
+        '''
+            Given a dialogue with override tags, line breaks and commas
+            When parsing it
+            Then the tags are removed and the line breaks converted
+        '''
+        content = EVENTS_HEADER + \
+            'Dialogue: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,{\\an8}一, 二{\\i1}\\N三\\n四\n'
+
+        subtitles = list(iter_ass(StringIO(content)))
+
+        self.assertEqual([sub.content for sub in subtitles], ['一, 二\n三\n四'])
+
+    def test_skip_short_dialogues_drawings_comments_and_other_sections(self):
+        '''
+            Given dialogues shorter than 0.2 seconds, drawings, comments
+            and dialogues after the events section
+            When parsing them
+            Then they are skipped
+        '''
+        content = EVENTS_HEADER + \
+            'Dialogue: 0,0:00:01.00,0:00:01.10,Default,,0,0,0,,short\n' \
+            'Dialogue: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,{\\p1}m 0 0 l 10 10{\\p0}\n' \
+            '; Dialogue: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,comment\n' \
+            'Comment: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,comment\n' \
+            'Dialogue: 0,0:00:04.00,0:00:05.00,Default,,0,0,0,,kept\n' \
+            '[Fonts]\n' \
+            'Dialogue: 0,0:00:06.00,0:00:07.00,Default,,0,0,0,,after\n'
+
+        subtitles = list(iter_ass(StringIO(content)))
+
+        self.assertEqual([sub.content for sub in subtitles], ['kept'])
+
+    def test_missing_events_section(self):
+        '''
+            Given an ASS without events section
+            When parsing it
+            Then raises ValueError
+        '''
+        with self.assertRaises(ValueError):
+            list(iter_ass(StringIO('[Script Info]\nScriptType: v4.00+\n')))
+
+    def test_iter_ass_sorted(self):
+        '''
+            Given dialogues not sorted by start time
+            When parsing them sorted
+            Then nothing is parsed until the cues are iterated
+            And they are yielded by start time
+        '''
+        lines = StringIO(EVENTS_HEADER +
+                         'Dialogue: 0,0:00:04.00,0:00:05.00,Default,,0,0,0,,second\n'
+                         'Dialogue: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,first\n')
+
+        subtitles = iter_ass_sorted(lines)
+        self.assertEqual(lines.tell(), 0)
+
+        self.assertEqual([sub.content for sub in subtitles], ['first', 'second'])
+
+
+class TestSubtitleConverter(TestCase):
+    def test_read_ass_subtitles_sorted(self):
+        '''
+            Given dialogues not sorted by start time
+            When reading the subtitles
+            Then they are sorted and indexed
+        '''
+        content = EVENTS_HEADER + \
+            'Dialogue: 0,0:00:04.00,0:00:05.00,Default,,0,0,0,,second\n' \
+            'Dialogue: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,first\n'
+        sut = SubtitleConverter(FileSystemFake(initial_files={'sub.ass': content}))
+
+        subtitles = sut.read_ass_subtitles('sub.ass')
+
+        self.assertEqual([(sub.index, sub.content) for sub in subtitles],
+                         [(1, 'first'), (2, 'second')])
@@ -0,0 +1,55 @@
+from datetime import timedelta
+from unittest import TestCase
+import srt
+from app.core.cue import Cue, compose, milliseconds_to_timestamp, timestamp_to_milliseconds
+
+
+class TestCueTimestamps(TestCase):
+    def test_timestamp_to_milliseconds(self):
+        '''
+            Given SRT timestamps with the variants accepted by srt
+            When converting them to milliseconds
+            Then returns the same time as srt
+        '''
+        for timestamp in ['00:01:20,350', '1:02:03.4', '00:00:05', '10:00:00,000']:
+            self.assertEqual(timestamp_to_milliseconds(timestamp),
+                             srt.srt_timestamp_to_timedelta(timestamp) // timedelta(milliseconds=1))
+
+    def test_milliseconds_to_timestamp(self):
+        '''
+            When converting milliseconds to a SRT timestamp
+            Then returns the same timestamp as srt
+        '''
+        for milliseconds in [0, 80_350, 3_723_004, 100 * 3_600_000]:
+            self.assertEqual(milliseconds_to_timestamp(milliseconds),
+                             srt.timedelta_to_srt_timestamp(timedelta(milliseconds=milliseconds)))
+
+
+class TestCueCompose(TestCase):
+    def test_same_as_srt_compose(self):
+        '''
+            Given cues out of order, with blank lines, proprietary text,
+            without content and with invalid timings
+            When composing them
+            Then the output is the same as srt.compose
+        '''
+        def get_cues() -> list[Cue]:
+            return [
+                Cue(start=4_000, end=5_000, content='second\n\nwith blank line'),
+                Cue(start=1_000, end=2_000, content='first', index=7, proprietary='X1:0'),
+                Cue(start=3_000, end=3_500, content='  '),
+                Cue(start=6_000, end=6_000, content='no duration'),
+                Cue(start=7_000, end=8_000, content='\nlast\n'),
+            ]
+
+        self.assertEqual(compose(get_cues()),
+                         srt.compose([cue.to_subtitle() for cue in get_cues()]))
+
+    def test_subtitle_round_trip(self):
+        '''
+            When converting a cue to srt.Subtitle and back
+            Then the cue is the same
+        '''
+        cue = Cue(start=80_350, end=82_970, content='真不愧是天下第一刺客', index=2)
+
+        self.assertEqual(Cue.from_subtitle(cue.to_subtitle()), cue)
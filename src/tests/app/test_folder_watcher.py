@@ -0,0 +1,174 @@
+from unittest import TestCase
+from app.folder_watcher import FolderWatcher, WatchResult
+from app.generate_profile import GenerateProfile
+from app.subtitle_dto import SubtitleGenerateResult
+from app.subtitle_service import AddAdditionalLanguageMode, SubtitleService
+from infra.file_info_reader_fake import FileInfoReaderFake
+from infra.file_system_fake import FileSystemFake
+from tests.fixture_file_file_info import CHINESE_SUBTITLE_ASS, CHINESE_SUBTITLE_SRT, CHINESE_SUBTITLE_WITH_PINYIN, SUBTITLE_EXPECTED_PATH, VIDEO_2_FILE_PATH, VIDEO_FILE_PATH, VIDEOS_DIR_PATH, get_embedded_ass_fixture
+
+SETTLE_SECONDS = 10
+
+
+class TestFolderWatcher(TestCase):
+    '''
+        Given a watched directory with a video with embedded
+        subtitle languages with TrackSubCodec.ASS codec
+        and a profile to generate the chinese subtitle with ID 3 with pinyin
+    '''
+
+    def setUp(self) -> None:
+        file_info = get_embedded_ass_fixture()
+        self.file_system = FileSystemFake(
+            initial_files={VIDEO_FILE_PATH: ''},
+            directory_path=VIDEOS_DIR_PATH)
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                VIDEO_FILE_PATH: file_info,
+                VIDEO_2_FILE_PATH: file_info
+            },
+            file_system=self.file_system)
+        self.now = 0.0
+        self.sut = FolderWatcher(
+            SubtitleService(self.file_info_reader,
+                            self.file_system, incremental=True),
+            self.file_system,
+            VIDEOS_DIR_PATH,
+            GenerateProfile(chinese_subtitle_id=3),
+            settle_seconds=SETTLE_SECONDS,
+            clock=lambda: self.now)
+
+    def _poll_after(self, seconds: float) -> list[WatchResult]:
+        self.now += seconds
+        return self.sut.poll()
+
+    def test_video_generated_once_settled(self):
+        '''
+            when polling before and after the video has been unchanged for the settle time
+            then the video is only generated after the settle time
+            and it is not generated again while it is unchanged
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+
+        self.assertEqual(self._poll_after(0), [])
+        self.assertEqual(self._poll_after(SETTLE_SECONDS - 1), [])
+        self.assertEqual(self._poll_after(1),
+                         [WatchResult(VIDEO_FILE_PATH, SubtitleGenerateResult.SUCCESS)])
+        self.assertEqual(self._poll_after(SETTLE_SECONDS), [])
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
+                         CHINESE_SUBTITLE_WITH_PINYIN)
+
+    def test_video_being_written_is_not_generated(self):
+        '''
+            given a second video that keeps being written
+            when polling after the settle time
+            then only the first video is generated
+            and the second video is generated once it has not changed for the settle time
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_system.write(VIDEO_2_FILE_PATH, 'part')
+        self._poll_after(0)
+
+        self.file_system.write(VIDEO_2_FILE_PATH, 'part part')
+        self.assertEqual(self._poll_after(SETTLE_SECONDS),
+                         [WatchResult(VIDEO_FILE_PATH, SubtitleGenerateResult.SUCCESS)])
+        self.assertEqual(self._poll_after(SETTLE_SECONDS - 1), [])
+        self.assertEqual(self._poll_after(1),
+                         [WatchResult(VIDEO_2_FILE_PATH, SubtitleGenerateResult.SUCCESS)])
+
+    def test_changed_sidecar_queues_the_videos_again(self):
+        '''
+            given the video has been generated
+            when a sidecar subtitle is added to the directory
+            then the video is queued again once the sidecar is settled
+            and it is skipped since the subtitle it was generated from did not change
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self._poll_after(0)
+        self._poll_after(SETTLE_SECONDS)
+
+        self.file_system.write(VIDEOS_DIR_PATH + '/video.en.srt', CHINESE_SUBTITLE_SRT)
+        self.assertEqual(self._poll_after(0), [])
+        self.assertEqual(self._poll_after(SETTLE_SECONDS),
+                         [WatchResult(VIDEO_FILE_PATH, SubtitleGenerateResult.SKIPPED_UP_TO_DATE)])
+        self.assertEqual(len(self.file_info_reader.get_extract_calls()), 1)
+
+    def test_generated_subtitle_does_not_queue_the_video(self):
+        '''
+            given the video has been generated
+            when a subtitle with a custom suffix and its manifest are generated in the directory
+            then the video is not queued again
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self._poll_after(0)
+        self._poll_after(SETTLE_SECONDS)
+
+        self.file_system.write(VIDEOS_DIR_PATH + '/video pinyin.srt', CHINESE_SUBTITLE_WITH_PINYIN)
+        self.file_system.write(VIDEOS_DIR_PATH + '/video pinyin.srt.manifest.json', '{}')
+        self.assertEqual(self._poll_after(0), [])
+        self.assertEqual(self._poll_after(SETTLE_SECONDS), [])
+
+    def test_failed_video_does_not_stop_the_watch(self):
+        '''
+            given the extraction of the first video raises
+            when polling after the settle time
+            then the first video is reported as failed with its error
+            and a second video added later is still generated
+        '''
+        def extract_corrupt_video(file_path: str, track_output_paths: dict[int, str]) -> None:
+            raise ValueError('Corrupt video')
+        self.file_info_reader.extract_subtitles = extract_corrupt_video
+        self._poll_after(0)
+        with self.assertLogs('app.folder_watcher', level='ERROR'):
+            results = self._poll_after(SETTLE_SECONDS)
+        del self.file_info_reader.extract_subtitles
+
+        self.assertEqual([(result.path, result.result) for result in results],
+                         [(VIDEO_FILE_PATH, SubtitleGenerateResult.FAILED)])
+        self.assertEqual(results[0].error, "ValueError('Corrupt video')")
+
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_system.write(VIDEO_2_FILE_PATH, 'video')
+        self._poll_after(0)
+        self.assertEqual(self._poll_after(SETTLE_SECONDS),
+                         [WatchResult(VIDEO_2_FILE_PATH, SubtitleGenerateResult.SUCCESS)])
+
+    def test_directory_listed_once_per_scan(self):
+        '''
+            given two videos settled at the same time
+            when polling after the settle time
+            then the directory is only listed by the scan, not again for the sidecars of each video
+        '''
+        list_calls: list[str] = []
+        list_files = self.file_system.list_files
+        self.file_system.list_files = lambda path: list_calls.append(path) or list_files(path)
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_system.write(VIDEO_2_FILE_PATH, 'video')
+        self._poll_after(0)
+        list_calls.clear()
+
+        self.assertEqual(len(self._poll_after(SETTLE_SECONDS)), 2)
+        self.assertEqual(list_calls, [VIDEOS_DIR_PATH])
+
+
+class TestGenerateProfile(TestCase):
+    def test_save_and_load(self):
+        '''
+            given a profile with an additional language
+            when it is saved and loaded again
+            then the loaded profile is the same
+            and it builds the additional language to generate
+        '''
+        file_system = FileSystemFake()
+        profile = GenerateProfile(
+            chinese_subtitle_id=3,
+            additional_mode=AddAdditionalLanguageMode.WITH_PINYIN,
+            additional_subtitle_id='ext-1')
+
+        profile.save(file_system, 'profile.json')
+        loaded_profile = GenerateProfile.load(file_system, 'profile.json')
+
+        self.assertEqual(loaded_profile, profile)
+        self.assertEqual(loaded_profile.get_additional_subtitle().subtitle_id, 'ext-1')
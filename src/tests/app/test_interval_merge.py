@@ -0,0 +1,163 @@
+from unittest import TestCase
+from app.core.cue import Cue, compose
+from app.core.interval_merge import IntervalIndex, match_intervals
+from app.core.srt_stream import iter_srt
+from app.core.subtitle_manipulator import Color, MergeStrategy, SubtitleManipulator
+from infra.file_system_fake import FileSystemFake
+from tests.fixture_file_file_info import CHINESE_SUBTITLE_SRT, CHINESE_SUBTITLE_SRT_UNMATCHED_TIMINGS_SRT, ENGLISH_SUBTITLE_SRT, ENGLISH_SUBTITLE_UNMATCHED_TIMINGS_SRT
+
+MAX_DIFF = 800
+
+
+def match(intervals: list[tuple[int, int]], other_intervals: list[tuple[int, int]]) -> list[list[int]]:
+    return match_intervals(
+        [start for start, _ in intervals], [end for _, end in intervals],
+        [start for start, _ in other_intervals], [end for _, end in other_intervals],
+        MAX_DIFF)
+
+
+class TestMatchIntervals(TestCase):
+    def test_one_to_one(self):
+        '''
+            Given intervals with close timings in both lists
+            When matching them
+            Then each interval is matched with its closest one
+        '''
+        matches = match(
+            [(1000, 3000), (3100, 5000)],
+            [(3200, 5100), (1100, 2900)])
+
+        self.assertEqual(matches, [[1], [0]])
+
+    def test_many_to_one(self):
+        '''
+            Given an interval spanned by two shorter other intervals
+            When matching them
+            Then both other intervals are matched with it, ordered by start
+        '''
+        matches = match(
+            [(1000, 5000)],
+            [(3000, 5000), (1000, 2900)])
+
+        self.assertEqual(matches, [[1, 0]])
+
+    def test_short_neighbour_is_not_matched(self):
+        '''
+            Given a short other interval that starts right after an interval
+            and matches the next one
+            When matching them
+            Then it is only matched with the next one
+        '''
+        matches = match(
+            [(1000, 5000), (5100, 5500)],
+            [(1000, 5000), (5100, 5500)])
+
+        self.assertEqual(matches, [[0], [1]])
+
+    def test_not_spanned_interval_is_not_matched(self):
+        '''
+            Given an other interval inside an interval much longer than it
+            When matching them
+            Then it is not matched
+        '''
+        matches = match([(1000, 9000)], [(4000, 5000)])
+
+        self.assertEqual(matches, [[]])
+
+
+class _CountingList(list):
+    '''Counts the items read, like the intervals scanned by a lookup'''
+
+    def __init__(self, items: list[int]) -> None:
+        super().__init__(items)
+        self.reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return super().__getitem__(index)
+
+
+class TestIntervalIndex(TestCase):
+    '''
+        Given a long interval followed by many short ones
+    '''
+
+    def setUp(self) -> None:
+        self.intervals = [(0, 50_000)] + [(start, start + 1000) for start in range(0, 1_000_000, 1000)]
+        self.ends = _CountingList([end for _, end in self.intervals])
+        self.sut = IntervalIndex([start for start, _ in self.intervals], self.ends)
+
+    def test_containing(self):
+        '''
+            When finding the intervals containing a point inside the long interval, and one after it
+            Then the long interval and the short one are found, ordered by start
+            And only the short one is found after the long interval
+        '''
+        self.assertEqual(list(self.sut.containing(2500)), [0, 3])
+        self.assertEqual(list(self.sut.containing(500_500)), [501])
+
+    def test_containing_after_long_interval_skips_previous_intervals(self):
+        '''
+            When finding the first interval containing each point after the long interval
+            Then the intervals starting before the found one are not scanned
+        '''
+        for point in range(100_000, 1_000_000, 10_000):
+            self.ends.reads = 0
+
+            self.assertEqual(next(self.sut.containing(point + 500)), point // 1000 + 1)
+            self.assertEqual(self.ends.reads, 1)
+
+
+class TestAddLanguageWithIntervalIndex(TestCase):
+    def setUp(self) -> None:
+        self.sut = SubtitleManipulator(FileSystemFake())
+
+    def _add_language(self, subs: str, other_subs: str, strategy: MergeStrategy) -> str:
+        return compose(self.sut.add_language(
+            list(iter_srt(subs.splitlines())), list(iter_srt(other_subs.splitlines())),
+            src_color=Color.CYAN, strategy=strategy))
+
+    def test_same_as_two_pointer_with_matching_timings(self):
+        '''
+            Given subtitles with matching timings
+            When adding the language with both strategies
+            Then the result is the same
+        '''
+        self.assertEqual(
+            self._add_language(CHINESE_SUBTITLE_SRT,
+                               ENGLISH_SUBTITLE_SRT, MergeStrategy.INTERVAL_INDEX),
+            self._add_language(CHINESE_SUBTITLE_SRT, ENGLISH_SUBTITLE_SRT, MergeStrategy.TWO_POINTER))
+
+    def test_merges_several_subtitles_into_one(self):
+        '''
+            Given a chinese subtitle spanned by two english subtitles
+            When adding the language
+            Then both english subtitles are merged into the chinese one
+        '''
+        subtitles = self.sut.add_language(
+            list(iter_srt(CHINESE_SUBTITLE_SRT_UNMATCHED_TIMINGS_SRT.splitlines())),
+            list(iter_srt(ENGLISH_SUBTITLE_UNMATCHED_TIMINGS_SRT.splitlines())),
+            strategy=MergeStrategy.INTERVAL_INDEX)
+
+        merged = next(sub for sub in subtitles if sub.content.startswith('Yeah?'))
+        self.assertEqual(merged.content,
+                         'Yeah?\nThat vampire Redtooth?\n\u202a是吗？那个吸血鬼赤牙吗？')
+        self.assertEqual(merged.start, 225_208)
+        self.assertEqual(merged.end, 229_416)
+
+    def test_out_of_order_subtitles(self):
+        '''
+            Given subtitles that are not sorted
+            When adding the language
+            Then each subtitle is merged with its match and the result is sorted
+        '''
+        def subtitle(start: int, content: str) -> Cue:
+            return Cue(start=start * 1000, end=(start + 2) * 1000, content=content)
+
+        subtitles = self.sut.add_language(
+            [subtitle(4, '二'), subtitle(1, '一')],
+            [subtitle(1, 'one'), subtitle(4, 'two')],
+            strategy=MergeStrategy.INTERVAL_INDEX)
+
+        self.assertEqual([sub.content for sub in subtitles],
+                         ['one\n一', 'two\n二'])
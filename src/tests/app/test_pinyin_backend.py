@@ -0,0 +1,159 @@
+import pickle
+import random
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from pypinyin.constants import PHRASES_DICT, PINYIN_DICT
+from app.core.pinyin_backend import LazyTablePinyinBackend, PypinyinBackend, TablePinyinBackend, _process_tables, split_han_runs
+from infra.file_system_fake import FileSystemFake
+
+TABLE_FILE_PATH = 'cache/pinyin/table.bin'
+NON_HAN_TEXT = [' ', '，', '。', '？', '…', '-', '‎', '‪', 'VIDEO ', '1', '\n', 'ok ']
+
+
+def build_corpus(line_count: int, seed: int = 7) -> list[str]:
+    '''
+    Random lines mixing phrases, single characters and non Han text,
+    so phrases overlap each other and the prefixes of longer phrases.
+    '''
+    rng = random.Random(seed)
+    phrases = sorted(PHRASES_DICT)
+    chars = [chr(codepoint) for codepoint in sorted(PINYIN_DICT)]
+    lines: list[str] = []
+    for _ in range(line_count):
+        parts: list[str] = []
+        for _ in range(rng.randint(1, 8)):
+            choice = rng.random()
+            if choice < 0.5:
+                parts.append(rng.choice(phrases))
+            elif choice < 0.6:
+                phrase = rng.choice(phrases)
+                parts.append(phrase[:rng.randint(1, len(phrase))])
+            elif choice < 0.85:
+                parts.append(rng.choice(chars))
+            else:
+                parts.append(rng.choice(NON_HAN_TEXT))
+        lines.append(''.join(parts))
+    return lines
+
+
+class TestTablePinyinBackend(TestCase):
+    '''
+        Given the table backend built from pypinyin data
+    '''
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.sut = TablePinyinBackend.build()
+        cls.pypinyin_backend = PypinyinBackend()
+
+    def assert_same_as_pypinyin(self, lines: list[str]) -> None:
+        expected = self.pypinyin_backend.convert_lines(lines)
+        converted = self.sut.convert_lines(lines)
+        mismatches = [(line, expected_line, converted_line)
+                      for line, expected_line, converted_line in zip(lines, expected, converted)
+                      if expected_line != converted_line]
+        self.assertEqual(mismatches[:10], [])
+
+    def test_every_phrase_matches_pypinyin(self):
+        '''
+            When converting every phrase of the pypinyin dictionary
+            Then the pinyin is the same as pypinyin
+        '''
+        self.assert_same_as_pypinyin(sorted(PHRASES_DICT))
+
+    def test_every_character_matches_pypinyin(self):
+        '''
+            When converting every character of the pypinyin dictionary
+            Then the pinyin is the same as pypinyin
+        '''
+        self.assert_same_as_pypinyin(
+            [chr(codepoint) for codepoint in sorted(PINYIN_DICT)])
+
+    def test_random_corpus_matches_pypinyin(self):
+        '''
+            When converting a large corpus of random lines
+            Then the pinyin is the same as pypinyin
+        '''
+        self.assert_same_as_pypinyin(build_corpus(20_000))
+
+    def test_save_and_load(self):
+        '''
+            Given the tables saved to a file
+            When loading the tables from the file
+            Then the pinyin is the same as the built tables
+        '''
+        file_system = FileSystemFake()
+        self.sut.save(file_system, TABLE_FILE_PATH)
+
+        loaded = TablePinyinBackend.load_or_build(
+            file_system, TABLE_FILE_PATH)
+
+        lines = build_corpus(1_000, seed=11)
+        self.assertEqual(loaded.convert_lines(lines),
+                         self.sut.convert_lines(lines))
+
+    def test_load_truncated_file(self):
+        '''
+            Given a table file that was not completely written
+            When loading the tables from the file
+            Then the tables are built and saved again
+            And the saved file is loaded without building them
+        '''
+        file_system = FileSystemFake()
+        self.sut.save(file_system, TABLE_FILE_PATH)
+        content = file_system.read_bytes(TABLE_FILE_PATH)
+        file_system.write_bytes(TABLE_FILE_PATH, content[:len(content) // 2])
+
+        built_file_system = FileSystemFake()
+        self.sut.save(built_file_system, TABLE_FILE_PATH)
+
+        def build_copy() -> TablePinyinBackend:
+            return TablePinyinBackend.load_or_build(built_file_system, TABLE_FILE_PATH)
+
+        # The built and loaded tables replace the tables of the process until the end of the test
+        with patch.dict(_process_tables), patch.object(TablePinyinBackend, 'build', side_effect=build_copy) as build:
+            TablePinyinBackend.load_or_build(file_system, TABLE_FILE_PATH)
+            loaded = TablePinyinBackend.load_or_build(file_system, TABLE_FILE_PATH)
+
+        self.assertEqual(build.call_count, 1)
+        lines = build_corpus(100, seed=17)
+        self.assertEqual(loaded.convert_lines(lines), self.sut.convert_lines(lines))
+
+    def test_unpickle_in_same_process(self):
+        '''
+            When the backend is pickled and unpickled in the same process
+            Then it resolves to the already loaded tables
+        '''
+        self.assertIs(pickle.loads(pickle.dumps(self.sut)), self.sut)
+
+    def test_lazy_backend_loads_saved_tables(self):
+        '''
+            Given the tables saved to a file
+            When converting with a lazy backend of that file
+            Then the tables are only loaded on the first conversion
+            and the pinyin is the same as the built tables
+        '''
+        file_system = FileSystemFake()
+        self.sut.save(file_system, TABLE_FILE_PATH)
+        file_system.read_bytes = Mock(wraps=file_system.read_bytes)
+        sut = LazyTablePinyinBackend(file_system, TABLE_FILE_PATH)
+
+        self.assertEqual(file_system.read_bytes.call_count, 0)
+        lines = build_corpus(1_000, seed=13)
+        self.assertEqual(sut.convert_lines(lines),
+                         self.sut.convert_lines(lines))
+        self.assertEqual(file_system.read_bytes.call_count, 1)
+
+
+class TestSplitHanRuns(TestCase):
+    def test_split_han_runs(self):
+        '''
+            When splitting a line mixing Han characters and other text
+            Then it returns the runs with whether they are Han
+        '''
+        self.assertEqual(split_han_runs('‎VIDEO 原创动画剧集？好'), [
+            ('‎VIDEO ', False),
+            ('原创动画剧集', True),
+            ('？', False),
+            ('好', True),
+        ])
@@ -0,0 +1,172 @@
+import gc
+import pickle
+from unittest import TestCase
+from unittest.mock import Mock
+from pypinyin import pinyin
+from app.core.pinyin_memo import PinyinMemo, PinyinMemoStats, _process_memos
+from infra.file_system_fake import FileSystemFake
+
+LINES = [
+    '‎VIDEO 原创动画剧集',
+    '‎真不愧是天下第一刺客',
+    '‪-不是很强的吗？\n‪-对啊 我也听说了',
+    '是吗？那个吸血鬼赤牙吗？',
+    'Only latin text',
+    '',
+]
+
+MEMO_FILE_PATH = 'cache/pinyin/memo.json'
+
+
+class TestPinyinMemo(TestCase):
+    def test_to_pinyin_matches_pypinyin(self):
+        '''
+            When converting lines mixing Han characters and other text
+            Then the result is the same as converting the whole line with pypinyin
+        '''
+        sut = PinyinMemo()
+
+        for line in LINES:
+            self.assertEqual(sut.to_pinyin(line),
+                             ' '.join([seg[0] for seg in pinyin(line)]))
+
+    def test_to_pinyin_reuses_lines_and_han_runs(self):
+        '''
+            Given a line has already been converted
+            When converting the same line and a line sharing a run of Han characters
+            Then the line is a line hit and the shared run is a run hit
+        '''
+        sut = PinyinMemo()
+        sut.to_pinyin('真不愧是天下第一刺客')
+
+        sut.to_pinyin('真不愧是天下第一刺客')
+        sut.to_pinyin('TARGET 真不愧是天下第一刺客')
+
+        self.assertEqual(sut.get_stats(), PinyinMemoStats(
+            line_hits=1, line_misses=2, run_hits=1, run_misses=1))
+        self.assertAlmostEqual(sut.get_stats().line_hit_rate, 1 / 3)
+
+    def test_lines_are_bounded(self):
+        '''
+            Given the memo keeps at most 2 lines
+            When converting 3 lines
+            Then the least recently used line is evicted
+        '''
+        sut = PinyinMemo(max_lines=2)
+        sut.to_pinyin('你好')
+        sut.to_pinyin('再见')
+        sut.to_pinyin('你好')
+        sut.to_pinyin('谢谢')
+
+        sut.to_pinyin('你好')
+        sut.to_pinyin('再见')
+
+        self.assertEqual(sut.get_stats().line_hits, 2)
+        self.assertEqual(sut.get_stats().line_misses, 4)
+
+    def test_save_and_load(self):
+        '''
+            Given a memo saved to disk
+            When creating a memo from the same file
+            Then the saved lines are hits
+        '''
+        file_system = FileSystemFake()
+        memo = PinyinMemo(file_system=file_system,
+                          memo_file_path=MEMO_FILE_PATH)
+        memo.to_pinyin('真不愧是天下第一刺客')
+        memo.save()
+
+        sut = PinyinMemo(file_system=file_system,
+                         memo_file_path=MEMO_FILE_PATH)
+
+        self.assertEqual(sut.to_pinyin('真不愧是天下第一刺客'),
+                         memo.to_pinyin('真不愧是天下第一刺客'))
+        self.assertEqual(sut.get_stats().line_hits, 1)
+
+    def test_save_atomically(self):
+        '''
+            Given a memo that has been used
+            When saving it
+            Then the file is written atomically, so a run stopped while saving does not leave it truncated
+        '''
+        file_system = FileSystemFake()
+        file_system.write_atomic = Mock(wraps=file_system.write_atomic)
+        memo = PinyinMemo(file_system=file_system,
+                          memo_file_path=MEMO_FILE_PATH)
+        memo.to_pinyin('真不愧是天下第一刺客')
+
+        memo.save()
+
+        file_system.write_atomic.assert_called_once()
+        self.assertEqual(file_system.write_atomic.call_args.args[0], MEMO_FILE_PATH)
+        self.assertTrue(file_system.path_exists(MEMO_FILE_PATH))
+
+    def test_save_without_use(self):
+        '''
+            Given a memo saved to disk
+            When a memo of the same file is saved without being used
+            Then the file is not written again
+        '''
+        file_system = FileSystemFake()
+        memo = PinyinMemo(file_system=file_system,
+                          memo_file_path=MEMO_FILE_PATH)
+        memo.to_pinyin('真不愧是天下第一刺客')
+        memo.save()
+        saved_stat = file_system.get_file_stat(MEMO_FILE_PATH)
+
+        PinyinMemo(file_system=file_system, memo_file_path=MEMO_FILE_PATH).save()
+
+        self.assertEqual(file_system.get_file_stat(MEMO_FILE_PATH), saved_stat)
+
+    def test_unpickle_in_same_process(self):
+        '''
+            When a memo is pickled and unpickled in the same process
+            Then it resolves to the same memo
+        '''
+        sut = PinyinMemo()
+
+        self.assertIs(pickle.loads(pickle.dumps(sut)), sut)
+
+    def test_merge_delta(self):
+        '''
+            Given a memo used by a worker process
+            When merging its delta into the memo of the main process
+            Then the worker lines and lookups are part of the main memo
+        '''
+        worker_memo = pickle.loads(pickle.dumps(PinyinMemo()))
+        worker_memo.to_pinyin('你好')
+        worker_memo.to_pinyin('你好')
+        sut = PinyinMemo()
+
+        sut.merge_delta(worker_memo.take_delta())
+        sut.to_pinyin('你好')
+
+        self.assertEqual(sut.get_stats(), PinyinMemoStats(
+            line_hits=2, line_misses=1, run_hits=0, run_misses=1))
+        self.assertEqual(worker_memo.take_delta().lines, {})
+
+    def test_delta_not_recorded_outside_workers(self):
+        '''
+            Given a memo that has not been sent to a worker process
+            When converting lines
+            Then the lines and runs added are not recorded for a delta
+            And only the lookups are
+        '''
+        sut = PinyinMemo()
+        sut.to_pinyin('你好')
+
+        delta = sut.take_delta()
+        self.assertEqual((delta.lines, delta.runs), ({}, {}))
+        self.assertEqual(delta.stats.line_misses, 1)
+
+    def test_memo_not_kept_alive_by_registry(self):
+        '''
+            Given a memo that is no longer used
+            When it is garbage collected
+            Then it is removed from the memos of the process
+        '''
+        sut = PinyinMemo(token='unused')
+        del sut
+        gc.collect()
+
+        self.assertNotIn('unused', _process_memos)
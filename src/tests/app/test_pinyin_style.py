@@ -0,0 +1,23 @@
+from unittest import TestCase
+from app.core.pinyin_style import PinyinStyle, apply_pinyin_style
+
+
+class TestPinyinStyle(TestCase):
+    def test_tone_numbers(self):
+        '''
+            Given lines of pinyin with tone marks and text that is not Chinese
+            When applying the tone numbers style
+            Then each syllable has its tone number at the end, without a number for the neutral tone
+            And the text that is not Chinese is kept
+        '''
+        self.assertEqual(
+            apply_pinyin_style(['‎VIDEO  yuán chuàng dòng huà', 'nǚ hái zi men ，\n lǜ sè'], PinyinStyle.TONE_NUMBERS),
+            ['‎VIDEO  yuan2 chuang4 dong4 hua4', 'nv3 hai2 zi men ，\n lv4 se4'])
+
+    def test_tone_marks(self):
+        '''
+            When applying the tone marks style
+            Then the lines are kept
+        '''
+        lines = ['zhēn bù kuì shì']
+        self.assertIs(apply_pinyin_style(lines, PinyinStyle.TONE_MARKS), lines)
@@ -0,0 +1,69 @@
+from unittest import TestCase
+from app.sidecar_index import SidecarIndex
+from app.subtitle_dto import SubtitleExternalDto, SubtitleExternalExtension
+from infra.file_info_reader_interface import Language
+from infra.file_system_fake import FileSystemFake
+
+DIR_PATH = 'shows'
+
+
+class TestSidecarIndex(TestCase):
+    '''
+        Given a directory with several videos and their sidecar subtitles
+    '''
+
+    def setUp(self) -> None:
+        file_names = [
+            'Show.S01E01.mkv', 'Show.S01E01.srt', 'Show.S01E01.zh.srt', 'Show.S01E01.en.forced.ass',
+            'Show.S01E02.mkv', 'Show.S01E02.zh.srt', 'Show.S01E02 generated.srt',
+            'Show.S01E02.pinyin.srt', 'Show.S01E02.pinyin.srt.manifest.json',
+            'Show.mkv', 'notes.srt', 'cover.jpg',
+        ]
+        self.file_system = FileSystemFake(
+            initial_files={f'{DIR_PATH}/{file_name}': '' for file_name in file_names},
+            directory_path=DIR_PATH)
+        self.sut = SidecarIndex(self.file_system, DIR_PATH)
+
+    def test_get_sidecars(self):
+        '''
+            When getting the sidecars of a video
+            Then returns the subtitles named like the video, with the language of their suffix
+            And their ID is their suffix and extension
+        '''
+        self.assertEqual(self.sut.get_sidecars(f'{DIR_PATH}/Show.S01E01.mkv'), [
+            SubtitleExternalDto(
+                id='ext-en.forced.ass', path=f'{DIR_PATH}/Show.S01E01.en.forced.ass',
+                extension=SubtitleExternalExtension.ASS, language=Language.ENGLISH),
+            SubtitleExternalDto(
+                id='ext-srt', path=f'{DIR_PATH}/Show.S01E01.srt',
+                extension=SubtitleExternalExtension.SRT, language=None),
+            SubtitleExternalDto(
+                id='ext-zh.srt', path=f'{DIR_PATH}/Show.S01E01.zh.srt',
+                extension=SubtitleExternalExtension.SRT, language=Language.CHINESE),
+        ])
+
+    def test_same_id_for_every_video(self):
+        '''
+            When getting the sidecars of another video
+            Then the sidecar with the same suffix has the same ID
+            And the generated subtitles are not sidecars, with the default suffix or a manifest next to them
+        '''
+        self.assertEqual(
+            [sidecar.id for sidecar in self.sut.get_sidecars(f'{DIR_PATH}/Show.S01E02.mkv')],
+            ['ext-zh.srt'])
+
+    def test_sidecars_of_longest_video_name(self):
+        '''
+            Given a video whose name is the start of the other video names
+            When getting its sidecars
+            Then the sidecars of the other videos are not included
+        '''
+        self.assertEqual(self.sut.get_sidecars(f'{DIR_PATH}/Show.mkv'), [])
+
+    def test_sidecars_of_video_not_listed(self):
+        '''
+            When getting the sidecars of a video that is not in the directory
+            Then returns the subtitles named like it
+        '''
+        self.assertEqual([sidecar.path for sidecar in self.sut.get_sidecars(f'{DIR_PATH}/notes.mp4')],
+                         [f'{DIR_PATH}/notes.srt'])
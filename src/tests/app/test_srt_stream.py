@@ -0,0 +1,49 @@
+from io import StringIO
+from unittest import TestCase
+import srt
+from app.core.cue import Cue, compose
+from app.core.srt_stream import compose_stream, iter_srt
+from tests.fixture_file_file_info import CHINESE_SUBTITLE_SRT, CHINESE_SUBTITLE_SRT_UNMATCHED_TIMINGS_SRT, ENGLISH_SUBTITLE_SRT
+
+
+class TestIterSrt(TestCase):
+    def test_same_as_srt_parse(self):
+        '''
+            Given the SRT fixtures
+            When parsing them lazily
+            Then the cues are the same as the subtitles parsed by srt
+        '''
+        for content in [CHINESE_SUBTITLE_SRT, ENGLISH_SUBTITLE_SRT, CHINESE_SUBTITLE_SRT_UNMATCHED_TIMINGS_SRT]:
+            self.assertEqual(list(iter_srt(StringIO(content))),
+                             [Cue.from_subtitle(sub) for sub in srt.parse(content)])
+
+    def test_content_with_blank_lines_and_bom(self):
+        '''
+            Given a SRT with a byte order mark, a cue with a blank line inside its content
+            and a cue without index
+            When parsing it lazily
+            Then each cue keeps its content
+        '''
+        content = '\ufeff1\n00:00:01,000 --> 00:00:02,000\nfirst\n\nstill first\n\n' \
+            '00:00:03,000 --> 00:00:04,000\nsecond\n'
+
+        subtitles = list(iter_srt(StringIO(content)))
+
+        self.assertEqual([sub.content for sub in subtitles],
+                         ['first\n\nstill first', 'second'])
+        self.assertEqual([sub.index for sub in subtitles], [1, None])
+
+
+class TestComposeStream(TestCase):
+    def test_same_as_srt_compose(self):
+        '''
+            Given cues slightly out of order, and one without content
+            When composing them as a stream
+            Then the output is the same as composing them at once
+        '''
+        def get_cues() -> list[Cue]:
+            return [Cue(start=start, end=start + 1000, content=content)
+                    for start, content in [(2000, 'b'), (1000, 'a'), (3000, ''), (4000, 'c')]]
+
+        self.assertEqual(''.join(compose_stream(get_cues())),
+                         compose(get_cues()))
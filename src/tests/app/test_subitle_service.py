@@ -1,8 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
+from unittest.mock import Mock
+import asyncio
+from infra.file_info_reader_async_fake import FileInfoReaderAsyncFake
 from infra.file_info_reader_fake import FileInfoReaderFake
 from infra.file_system_fake import FileSystemFake
-from infra.file_info_reader_interface import Language, TrackSubCodec
-from app.subtitle_service import AddAdditionalLanguage, AddAdditionalLanguageMode, LoadResult, SubtitleService
+from infra.file_info_reader_interface import FileInfoDto, Language, TrackSubCodec
+from infra.tracer import Tracer
+from infra.track_cache import TrackCache, TrackCacheStats
+from app.core.pinyin_style import PinyinStyle
+from app.subtitle_service import AddAdditionalLanguage, AddAdditionalLanguageMode, LoadResult, OutputSpec, SubtitleService
 from app.exceptions.path_not_loaded_exception import PathNotLoadedException
 from app.subtitle_dto import SubtitleExternalDto, SubtitleExternalExtension, SubtitleLanguageDto, SubtitleGenerateResult
 from tests.fixture_file_file_info import CHINESE_SUBTITLE_SRT_UNMATCHED_TIMINGS_SRT, CHINESE_SUBTITLE_WITH_ENGLISH, CHINESE_SUBTITLE_WITH_ENGLISH_UNMATCHED_TIMINGS, CHINESE_SUBTITLE_WITH_PINYIN_AND_ENGLISH, ENGLISH_SUBTITLE_ASS, ENGLISH_SUBTITLE_SRT, ENGLISH_SUBTITLE_UNMATCHED_TIMINGS_SRT, ENGLISH_SUBTITLE_WITH_PINYIN, SUBTITLE_2_EXPECTED_PATH, VIDEO_2_FILE_PATH, VIDEOS_DIR_PATH, get_embedded_ass_fixture,\
@@ -170,6 +177,21 @@ class TestSubtitleServiceEmbeddedAssSubs(TestCase):
         self.assertIn(SUBTITLE_EXPECTED_PATH, remaining_paths_after_cleanup)
         self.assertIn(self.file_path, remaining_paths_after_cleanup)
 
+    def test_generate_with_additional_language_extracts_once(self):
+        '''
+            given there is a chinese subtitle with TrackSubCodec.ASS and ID 3
+            and a english subtitle with TrackSubCodec.ASS and ID 2
+            when generating a subtitle with chinese and english
+            then both tracks are extracted with a single call
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(ENGLISH_SUBTITLE_ASS)
+        self.sut.generate_subtitle_with_additional_language('3', AddAdditionalLanguage(
+            mode=AddAdditionalLanguageMode.WITHOUT_PINYIN, subtitle_id='2'))
+
+        self.assertEqual(self.file_info_reader.get_extract_calls(),
+                         [(self.file_path, [3, 2])])
+
     def test_generate_english_subtitle_with_pinyin(self):
         '''
             given there is a chinese subtitle with TrackSubCodec.ASS and ID 3
@@ -196,6 +218,81 @@ class TestSubtitleServiceEmbeddedAssSubs(TestCase):
         self.assertIn(SUBTITLE_EXPECTED_PATH, remaining_paths_after_cleanup)
         self.assertIn(self.file_path, remaining_paths_after_cleanup)
 
+    def test_generate_with_unsorted_dialogues(self):
+        '''
+            given there is a chinese subtitle with TrackSubCodec.ASS and ID 3
+            whose dialogues are in the reverse order of their start time
+            when generating a subtitle with pinyin
+            then the subtitle is the same as the one generated from the sorted dialogues
+        '''
+        header = CHINESE_SUBTITLE_ASS.split('Dialogue:', 1)[0]
+        dialogues = [f'Dialogue: 0,0:00:{second:02}.00,0:00:{second:02}.50,Default,,0,0,0,,第{second}句\n'
+                     for second in range(30)]
+        self.file_info_reader.add_extracted_content(header + ''.join(dialogues))
+        self.sut.generate_chinese_subtitle_with_pinyin('3')
+        sorted_subtitle = self.file_system.read(SUBTITLE_EXPECTED_PATH)
+
+        self.file_info_reader.add_extracted_content(header + ''.join(reversed(dialogues)))
+        result = self.sut.generate_chinese_subtitle_with_pinyin('3')
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH), sorted_subtitle)
+
+class TestSubtitleServiceEmbeddedAssSubsStreaming(TestSubtitleServiceEmbeddedAssSubs):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.ASS codec have been loaded
+        and the subtitles are streamed
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, streaming=True)
+        self.sut.load_path(self.file_path)
+
+
+class TestSubtitleServiceEmbeddedAssSubsPipe(TestSubtitleServiceEmbeddedAssSubs):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.ASS codec have been loaded
+        and the tracks are parsed while they are extracted through a pipe
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, pipe_extraction=True)
+        self.sut.load_path(self.file_path)
+
+    def test_generate_chinese_subtitle_through_pipe(self):
+        '''
+            given there is a chinese subtitle with TrackSubCodec.ASS and ID 3
+            when generating a subtitle with pinyin
+            then the track is extracted through a pipe
+            and no track is extracted to a scratch file
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.sut.generate_chinese_subtitle_with_pinyin('3')
+
+        self.assertEqual(self.file_info_reader.get_extract_calls(), [(self.file_path, [3])])
+        # No scratch directory was created before
+        self.assertEqual(self.file_system.create_temp_dir(), 'tmp/chinese-subs-0')
+
+
+class TestSubtitleServiceEmbeddedAssSubsPipeStreaming(TestSubtitleServiceEmbeddedAssSubsPipe):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.ASS codec have been loaded
+        and the tracks are streamed while they are extracted through a pipe
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, streaming=True, pipe_extraction=True)
+        self.sut.load_path(self.file_path)
+
 
 class TestSubtitleServiceEmbeddedSrtSubs(TestCase):
     '''
@@ -348,6 +445,48 @@ class TestSubtitleServiceEmbeddedSrtSubs(TestCase):
         self.assertIn(self.file_path, remaining_paths_after_cleanup)
 
 
+class TestSubtitleServiceEmbeddedSrtSubsStreaming(TestSubtitleServiceEmbeddedSrtSubs):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.SRT codec have been loaded
+        and the subtitles are streamed
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, streaming=True)
+        self.sut.load_path(self.file_path)
+
+
+class TestSubtitleServiceEmbeddedSrtSubsPipe(TestSubtitleServiceEmbeddedSrtSubs):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.SRT codec have been loaded
+        and the tracks are parsed while they are extracted through a pipe
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, pipe_extraction=True)
+        self.sut.load_path(self.file_path)
+
+
+class TestSubtitleServiceEmbeddedSrtSubsPipeStreaming(TestSubtitleServiceEmbeddedSrtSubsPipe):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.SRT codec have been loaded
+        and the tracks are streamed while they are extracted through a pipe
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, streaming=True, pipe_extraction=True)
+        self.sut.load_path(self.file_path)
+
+
 class TestSubtitleServiceEmbeddedAndExternalAssSubs(TestCase):
     '''
         Given the path to a file with one external subtitle with .ass extension
@@ -375,18 +514,18 @@ class TestSubtitleServiceEmbeddedAndExternalAssSubs(TestCase):
         '''
         external_subtitles = self.sut.get_external_subtitles()
         expected_dto = SubtitleExternalDto(
-            id='ext-0', path=self._external_file_path, extension=SubtitleExternalExtension.ASS)
+            id='ext-ass', path=self._external_file_path, extension=SubtitleExternalExtension.ASS)
 
         self.assertCountEqual(external_subtitles, [expected_dto])
 
     def test_generate_chinese_subtitle_with_pinyin(self):
         '''
-            when attempting to generate a subtitle with ID 'ext-0'
+            when attempting to generate a subtitle with ID 'ext-ass'
             then a subtitle is generated with pinyin and extension .srt
             and any temporary files are deleted
             and the original .ass file is kept
         '''
-        result = self.sut.generate_chinese_subtitle_with_pinyin('ext-0')
+        result = self.sut.generate_chinese_subtitle_with_pinyin('ext-ass')
 
         self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
         self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
@@ -424,18 +563,18 @@ class TestSubtitleServiceEmbeddedAndExternalSrtSubs(TestCase):
         '''
         external_subtitles = self.sut.get_external_subtitles()
         expected_dto = SubtitleExternalDto(
-            id='ext-0', path=self._external_file_path, extension=SubtitleExternalExtension.SRT)
+            id='ext-srt', path=self._external_file_path, extension=SubtitleExternalExtension.SRT)
 
         self.assertCountEqual(external_subtitles, [expected_dto])
 
     def test_generate_chinese_subtitle_with_pinyin(self):
         '''
-            when attempting to generate a subtitle with ID 'ext-0'
+            when attempting to generate a subtitle with ID 'ext-srt'
             then a subtitle is generated with pinyin and extension .srt
             and any temporary files are deleted
             and the original .srt file is kept
         '''
-        result = self.sut.generate_chinese_subtitle_with_pinyin('ext-0')
+        result = self.sut.generate_chinese_subtitle_with_pinyin('ext-srt')
 
         self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
         self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
@@ -446,6 +585,116 @@ class TestSubtitleServiceEmbeddedAndExternalSrtSubs(TestCase):
         self.assertIn(self._external_file_path, remaining_paths_after_cleanup)
 
 
+class TestSubtitleServiceExternalSubsBatch(TestCase):
+    '''
+        Given the path to a directory with 2 files, that each have their own
+        external chinese subtitle with .zh.srt extension, has been loaded
+    '''
+
+    def setUp(self) -> None:
+        self.file_path_dir = VIDEOS_DIR_PATH
+        self.file_system = FileSystemFake(
+            initial_files={
+                VIDEO_FILE_PATH: '',
+                VIDEO_2_FILE_PATH: '',
+                'some/file/path/video.zh.srt': CHINESE_SUBTITLE_SRT,
+                'some/file/path/video_2.zh.srt': CHINESE_SUBTITLE_SRT_UNMATCHED_TIMINGS_SRT,
+            },
+            directory_path=self.file_path_dir)
+        self.file_system.list_files = Mock(wraps=self.file_system.list_files)
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                VIDEO_FILE_PATH: get_embedded_ass_fixture(),
+                VIDEO_2_FILE_PATH: get_embedded_ass_fixture()
+            },
+            file_system=self.file_system)
+        self.sut = SubtitleService(self.file_info_reader, self.file_system)
+        self.sut.load_path(self.file_path_dir)
+
+    def test_get_external_subtitles(self):
+        '''
+            when asking for external subtitles
+            then returns the subtitle of the first video, with its language
+        '''
+        self.assertEqual(self.sut.get_external_subtitles(), [SubtitleExternalDto(
+            id='ext-zh.srt', path='some/file/path/video.zh.srt',
+            extension=SubtitleExternalExtension.SRT, language=Language.CHINESE)])
+
+    def test_generate_chinese_subtitle_with_pinyin(self):
+        '''
+            when generating the subtitles with ID 'ext-zh.srt'
+            then each video is generated from its own external subtitle
+            and the directory is listed once
+        '''
+        result = self.sut.generate_chinese_subtitle_with_pinyin('ext-zh.srt')
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
+                         CHINESE_SUBTITLE_WITH_PINYIN)
+        self.assertNotEqual(self.file_system.read('some/file/path/video_2 generated.srt'),
+                            CHINESE_SUBTITLE_WITH_PINYIN)
+        self.assertEqual(self.file_system.list_files.call_count, 1)
+
+
+class TestSubtitleServiceMediaContext(TestCase):
+    '''
+        Given the path to a directory with 2 files has been loaded
+        and only the first file has a chinese subtitle
+    '''
+
+    def setUp(self) -> None:
+        file_info = get_embedded_ass_fixture()
+        file_info_without_chinese = FileInfoDto(
+            file_name=file_info.file_name,
+            tracks=[track for track in file_info.tracks if track.id != SubTrackID.CHI.value])
+        self.file_system = FileSystemFake(
+            initial_files={
+                VIDEO_FILE_PATH: '',
+                VIDEO_2_FILE_PATH: ''
+            },
+            directory_path=VIDEOS_DIR_PATH)
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                VIDEO_FILE_PATH: file_info,
+                VIDEO_2_FILE_PATH: file_info_without_chinese
+            },
+            file_system=self.file_system)
+        self.sut = SubtitleService(self.file_info_reader, self.file_system)
+        self.sut.load_path(VIDEOS_DIR_PATH)
+
+    def test_generate_with_probe_of_each_file(self):
+        '''
+            when listing the subtitles and generating the subtitles with ID '3' and english
+            then each file is generated with its own subtitles
+            and each file is probed once
+        '''
+        self.sut.get_embedded_subtitles()
+        self.sut.get_external_subtitles()
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(ENGLISH_SUBTITLE_ASS)
+        report = self.sut.generate_batch('3', AddAdditionalLanguage(
+            mode=AddAdditionalLanguageMode.WITHOUT_PINYIN,
+            subtitle_id=str(SubTrackID.ENG.value)), max_workers=1)
+
+        self.assertEqual([file.result for file in report.files],
+                         [SubtitleGenerateResult.SUCCESS, SubtitleGenerateResult.NO_SUBTITLES_FOUND])
+        self.assertEqual(self.file_info_reader.get_file_info_calls(),
+                         [VIDEO_FILE_PATH, VIDEO_2_FILE_PATH])
+
+    def test_probe_again_after_load(self):
+        '''
+            given the subtitles have been listed
+            when loading the path again and listing the subtitles
+            then the first file is probed again, since it may have changed
+        '''
+        self.sut.get_embedded_subtitles()
+        self.sut.load_path(VIDEOS_DIR_PATH)
+        self.sut.get_embedded_subtitles()
+
+        self.assertEqual(self.file_info_reader.get_file_info_calls(),
+                         [VIDEO_FILE_PATH, VIDEO_FILE_PATH])
+
+
 class TestSubtitleServiceBatchDirectoryWithoutVideoFiles(TestCase):
     '''
         Given the path to a directory with files that has no supported videos
@@ -556,3 +805,646 @@ class TestSubtitleServiceEmbeddedSubsBatch(TestCase):
         self.assertIn(SUBTITLE_2_EXPECTED_PATH, remaining_paths_after_cleanup)
         self.assertIn(self.file_path_1, remaining_paths_after_cleanup)
         self.assertIn(self.file_path_2, remaining_paths_after_cleanup)
+
+
+class TestSubtitleServiceEmbeddedSubsParallelBatch(TestCase):
+    '''
+        Given the path to a directory with 2 files, that both have the same
+        embedded subtitle languages with TrackSubCodec.ASS codec, has been loaded
+        and the batch executor runs the videos in parallel
+    '''
+
+    def setUp(self) -> None:
+        self.file_path_1 = VIDEO_FILE_PATH
+        self.file_path_2 = VIDEO_2_FILE_PATH
+        self.file_path_dir = VIDEOS_DIR_PATH
+        file_info = get_embedded_ass_fixture()
+        self.file_system = FileSystemFake(
+            initial_files={
+                self.file_path_1: '',
+                self.file_path_2: ''
+            },
+            directory_path=self.file_path_dir)
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                self.file_path_1: file_info,
+                self.file_path_2: file_info
+            },
+            file_system=self.file_system)
+        self.sut = SubtitleService(
+            self.file_info_reader,
+            self.file_system,
+            executor_factory=lambda workers: ThreadPoolExecutor(max_workers=workers))
+        self.sut.load_path(self.file_path_dir)
+
+    def test_generate_batch_chinese_subtitle_with_pinyin(self):
+        '''
+            given there is a chinese subtitle with TrackSubCodec.ASS and ID 3 in both files
+            when generating the batch with 4 workers
+            then a subtitle is generated with pinyin for each file
+            and the report shows 2 workers were used, one result per file in directory order
+            and any temporary files are deleted
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        report = self.sut.generate_batch('3', max_workers=4)
+
+        self.assertEqual(report.result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(report.workers, 2)
+        self.assertTrue(report.parallel)
+        self.assertEqual([file.path for file in report.files],
+                         [self.file_path_1, self.file_path_2])
+        self.assertEqual([file.order for file in report.files], [0, 1])
+        self.assertTrue(all(file.result == SubtitleGenerateResult.SUCCESS
+                            for file in report.files))
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
+                         CHINESE_SUBTITLE_WITH_PINYIN)
+        self.assertEqual(self.file_system.read(SUBTITLE_2_EXPECTED_PATH),
+                         CHINESE_SUBTITLE_WITH_PINYIN)
+
+        remaining_paths_after_cleanup = self.file_system.get_file_paths()
+        self.assertEqual(len(remaining_paths_after_cleanup), 4)
+
+    def test_generate_batch_keeps_result_per_file(self):
+        '''
+            when generating the batch with a subtitle ID not found
+            then every file reports NO_CHINESE_FOUND
+            and the batch result is NO_CHINESE_FOUND
+        '''
+        report = self.sut.generate_batch(123, max_workers=2)
+
+        self.assertEqual(report.result, SubtitleGenerateResult.NO_CHINESE_FOUND)
+        self.assertEqual([file.result for file in report.files],
+                         [SubtitleGenerateResult.NO_CHINESE_FOUND, SubtitleGenerateResult.NO_CHINESE_FOUND])
+
+    def test_generate_batch_with_single_worker(self):
+        '''
+            when generating the batch with 1 worker
+            then the videos are generated without an executor
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        report = self.sut.generate_batch('3', max_workers=1)
+
+        self.assertEqual(report.result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(report.workers, 1)
+        self.assertFalse(report.parallel)
+        self.assertEqual(len(report.files), 2)
+
+
+class TestSubtitleServiceEmbeddedSubsAsyncBatch(TestCase):
+    '''
+        Given the path to a directory with 2 files, that both have the same
+        embedded subtitle languages with TrackSubCodec.ASS codec, has been loaded
+        and the tracks are extracted by an async file info reader
+    '''
+
+    def setUp(self) -> None:
+        file_info = get_embedded_ass_fixture()
+        self.file_system = FileSystemFake(
+            initial_files={
+                VIDEO_FILE_PATH: '',
+                VIDEO_2_FILE_PATH: ''
+            },
+            directory_path=VIDEOS_DIR_PATH)
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                VIDEO_FILE_PATH: file_info,
+                VIDEO_2_FILE_PATH: file_info
+            },
+            file_system=self.file_system)
+        self.file_info_reader_async = FileInfoReaderAsyncFake(
+            self.file_info_reader, delay_seconds=0.05)
+        self.sut = SubtitleService(
+            self.file_info_reader,
+            self.file_system,
+            executor_factory=lambda workers: ThreadPoolExecutor(max_workers=workers),
+            file_info_reader_async=self.file_info_reader_async)
+        self.sut.load_path(VIDEOS_DIR_PATH)
+
+    def test_generate_batch_async_chinese_subtitle_with_pinyin(self):
+        '''
+            given there is a chinese subtitle with TrackSubCodec.ASS and ID 3 in both files
+            when generating the batch asynchronously
+            then the tracks of both files are extracted at the same time
+            and a subtitle is generated with pinyin for each file, reported in directory order
+            and any temporary files are deleted
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        report = asyncio.run(self.sut.generate_batch_async('3', max_workers=2))
+
+        self.assertEqual(report.result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual([file.path for file in report.files],
+                         [VIDEO_FILE_PATH, VIDEO_2_FILE_PATH])
+        self.assertEqual(self.file_info_reader_async.get_max_running_calls(), 2)
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
+                         CHINESE_SUBTITLE_WITH_PINYIN)
+        self.assertEqual(len(self.file_system.get_file_paths()), 4)
+
+    def test_generate_batch_async_keeps_result_per_file(self):
+        '''
+            when generating the batch asynchronously with a subtitle ID not found
+            then every file reports NO_CHINESE_FOUND without extracting
+            and the files are probed concurrently by the async file info reader
+        '''
+        report = asyncio.run(self.sut.generate_batch_async(123))
+
+        self.assertEqual(report.result, SubtitleGenerateResult.NO_CHINESE_FOUND)
+        self.assertEqual([file.result for file in report.files],
+                         [SubtitleGenerateResult.NO_CHINESE_FOUND, SubtitleGenerateResult.NO_CHINESE_FOUND])
+        self.assertEqual(self.file_info_reader.get_extract_calls(), [])
+        self.assertEqual(self.file_info_reader_async.get_max_running_calls(), 2)
+
+    def test_generate_batch_async_cancels_other_files_on_failure(self):
+        '''
+            given the extraction of every file fails
+            when generating the batch asynchronously
+            then the error is raised once the other files have been cancelled
+            and any temporary files are deleted
+        '''
+        self.file_info_reader.extract_subtitles = Mock(side_effect=OSError('mkvextract failed'))
+
+        with self.assertRaises(OSError):
+            asyncio.run(self.sut.generate_batch_async('3'))
+
+        self.assertEqual(len(self.file_system.get_file_paths()), 2)
+
+
+class TestSubtitleServiceIncrementalBatch(TestCase):
+    '''
+        Given the path to a directory with 2 files, that both have the same
+        embedded subtitle languages with TrackSubCodec.ASS codec, has been loaded
+        in incremental mode
+        and a subtitle with pinyin has already been generated for both files
+    '''
+
+    def setUp(self) -> None:
+        self.file_path_1 = VIDEO_FILE_PATH
+        self.file_path_2 = VIDEO_2_FILE_PATH
+        file_info = get_embedded_ass_fixture()
+        self.file_system = FileSystemFake(
+            initial_files={
+                self.file_path_1: '',
+                self.file_path_2: ''
+            },
+            directory_path=VIDEOS_DIR_PATH)
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                self.file_path_1: file_info,
+                self.file_path_2: file_info
+            },
+            file_system=self.file_system)
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, incremental=True)
+        self.sut.load_path(VIDEOS_DIR_PATH)
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.assertEqual(self.sut.generate_chinese_subtitle_with_pinyin('3'),
+                         SubtitleGenerateResult.SUCCESS)
+
+    def _get_extracted_paths(self) -> list[str]:
+        return [file_path for file_path, _ in self.file_info_reader.get_extract_calls()]
+
+    def test_generate_again_skips_up_to_date_videos(self):
+        '''
+            when generating the same subtitle again
+            then no video is extracted again
+            and returns SubtitleGenerateResult.SKIPPED_UP_TO_DATE
+            and a manifest is kept next to each generated subtitle
+        '''
+        result = self.sut.generate_chinese_subtitle_with_pinyin('3')
+
+        self.assertEqual(result, SubtitleGenerateResult.SKIPPED_UP_TO_DATE)
+        self.assertEqual(self._get_extracted_paths(),
+                         [self.file_path_1, self.file_path_2])
+        self.assertIn(SUBTITLE_EXPECTED_PATH + '.manifest.json',
+                      self.file_system.get_file_paths())
+        self.assertIn(SUBTITLE_2_EXPECTED_PATH + '.manifest.json',
+                      self.file_system.get_file_paths())
+
+    def test_generate_batch_again_reports_skipped_videos(self):
+        '''
+            when generating the batch again
+            then every file reports SKIPPED_UP_TO_DATE
+            and the batch result is SKIPPED_UP_TO_DATE
+        '''
+        report = self.sut.generate_batch('3', max_workers=1)
+
+        self.assertEqual(report.result, SubtitleGenerateResult.SKIPPED_UP_TO_DATE)
+        self.assertEqual([file.result for file in report.files],
+                         [SubtitleGenerateResult.SKIPPED_UP_TO_DATE, SubtitleGenerateResult.SKIPPED_UP_TO_DATE])
+
+    def test_generate_again_after_video_changed(self):
+        '''
+            given the second video has changed
+            when generating the same subtitle again
+            then only the second video is generated again
+            and returns SubtitleGenerateResult.SUCCESS
+        '''
+        self.file_system.write(self.file_path_2, 'new content')
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+
+        result = self.sut.generate_chinese_subtitle_with_pinyin('3')
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(self._get_extracted_paths(),
+                         [self.file_path_1, self.file_path_2, self.file_path_2])
+
+    def test_generate_again_after_output_edited(self):
+        '''
+            given the subtitle generated for the first video has been edited
+            when generating the same subtitle again
+            then only the first video is generated again
+        '''
+        self.file_system.write(SUBTITLE_EXPECTED_PATH, 'edited')
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+
+        result = self.sut.generate_chinese_subtitle_with_pinyin('3')
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
+                         CHINESE_SUBTITLE_WITH_PINYIN)
+        self.assertEqual(self._get_extracted_paths(),
+                         [self.file_path_1, self.file_path_2, self.file_path_1])
+
+    def test_generate_again_with_other_mode(self):
+        '''
+            when generating the subtitle with an additional language
+            then both videos are generated again
+        '''
+        for _ in range(2):
+            self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+            self.file_info_reader.add_extracted_content(ENGLISH_SUBTITLE_ASS)
+
+        result = self.sut.generate_subtitle_with_additional_language(
+            '3', AddAdditionalLanguage(mode=AddAdditionalLanguageMode.WITH_CHINESE_AND_PINYIN, subtitle_id='2'))
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
+                         CHINESE_SUBTITLE_WITH_PINYIN_AND_ENGLISH)
+        self.assertEqual(len(self._get_extracted_paths()), 4)
+
+
+class TestSubtitleServiceTrackCache(TestCase):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.ASS codec have been loaded
+        with a track cache
+        and a subtitle with pinyin has already been generated
+    '''
+
+    def setUp(self) -> None:
+        self.file_path = VIDEO_FILE_PATH
+        self.file_system = FileSystemFake(initial_files={self.file_path: ''})
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                self.file_path: get_embedded_ass_fixture()
+            },
+            file_system=self.file_system)
+        self.track_cache = TrackCache(self.file_system, 'cache/tracks')
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, track_cache=self.track_cache)
+        self.sut.load_path(self.file_path)
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.sut.generate_chinese_subtitle_with_pinyin('3')
+
+    def test_generate_with_additional_language(self):
+        '''
+            when generating the subtitle with an additional language
+            then only the track of the additional language is extracted
+            and the chinese track is read from the cache
+        '''
+        self.file_info_reader.add_extracted_content(ENGLISH_SUBTITLE_ASS)
+
+        result = self.sut.generate_subtitle_with_additional_language(
+            '3', AddAdditionalLanguage(mode=AddAdditionalLanguageMode.WITH_CHINESE_AND_PINYIN, subtitle_id='2'))
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
+                         CHINESE_SUBTITLE_WITH_PINYIN_AND_ENGLISH)
+        self.assertEqual(self.file_info_reader.get_extract_calls(),
+                         [(self.file_path, [3]), (self.file_path, [2])])
+        self.assertEqual(self.track_cache.get_stats(), TrackCacheStats(hits=1, misses=2, evictions=0))
+
+    def test_generate_after_video_changed(self):
+        '''
+            given the video has changed
+            when generating the same subtitle again
+            then the chinese track is extracted again
+        '''
+        self.file_system.write(self.file_path, 'new content')
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+
+        self.sut.generate_chinese_subtitle_with_pinyin('3')
+
+        self.assertEqual(self.file_info_reader.get_extract_calls(),
+                         [(self.file_path, [3]), (self.file_path, [3])])
+
+    def test_generate_with_pipe_extraction(self):
+        '''
+            given the tracks are parsed while they are extracted through a pipe
+            when generating the same subtitle again
+            then the chinese track is read from the cache instead of the pipe
+        '''
+        sut = SubtitleService(
+            self.file_info_reader, self.file_system, pipe_extraction=True, track_cache=self.track_cache)
+        sut.load_path(self.file_path)
+
+        sut.generate_chinese_subtitle_with_pinyin('3')
+
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH), CHINESE_SUBTITLE_WITH_PINYIN)
+        self.assertEqual(self.file_info_reader.get_extract_calls(), [(self.file_path, [3])])
+
+
+CHINESE_SUBTITLE_WITH_TONE_NUMBERS = CHINESE_SUBTITLE_WITH_PINYIN \
+    .replace('yuán chuàng dòng huà jù jí', 'yuan2 chuang4 dong4 hua4 ju4 ji2') \
+    .replace('zhēn bù kuì shì tiān xià dì yī cì kè', 'zhen1 bu4 kui4 shi4 tian1 xia4 di4 yi1 ci4 ke4')
+
+
+class TestSubtitleServiceOutputs(TestCase):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.ASS codec have been loaded in incremental mode
+    '''
+
+    def setUp(self) -> None:
+        self.file_path = VIDEO_FILE_PATH
+        self.file_system = FileSystemFake(initial_files={self.file_path: ''})
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                self.file_path: get_embedded_ass_fixture()
+            },
+            file_system=self.file_system)
+        self.tracer = Tracer()
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, incremental=True, tracer=self.tracer)
+        self.sut.load_path(self.file_path)
+        self.outputs = [
+            OutputSpec(),
+            OutputSpec(pinyin_style=PinyinStyle.TONE_NUMBERS, suffix=' numbers.srt'),
+            OutputSpec(mode=AddAdditionalLanguageMode.WITH_PINYIN, suffix=' english.srt'),
+            OutputSpec(mode=AddAdditionalLanguageMode.WITH_CHINESE_AND_PINYIN, suffix=' all.srt'),
+            OutputSpec(mode=AddAdditionalLanguageMode.WITHOUT_PINYIN, suffix=' no pinyin.srt'),
+        ]
+
+    def test_generate_outputs(self):
+        '''
+            when generating several outputs with chinese ID '3' and english ID '2'
+            then each output is written with its mode and pinyin style
+            and the tracks are extracted, parsed and converted to pinyin once
+        '''
+        self.maxDiff = None
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(ENGLISH_SUBTITLE_ASS)
+
+        result = self.sut.generate_outputs('3', self.outputs, other_subtitle_id='2')
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        base_path = SUBTITLE_EXPECTED_PATH.removesuffix(' generated.srt')
+        self.assertEqual(
+            [self.file_system.read(base_path + output.suffix) for output in self.outputs],
+            [CHINESE_SUBTITLE_WITH_PINYIN, CHINESE_SUBTITLE_WITH_TONE_NUMBERS, ENGLISH_SUBTITLE_WITH_PINYIN,
+             CHINESE_SUBTITLE_WITH_PINYIN_AND_ENGLISH, CHINESE_SUBTITLE_WITH_ENGLISH])
+        self.assertEqual(self.file_info_reader.get_extract_calls(), [(self.file_path, [3, 2])])
+        span_names = [span.name for span in self.tracer.get_spans()]
+        self.assertEqual(span_names.count('parse ass'), 2)
+        self.assertEqual(span_names.count('pinyin'), 1)
+
+    def test_generate_outputs_again(self):
+        '''
+            given the outputs have been generated
+            and the output with tone numbers has been edited
+            when generating them again
+            then only the output with tone numbers is generated again, without the english track
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(ENGLISH_SUBTITLE_ASS)
+        self.sut.generate_outputs('3', self.outputs, other_subtitle_id='2')
+        numbers_path = SUBTITLE_EXPECTED_PATH.removesuffix(' generated.srt') + ' numbers.srt'
+        self.file_system.write(numbers_path, 'edited')
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+
+        result = self.sut.generate_outputs('3', self.outputs, other_subtitle_id='2')
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(self.file_system.read(numbers_path), CHINESE_SUBTITLE_WITH_TONE_NUMBERS)
+        self.assertEqual(self.file_info_reader.get_extract_calls(),
+                         [(self.file_path, [3, 2]), (self.file_path, [3])])
+        self.assertEqual(self.sut.generate_outputs('3', self.outputs, other_subtitle_id='2'),
+                         SubtitleGenerateResult.SKIPPED_UP_TO_DATE)
+
+    def test_outputs_are_not_sidecars(self):
+        '''
+            given the outputs have been generated
+            when loading the video again, with this service or a new one
+            then the outputs are not external subtitles of the video
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        self.file_info_reader.add_extracted_content(ENGLISH_SUBTITLE_ASS)
+        self.sut.generate_outputs('3', self.outputs, other_subtitle_id='2')
+
+        self.sut.load_path(self.file_path)
+        new_sut = SubtitleService(self.file_info_reader, self.file_system)
+        new_sut.load_path(self.file_path)
+
+        self.assertEqual(self.sut.get_external_subtitles(), [])
+        self.assertEqual(new_sut.get_external_subtitles(), [])
+
+    def test_outputs_are_not_sidecars_without_manifest(self):
+        '''
+            given the external subtitles were listed by a service that is not incremental
+            when generating an output with a custom suffix, which has no manifest
+            then it is not an external subtitle of the video
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_ASS)
+        sut = SubtitleService(self.file_info_reader, self.file_system)
+        sut.load_path(self.file_path)
+        self.assertEqual(sut.get_external_subtitles(), [])
+
+        sut.generate_outputs('3', [OutputSpec(suffix=' pinyin.srt')])
+        sut.load_path(self.file_path)
+
+        self.assertEqual(sut.get_external_subtitles(), [])
+
+    def test_generate_invalid_outputs(self):
+        '''
+            when generating outputs with an additional language without its ID
+            or outputs with the same suffix
+            then raises a value error
+        '''
+        with self.assertRaises(ValueError):
+            self.sut.generate_outputs('3', self.outputs)
+        with self.assertRaises(ValueError):
+            self.sut.generate_outputs('3', [OutputSpec(), OutputSpec(pinyin_style=PinyinStyle.TONE_NUMBERS)])
+
+
+class TestSubtitleServiceIncrementalExternalSrtSubs(TestCase):
+    '''
+        Given the path to a file with one external subtitle with .srt extension
+        has been loaded in incremental mode
+        and a subtitle with pinyin has already been generated from it
+    '''
+
+    def setUp(self) -> None:
+        self._external_file_path = 'some/file/path/video.srt'
+        self.file_system = FileSystemFake(
+            initial_files={VIDEO_FILE_PATH: '', self._external_file_path: CHINESE_SUBTITLE_SRT})
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                VIDEO_FILE_PATH: get_embedded_ass_fixture()
+            },
+            file_system=self.file_system)
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, incremental=True)
+        self.sut.load_path(VIDEO_FILE_PATH)
+        self.assertEqual(self.sut.generate_chinese_subtitle_with_pinyin('ext-srt'),
+                         SubtitleGenerateResult.SUCCESS)
+
+    def test_generate_again_skips_up_to_date_video(self):
+        '''
+            when generating the same subtitle again
+            then returns SubtitleGenerateResult.SKIPPED_UP_TO_DATE
+        '''
+        self.assertEqual(self.sut.generate_chinese_subtitle_with_pinyin('ext-srt'),
+                         SubtitleGenerateResult.SKIPPED_UP_TO_DATE)
+
+    def test_generate_again_after_external_subtitle_changed(self):
+        '''
+            given the external subtitle content has changed
+            when generating the same subtitle again
+            then the subtitle is generated from the new content
+        '''
+        self.file_system.write(self._external_file_path,
+                               CHINESE_SUBTITLE_SRT_UNMATCHED_TIMINGS_SRT)
+
+        result = self.sut.generate_chinese_subtitle_with_pinyin('ext-srt')
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        self.assertNotEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
+                            CHINESE_SUBTITLE_WITH_PINYIN)
+
+    def test_external_subtitle_hashed_once_for_several_outputs(self):
+        '''
+            given a second output with tone numbers has been generated from it
+            when generating both outputs again
+            then returns SubtitleGenerateResult.SKIPPED_UP_TO_DATE
+            and the external subtitle is only read once, to hash it for both outputs
+        '''
+        outputs = [OutputSpec(), OutputSpec(pinyin_style=PinyinStyle.TONE_NUMBERS, suffix=' numbers.srt')]
+        self.sut.generate_outputs('ext-srt', outputs)
+        read_paths: list[str] = []
+        read = self.file_system.read
+        self.file_system.read = lambda path: read_paths.append(path) or read(path)
+
+        result = self.sut.generate_outputs('ext-srt', outputs)
+
+        self.assertEqual(result, SubtitleGenerateResult.SKIPPED_UP_TO_DATE)
+        self.assertEqual(read_paths.count(self._external_file_path), 1)
+
+
+class TestSubtitleServiceTraced(TestCase):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.SRT codec have been loaded
+        and the service records its spans
+    '''
+
+    def setUp(self) -> None:
+        self.file_path = VIDEO_FILE_PATH
+        self.file_system = FileSystemFake(initial_files={self.file_path: ''})
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                self.file_path: get_embedded_srt_fixture()
+            },
+            file_system=self.file_system)
+        self.tracer = Tracer()
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, tracer=self.tracer)
+        self.sut.load_path(self.file_path)
+
+    def test_generate_records_stages(self):
+        '''
+            when generating a subtitle with chinese, pinyin and english
+            then a span is recorded for each stage, nested in the generation span
+            and the spans count the cues and bytes processed
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_SRT)
+        self.file_info_reader.add_extracted_content(ENGLISH_SUBTITLE_SRT)
+        result = self.sut.generate_subtitle_with_additional_language(
+            chinese_subtitle_id='3',
+            other_subtitle=AddAdditionalLanguage(
+                mode=AddAdditionalLanguageMode.WITH_CHINESE_AND_PINYIN,
+                subtitle_id='2'))
+
+        self.assertEqual(result, SubtitleGenerateResult.SUCCESS)
+        spans = {span.name: span for span in self.tracer.get_spans()}
+        self.assertCountEqual(
+            [span.name for span in self.tracer.get_spans()],
+            ['prepare', 'extract', 'parse srt', 'parse srt', 'pinyin', 'merge', 'write', 'output', 'generate'])
+        self.assertEqual(spans['generate'].attributes,
+                         {'file': self.file_path, 'result': SubtitleGenerateResult.SUCCESS.value})
+        self.assertEqual(spans['extract'].attributes['tracks'], 2)
+        self.assertEqual(spans['extract'].attributes['bytes'],
+                         len(CHINESE_SUBTITLE_SRT.encode('utf-8')) + len(ENGLISH_SUBTITLE_SRT.encode('utf-8')))
+        self.assertGreater(spans['write'].attributes['cues'], 0)
+        for span in self.tracer.get_spans():
+            self.assertGreaterEqual(span.start_us, spans['generate'].start_us)
+            self.assertLessEqual(span.duration_us, spans['generate'].duration_us)
+
+    def test_generate_not_found_records_result(self):
+        '''
+            when attempting to generate a subtitle with an ID not found
+            then only the preparation is recorded, with the result in the generation span
+        '''
+        self.sut.generate_chinese_subtitle_with_pinyin(123)
+
+        self.assertEqual([span.name for span in self.tracer.get_spans()],
+                         ['prepare', 'generate'])
+        self.assertEqual(self.tracer.get_spans()[1].attributes['result'],
+                         SubtitleGenerateResult.NO_CHINESE_FOUND.value)
+
+
+class TestSubtitleServiceProfiled(TestCase):
+    '''
+        Given the path to a file with embedded
+        subtitle languages with TrackSubCodec.SRT codec have been loaded
+        and the service records its spans
+    '''
+
+    def setUp(self) -> None:
+        self.file_path = VIDEO_FILE_PATH
+        self.file_system = FileSystemFake(initial_files={self.file_path: ''})
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={
+                self.file_path: get_embedded_srt_fixture()
+            },
+            file_system=self.file_system)
+        self.tracer = Tracer()
+        self.sut = SubtitleService(
+            self.file_info_reader, self.file_system, tracer=self.tracer)
+        self.sut.load_path(self.file_path)
+
+    def test_generate_profiled(self):
+        '''
+            when generating a subtitle with chinese, pinyin and english while profiling
+            then the subtitle is generated
+            and each stage run is profiled
+            and the spans are still recorded by the tracer of the service
+        '''
+        self.file_info_reader.add_extracted_content(CHINESE_SUBTITLE_SRT)
+        self.file_info_reader.add_extracted_content(ENGLISH_SUBTITLE_SRT)
+        profiled_generation = self.sut.generate_profiled(
+            chinese_subtitle_id='3',
+            additional_subtitle=AddAdditionalLanguage(
+                mode=AddAdditionalLanguageMode.WITH_CHINESE_AND_PINYIN,
+                subtitle_id='2'))
+
+        self.assertEqual(profiled_generation.result, SubtitleGenerateResult.SUCCESS)
+        self.assertEqual(self.file_system.read(SUBTITLE_EXPECTED_PATH),
+                         CHINESE_SUBTITLE_WITH_PINYIN_AND_ENGLISH)
+        self.assertEqual(
+            {stage.name: stage.calls for stage in profiled_generation.stages},
+            {'prepare': 1, 'extract': 1, 'parse srt': 2, 'pinyin': 1, 'merge': 1, 'write': 1})
+        self.assertIn('generate', [span.name for span in self.tracer.get_spans()])
+        self.assertIs(self.sut.get_tracer(), self.tracer)
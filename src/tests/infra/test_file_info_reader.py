@@ -0,0 +1,100 @@
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from infra.file_info_reader import FileInfoReader
+from tests.fixture_file_file_info import CHINESE_SUBTITLE_SRT
+
+# Stands in for mkvextract: writes the first line of the track to the pipe, then waits for
+# the file given by the video path to exist before writing the rest, or fails when the
+# path contains `fail` without opening the pipe. It waits forever when the path contains `hang`
+FAKE_MKVEXTRACT = f'''#!{sys.executable}
+import os, sys, time
+file_path, _, track = sys.argv[1:]
+if 'fail' in file_path:
+    print('Error: the track does not exist')
+    sys.exit(2)
+first_line, rest = {CHINESE_SUBTITLE_SRT!r}.split('\\n', 1)
+with open(track.split(':', 1)[1], 'w', encoding='utf-8') as track_file:
+    track_file.write(first_line + '\\n')
+    track_file.flush()
+    waited_seconds = 0.0
+    while not os.path.exists(file_path) and (waited_seconds < 5 or 'hang' in file_path):
+        time.sleep(0.01)
+        waited_seconds += 0.01
+    track_file.write(rest)
+'''
+
+
+class TestFileInfoReaderStream(TestCase):
+    '''
+        Given mkvextract is replaced by a script that writes the track in two parts
+    '''
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tool_path = os.path.join(self.temp_dir.name, 'fake_mkvextract')
+        with open(self.tool_path, 'w', encoding='utf-8') as tool_file:
+            tool_file.write(FAKE_MKVEXTRACT)
+        os.chmod(self.tool_path, os.stat(self.tool_path).st_mode | stat.S_IEXEC)
+        self.sut = FileInfoReader(extract_timeout_seconds=10, mkvextract_path=self.tool_path)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_stream_subtitle(self):
+        '''
+            When streaming a track
+            Then its first line is read before the extraction finishes
+            And the rest of the track is read once it is written
+        '''
+        video_path = os.path.join(self.temp_dir.name, 'video.mkv')
+
+        with self.sut.stream_subtitle(video_path, 2) as lines:
+            lines_iterator = iter(lines)
+            first_line = next(lines_iterator)
+            # Lets the extraction finish
+            open(video_path, 'w').close()
+            rest = ''.join(lines_iterator)
+
+        self.assertEqual(first_line, '1\n')
+        self.assertEqual(first_line + rest, CHINESE_SUBTITLE_SRT)
+
+    def test_stream_subtitle_fails(self):
+        '''
+            When streaming a track that mkvextract fails to extract
+            Then the track is empty
+            And the failure is raised when leaving the context
+        '''
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            with self.sut.stream_subtitle('fail.mkv', 2) as lines:
+                self.assertEqual(list(lines), [])
+
+        self.assertIn(b'does not exist', context.exception.output)
+
+    def test_stream_subtitle_wait_fails(self):
+        '''
+            Given waiting for mkvextract fails
+            When streaming a track
+            Then the error of the wait is raised when leaving the context
+        '''
+        with patch.object(subprocess.Popen, 'communicate', side_effect=OSError('Wait failed')):
+            with self.assertRaisesRegex(OSError, 'Wait failed'):
+                with self.sut.stream_subtitle('fail.mkv', 2) as lines:
+                    self.assertEqual(list(lines), [])
+
+    def test_stream_subtitle_times_out(self):
+        '''
+            Given mkvextract hangs after writing the first line of the track
+            When streaming the track
+            Then the extraction is killed after the timeout, while the track is being read
+            And the timeout is raised when leaving the context
+        '''
+        sut = FileInfoReader(extract_timeout_seconds=0.5, mkvextract_path=self.tool_path)
+
+        with self.assertRaises(subprocess.TimeoutExpired):
+            with sut.stream_subtitle(os.path.join(self.temp_dir.name, 'hang.mkv'), 2) as lines:
+                self.assertEqual(list(lines), ['1\n'])
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import TestCase
+from infra.file_info_reader_async import FileInfoReaderAsync
+from infra.file_info_reader_interface import get_subtitle_tracks
+from tests.fixture_file_file_info import get_embedded_ass_fixture
+
+FIXTURE_FILE_INFO_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'fixture_file_info_ass.json')
+
+# Stands in for mkvmerge and mkvextract: waits the seconds given by the file path, like
+# `video-0.3.mkv`, then prints the probe fixture, or fails when the path contains `fail`
+FAKE_TOOL = f'''#!{sys.executable}
+import sys, time
+file_path = next(arg for arg in sys.argv[1:] if arg.endswith('.mkv'))
+if 'fail' in file_path:
+    print('Error: not a Matroska file')
+    sys.exit(2)
+time.sleep(float(file_path[len('video-'):-len('.mkv')]))
+print(open({FIXTURE_FILE_INFO_PATH!r}, encoding='utf-8').read())
+'''
+
+
+class TestFileInfoReaderAsync(TestCase):
+    '''
+        Given mkvmerge and mkvextract are replaced by a script that waits before answering
+    '''
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tool_path = os.path.join(self.temp_dir.name, 'fake_tool')
+        with open(self.tool_path, 'w', encoding='utf-8') as tool_file:
+            tool_file.write(FAKE_TOOL)
+        os.chmod(self.tool_path, os.stat(self.tool_path).st_mode | stat.S_IEXEC)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def create_sut(self, max_processes: int = 2, timeout_seconds: float | None = None) -> FileInfoReaderAsync:
+        return FileInfoReaderAsync(
+            max_processes=max_processes,
+            probe_timeout_seconds=timeout_seconds,
+            extract_timeout_seconds=timeout_seconds,
+            mkvmerge_path=self.tool_path,
+            mkvextract_path=self.tool_path)
+
+    def test_get_file_info(self):
+        '''
+            When probing a file
+            Then returns the parsed file info
+        '''
+        file_info = asyncio.run(self.create_sut().get_file_info('video-0.mkv'))
+
+        self.assertEqual(file_info, get_embedded_ass_fixture())
+
+    def test_get_subtitle_tracks(self):
+        '''
+            When probing the subtitle tracks of a file
+            Then returns the same tracks as the parsed file info
+        '''
+        subtitle_tracks = asyncio.run(self.create_sut().get_subtitle_tracks('video-0.mkv'))
+
+        self.assertEqual(subtitle_tracks, get_subtitle_tracks(get_embedded_ass_fixture()))
+
+    def test_concurrency_is_bounded(self):
+        '''
+            When extracting 4 files with at most 2 processes
+            Then the calls overlap in pairs, taking about twice the time of one call
+        '''
+        sut = self.create_sut(max_processes=2)
+
+        async def extract_all() -> None:
+            await asyncio.gather(*(sut.extract_subtitles('video-0.5.mkv', {3: f'track_{i}'})
+                                   for i in range(4)))
+
+        started_at = time.perf_counter()
+        asyncio.run(extract_all())
+        elapsed = time.perf_counter() - started_at
+
+        self.assertGreaterEqual(elapsed, 1.0)
+        self.assertLess(elapsed, 1.9)
+
+    def test_timeout_kills_the_process(self):
+        '''
+            When a call takes longer than its timeout
+            Then raises subprocess.TimeoutExpired without waiting for the process
+        '''
+        started_at = time.perf_counter()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            asyncio.run(self.create_sut(timeout_seconds=0.2).get_file_info('video-5.mkv'))
+
+        self.assertLess(time.perf_counter() - started_at, 3)
+
+    def test_cancel_kills_the_process(self):
+        '''
+            When a call is cancelled
+            Then it stops without waiting for the process
+        '''
+        async def cancel_extraction() -> None:
+            task = asyncio.ensure_future(
+                self.create_sut().extract_subtitles('video-5.mkv', {3: 'track_3'}))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        started_at = time.perf_counter()
+        asyncio.run(cancel_extraction())
+
+        self.assertLess(time.perf_counter() - started_at, 3)
+
+    def test_failed_process(self):
+        '''
+            When the process fails
+            Then raises subprocess.CalledProcessError with its output
+        '''
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            asyncio.run(self.create_sut().get_file_info('video-fail.mkv'))
+
+        self.assertEqual(context.exception.returncode, 2)
+        self.assertIn(b'not a Matroska file', context.exception.output)
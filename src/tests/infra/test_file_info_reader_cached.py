@@ -0,0 +1,115 @@
+import asyncio
+from unittest import TestCase
+from infra.file_info_reader_async_fake import FileInfoReaderAsyncFake
+from infra.file_info_reader_cached import FileInfoReaderCached, FileInfoReaderCachedAsync, ProbeCacheStats
+from infra.file_info_reader_fake import FileInfoReaderFake
+from infra.file_info_reader_interface import get_subtitle_tracks
+from infra.file_system_fake import FileSystemFake
+from tests.fixture_file_file_info import VIDEO_FILE_PATH, get_embedded_ass_fixture
+
+CACHE_DIR_PATH = 'cache/probe'
+
+
+class TestFileInfoReaderCached(TestCase):
+    '''
+        Given a video file that has not been probed yet
+    '''
+
+    def setUp(self) -> None:
+        self.file_info = get_embedded_ass_fixture()
+        self.file_system = FileSystemFake(
+            initial_files={VIDEO_FILE_PATH: 'video content'})
+        self.file_info_reader = FileInfoReaderFake(
+            path_to_info={VIDEO_FILE_PATH: self.file_info},
+            file_system=self.file_system)
+
+    def _create_sut(self) -> FileInfoReaderCached:
+        return FileInfoReaderCached(
+            self.file_info_reader, self.file_system, CACHE_DIR_PATH)
+
+    def test_get_file_info_probes_once(self):
+        '''
+            When getting the file info twice
+            Then the file is probed once
+            And the second call is a cache hit
+        '''
+        sut = self._create_sut()
+
+        self.assertEqual(sut.get_file_info(VIDEO_FILE_PATH), self.file_info)
+        self.assertEqual(sut.get_file_info(VIDEO_FILE_PATH), self.file_info)
+
+        self.assertEqual(self.file_info_reader.get_file_info_calls(),
+                         [VIDEO_FILE_PATH])
+        self.assertEqual(sut.get_stats(), ProbeCacheStats(
+            hits=1, misses=1, invalidations=0))
+
+    def test_get_file_info_from_disk(self):
+        '''
+            Given the file was probed by a previous run
+            When getting the file info
+            Then the file info is read from the cache directory without probing
+        '''
+        self._create_sut().get_file_info(VIDEO_FILE_PATH)
+        sut = self._create_sut()
+
+        self.assertEqual(sut.get_file_info(VIDEO_FILE_PATH), self.file_info)
+        self.assertEqual(len(self.file_info_reader.get_file_info_calls()), 1)
+        self.assertEqual(sut.get_stats(), ProbeCacheStats(
+            hits=1, misses=0, invalidations=0))
+
+    def test_get_file_info_after_file_changed(self):
+        '''
+            Given the file was probed by a previous run
+            And the file has changed since
+            When getting the file info
+            Then the stale entry is invalidated and the file is probed again
+        '''
+        self._create_sut().get_file_info(VIDEO_FILE_PATH)
+        self.file_system.write(VIDEO_FILE_PATH, 'new video content')
+        sut = self._create_sut()
+
+        self.assertEqual(sut.get_file_info(VIDEO_FILE_PATH), self.file_info)
+        self.assertEqual(len(self.file_info_reader.get_file_info_calls()), 2)
+        self.assertEqual(sut.get_stats(), ProbeCacheStats(
+            hits=0, misses=1, invalidations=1))
+
+    def test_get_subtitle_tracks_from_disk(self):
+        '''
+            Given the subtitle tracks of the file were probed by a previous run
+            When getting the subtitle tracks
+            Then they are read from the cache directory without probing
+            And getting the whole file info probes the file, since it was not stored
+        '''
+        self._create_sut().get_subtitle_tracks(VIDEO_FILE_PATH)
+        sut = self._create_sut()
+
+        self.assertEqual(sut.get_subtitle_tracks(VIDEO_FILE_PATH),
+                         get_subtitle_tracks(self.file_info))
+        self.assertEqual(len(self.file_info_reader.get_file_info_calls()), 1)
+        self.assertEqual(sut.get_file_info(VIDEO_FILE_PATH), self.file_info)
+        self.assertEqual(len(self.file_info_reader.get_file_info_calls()), 2)
+        self.assertEqual(sut.get_subtitle_tracks(VIDEO_FILE_PATH),
+                         get_subtitle_tracks(self.file_info))
+        self.assertEqual(sut.get_stats(), ProbeCacheStats(
+            hits=2, misses=1, invalidations=0))
+
+    def test_async_reader_shares_entries(self):
+        '''
+            Given the file was probed by the blocking reader
+            When getting the subtitle tracks of the file and of a changed copy through the async reader
+            Then only the changed copy is probed again, by the async reader
+        '''
+        sut_cached = self._create_sut()
+        sut_cached.get_subtitle_tracks(VIDEO_FILE_PATH)
+        file_info_reader_async = FileInfoReaderAsyncFake(self.file_info_reader)
+        sut = FileInfoReaderCachedAsync(file_info_reader_async, sut_cached)
+
+        subtitle_tracks = asyncio.run(sut.get_subtitle_tracks(VIDEO_FILE_PATH))
+        self.file_system.write(VIDEO_FILE_PATH, 'new video content')
+        asyncio.run(sut.get_subtitle_tracks(VIDEO_FILE_PATH))
+
+        self.assertEqual(subtitle_tracks, get_subtitle_tracks(self.file_info))
+        self.assertEqual(len(self.file_info_reader.get_file_info_calls()), 2)
+        self.assertEqual(file_info_reader_async.get_max_running_calls(), 1)
+        self.assertEqual(sut_cached.get_stats(), ProbeCacheStats(
+            hits=1, misses=2, invalidations=1))
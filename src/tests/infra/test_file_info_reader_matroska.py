@@ -0,0 +1,146 @@
+from unittest import TestCase
+from benchmarks.matroska import (
+    AUDIO, SUBTITLE, VIDEO, TrackSpec, block_group, build_cluster, build_matroska, element, simple_block)
+from infra.file_info_reader_fake import FileInfoReaderFake
+from infra.file_info_reader_interface import (
+    FileInfoDto, Language, SubtitleTrack, TrackInfo, TrackInfoProperties, TrackSubCodec, TrackType, get_subtitle_tracks)
+from infra.file_info_reader_matroska import FileInfoReaderMatroska
+from infra.file_system_fake import FileSystemFake
+from infra.matroska_probe import CLUSTER_ID
+from tests.fixture_file_file_info import get_embedded_ass_fixture
+
+VIDEO_FILE_PATH = 'video.mkv'
+TRACKS = [
+    TrackSpec(VIDEO, 'V_MPEG4/ISO/AVC'),
+    TrackSpec(AUDIO, 'A_AAC', language='chi'),
+    TrackSpec(SUBTITLE, 'S_TEXT/ASS', language='chi', codec_private=b'[Script Info]'),
+    TrackSpec(SUBTITLE, 'S_TEXT/UTF8'),
+    TrackSpec(SUBTITLE, 'S_HDMV/PGS', language='fre'),
+]
+
+
+class TestFileInfoReaderMatroska(TestCase):
+    '''
+        Given a Matroska video with video, audio and subtitle tracks
+    '''
+
+    def _create_sut(self, files: dict[str, bytes]) -> FileInfoReaderMatroska:
+        self.file_system = FileSystemFake(
+            initial_files={path: content.decode('latin-1') for path, content in files.items()})
+        self.fallback = FileInfoReaderFake(
+            path_to_info={path: get_embedded_ass_fixture() for path in files},
+            file_system=self.file_system)
+        return FileInfoReaderMatroska(self.fallback, self.file_system)
+
+    def test_get_file_info(self):
+        '''
+            When getting the file info
+            Then returns the tracks like mkvmerge, with their position as ID and the default language
+            And mkvmerge is not run
+        '''
+        sut = self._create_sut({VIDEO_FILE_PATH: build_matroska(TRACKS)})
+
+        self.assertEqual(sut.get_file_info(VIDEO_FILE_PATH), FileInfoDto(file_name=VIDEO_FILE_PATH, tracks=[
+            TrackInfo(codec='AVC/H.264/MPEG-4p10', type=TrackType.VIDEO, id=0,
+                      properties=TrackInfoProperties(language='eng')),
+            TrackInfo(codec='AAC', type=TrackType.AUDIO, id=1,
+                      properties=TrackInfoProperties(language=Language.CHINESE)),
+            TrackInfo(codec=TrackSubCodec.ASS, type=TrackType.SUBTITLE, id=2,
+                      properties=TrackInfoProperties(language=Language.CHINESE)),
+            TrackInfo(codec=TrackSubCodec.SRT, type=TrackType.SUBTITLE, id=3,
+                      properties=TrackInfoProperties(language=Language.ENGLISH)),
+            TrackInfo(codec='HDMV PGS', type=TrackType.SUBTITLE, id=4,
+                      properties=TrackInfoProperties(language='fre')),
+        ]))
+        self.assertEqual(self.fallback.get_file_info_calls(), [])
+
+    def test_get_subtitle_tracks(self):
+        '''
+            When getting the subtitle tracks
+            Then they are the same as the ones of the file info
+        '''
+        sut = self._create_sut({VIDEO_FILE_PATH: build_matroska(TRACKS)})
+
+        self.assertEqual(sut.get_subtitle_tracks(VIDEO_FILE_PATH),
+                         get_subtitle_tracks(sut.get_file_info(VIDEO_FILE_PATH)))
+
+    def test_tracks_after_clusters(self):
+        '''
+            Given the tracks are written after the clusters
+            And the BCP 47 language of newer files
+            When getting the subtitle tracks
+            Then they are found with the seek head
+        '''
+        sut = self._create_sut({VIDEO_FILE_PATH: build_matroska(
+            [TrackSpec(SUBTITLE, 'S_TEXT/UTF8', language='und', language_bcp47='zh-Hans')],
+            clusters=[element(CLUSTER_ID, bytes(1000))],
+            tracks_after_clusters=True)})
+
+        self.assertEqual(sut.get_subtitle_tracks(VIDEO_FILE_PATH), [
+            SubtitleTrack(id=0, codec=TrackSubCodec.SRT, language=Language.CHINESE)])
+
+    def test_fallback(self):
+        '''
+            Given an MP4 video, a video that is not Matroska and a WebM video with a track of unknown type
+            When getting their file info
+            Then they are probed by the decorated reader
+        '''
+        sut = self._create_sut({
+            'video.mp4': b'\x00\x00\x00\x18ftypmp42',
+            'broken.mkv': b'not matroska',
+            'video.webm': build_matroska([TrackSpec(0x20, 'B_VOBBTN')], doc_type='webm'),
+        })
+
+        for path in ['video.mp4', 'broken.mkv', 'video.webm']:
+            self.assertEqual(sut.get_file_info(path), get_embedded_ass_fixture())
+        self.assertEqual(self.fallback.get_file_info_calls(), ['video.mp4', 'broken.mkv', 'video.webm'])
+
+    def test_extract_subtitles(self):
+        '''
+            Given a Matroska video with an SRT track and a PGS track
+            When extracting both tracks
+            Then the SRT track is written without mkvextract
+            And the PGS track, which cannot be extracted natively, is extracted by the decorated reader
+        '''
+        video = build_matroska(
+            [TrackSpec(SUBTITLE, 'S_TEXT/UTF8'), TrackSpec(SUBTITLE, 'S_HDMV/PGS')],
+            clusters=[build_cluster(1000, [block_group(1, 0, 2000, b'Hello')])])
+        sut = self._create_sut({VIDEO_FILE_PATH: video})
+        self.fallback.add_extracted_content('pgs')
+
+        sut.extract_subtitles(VIDEO_FILE_PATH, {0: 'track_0.srt'})
+        sut.extract_subtitle(VIDEO_FILE_PATH, 1, 'track_1.sup')
+
+        self.assertEqual(self.file_system.read('track_0.srt'), '1\n00:00:01,000 --> 00:00:03,000\nHello\n\n')
+        self.assertEqual(self.fallback.get_extract_calls(), [(VIDEO_FILE_PATH, [1])])
+
+    def test_stream_subtitle(self):
+        '''
+            Given a Matroska video with an SRT track
+            When streaming the track
+            Then its lines are read without mkvextract
+        '''
+        video = build_matroska(
+            [TrackSpec(SUBTITLE, 'S_TEXT/UTF8')],
+            clusters=[build_cluster(1000, [block_group(1, 0, 2000, b'Hello')])])
+        sut = self._create_sut({VIDEO_FILE_PATH: video})
+
+        with sut.stream_subtitle(VIDEO_FILE_PATH, 0) as lines:
+            self.assertEqual(''.join(lines), '1\n00:00:01,000 --> 00:00:03,000\nHello\n\n')
+        self.assertEqual(self.fallback.get_extract_calls(), [])
+
+    def test_stream_subtitle_fallback_on_block(self):
+        '''
+            Given a Matroska video with an SRT track of simple blocks, without default duration
+            When streaming the track
+            Then it is streamed by the decorated reader, as the end of its events is unknown
+        '''
+        video = build_matroska(
+            [TrackSpec(SUBTITLE, 'S_TEXT/UTF8')],
+            clusters=[build_cluster(1000, [simple_block(1, 0, b'Hello')])])
+        sut = self._create_sut({VIDEO_FILE_PATH: video})
+        self.fallback.add_extracted_content('mkvextract track')
+
+        with sut.stream_subtitle(VIDEO_FILE_PATH, 0) as lines:
+            self.assertEqual(''.join(lines), 'mkvextract track')
+        self.assertEqual(self.fallback.get_extract_calls(), [(VIDEO_FILE_PATH, [0])])
@@ -0,0 +1,44 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from infra.file_system import FileSystem
+
+
+class TestFileSystemWriteAtomic(TestCase):
+    '''
+        Given a file in a temporary directory
+    '''
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'entry.json')
+        self.sut = FileSystem()
+        self.sut.write(self.path, 'old content')
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_write_atomic(self):
+        '''
+            When writing the file atomically
+            Then it has the new content
+            And no partial file is left next to it
+        '''
+        self.sut.write_atomic(self.path, 'new content')
+
+        self.assertEqual(self.sut.read(self.path), 'new content')
+        self.assertEqual(os.listdir(self.temp_dir.name), ['entry.json'])
+
+    def test_write_atomic_fails(self):
+        '''
+            Given replacing the file fails
+            When writing the file atomically
+            Then the file keeps its old content
+            And the partial file is removed
+        '''
+        with patch('os.replace', side_effect=OSError('Disk full')), self.assertRaises(OSError):
+            self.sut.write_bytes_atomic(self.path, b'new content')
+
+        self.assertEqual(self.sut.read(self.path), 'old content')
+        self.assertEqual(os.listdir(self.temp_dir.name), ['entry.json'])
@@ -0,0 +1,27 @@
+from unittest import TestCase
+from infra.file_system_fake import FileSystemFake
+
+
+class TestFileSystemFakeTempDir(TestCase):
+    def test_create_temp_dir_is_unique(self):
+        '''
+            When creating two temporary directories
+            Then each one has a different path
+        '''
+        sut = FileSystemFake()
+
+        self.assertNotEqual(sut.create_temp_dir(), sut.create_temp_dir())
+
+    def test_remove_dir(self):
+        '''
+            Given a temporary directory with a file
+            When the directory is removed
+            Then only the files inside the directory are removed
+        '''
+        sut = FileSystemFake(initial_files={'some/file/path/video.mkv': ''})
+        temp_dir = sut.create_temp_dir()
+        sut.write(sut.join_path(temp_dir, 'track_3'), 'content')
+
+        sut.remove_dir(temp_dir)
+
+        self.assertEqual(sut.get_file_paths(), ['some/file/path/video.mkv'])
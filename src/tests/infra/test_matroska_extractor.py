@@ -0,0 +1,152 @@
+from io import BytesIO
+from unittest import TestCase
+import zlib
+from benchmarks.matroska import (
+    SUBTITLE, VIDEO, TrackSpec, block_group, build_cluster, build_matroska, simple_block)
+from infra.exceptions.unsupported_matroska_exception import UnsupportedMatroskaException
+from infra.matroska_extractor import extract_text_tracks, open_text_track
+from tests.fixture_file_file_info import CHINESE_SUBTITLE_ASS, CHINESE_SUBTITLE_SRT
+
+VIDEO_FRAME_SIZE = 100_000
+# Start and end in milliseconds, and frame of each event of the fixtures
+ASS_HEADER, _ = CHINESE_SUBTITLE_ASS.split('Dialogue: ', 1)
+ASS_EVENTS = [
+    (6_850, 9_970, '0,0,Default,,0,0,0,,\u200eVIDEO 原创动画剧集'),
+    (80_350, 82_970, '1,0,Default,,0,0,0,,\u200e真不愧是天下第一刺客'),
+]
+SRT_EVENTS = [
+    (6_850, 9_970, '\u200eVIDEO 原创动画剧集'),
+    (80_350, 82_970, '\u200e真不愧是天下第一刺客'),
+]
+
+
+class _CountingFile(BytesIO):
+    '''Counts the bytes read, like the pages of a memory mapped file that are loaded'''
+
+    def __init__(self, content: bytes) -> None:
+        super().__init__(content)
+        self.read_size = 0
+
+    def read(self, size: int | None = -1) -> bytes:
+        data = super().read(size)
+        self.read_size += len(data)
+        return data
+
+
+def _build_video(tracks: list[TrackSpec], events_by_track: dict[int, list[tuple[int, int, bytes]]]) -> bytes:
+    '''A cluster per event, with a video frame before the event. The track numbers start at 1'''
+    events = sorted((start, end, track_number, frame)
+                    for track_number, track_events in events_by_track.items()
+                    for start, end, frame in track_events)
+    return build_matroska([TrackSpec(VIDEO, 'V_MPEG4/ISO/AVC'), *tracks], clusters=[
+        build_cluster(start, [
+            simple_block(1, 0, bytes(VIDEO_FRAME_SIZE)),
+            block_group(track_number, 0, end - start, frame),
+        ]) for start, end, track_number, frame in events])
+
+
+class TestMatroskaExtractor(TestCase):
+    '''
+        Given a Matroska video with a video track, and Chinese SRT and ASS tracks
+    '''
+
+    def setUp(self) -> None:
+        self.file = _CountingFile(_build_video(
+            [TrackSpec(SUBTITLE, 'S_TEXT/UTF8', 'chi'),
+             TrackSpec(SUBTITLE, 'S_TEXT/ASS', 'chi', codec_private=ASS_HEADER.encode('utf-8'))],
+            {2: [(start, end, text.encode('utf-8')) for start, end, text in SRT_EVENTS],
+             3: [(start, end, text.encode('utf-8')) for start, end, text in ASS_EVENTS]}))
+
+    def test_extract_text_tracks(self):
+        '''
+            When extracting the SRT and ASS tracks
+            Then their content is the same as the muxed subtitles
+            And the ASS header is the codec private data
+        '''
+        self.assertEqual(extract_text_tracks(self.file, [1, 2]), {
+            1: CHINESE_SUBTITLE_SRT,
+            2: CHINESE_SUBTITLE_ASS,
+        })
+
+    def test_video_frames_not_read(self):
+        '''
+            When extracting a track
+            Then the video frames are skipped without being read
+        '''
+        extract_text_tracks(self.file, [2])
+
+        self.assertLess(self.file.read_size, VIDEO_FRAME_SIZE)
+
+    def test_open_text_track(self):
+        '''
+            When opening the SRT and ASS tracks
+            Then their lines are the same as the muxed subtitles
+        '''
+        for track_id, expected_content in [(1, CHINESE_SUBTITLE_SRT), (2, CHINESE_SUBTITLE_ASS)]:
+            self.assertEqual(''.join(open_text_track(self.file, track_id)), expected_content)
+
+    def test_unsupported_codec(self):
+        '''
+            When extracting the video track
+            Then raises an unsupported Matroska exception, to extract it with mkvextract
+        '''
+        with self.assertRaises(UnsupportedMatroskaException):
+            extract_text_tracks(self.file, [0])
+        with self.assertRaises(UnsupportedMatroskaException):
+            open_text_track(self.file, 0)
+
+
+class TestMatroskaExtractorCompressed(TestCase):
+    def test_extract_compressed_tracks(self):
+        '''
+            Given a Matroska video with an SRT track compressed with zlib
+            And an SRT track with the start of its frames stripped
+            When extracting the tracks
+            Then their frames are decompressed
+        '''
+        file = BytesIO(_build_video(
+            [TrackSpec(SUBTITLE, 'S_TEXT/UTF8', compression=(0, b'')),
+             TrackSpec(SUBTITLE, 'S_TEXT/UTF8', compression=(3, '\u200e'.encode('utf-8')))],
+            {2: [(start, end, zlib.compress(text.encode('utf-8'))) for start, end, text in SRT_EVENTS],
+             3: [(start, end, text.encode('utf-8')[len('\u200e'.encode('utf-8')):])
+                 for start, end, text in SRT_EVENTS]}))
+
+        self.assertEqual(extract_text_tracks(file, [1, 2]), {
+            1: CHINESE_SUBTITLE_SRT,
+            2: CHINESE_SUBTITLE_SRT,
+        })
+
+
+class TestMatroskaExtractorSimpleBlocks(TestCase):
+    '''
+        Given a Matroska video with an SRT track whose events are simple blocks
+    '''
+
+    def _build_video(self, default_duration: int | None) -> BytesIO:
+        return BytesIO(build_matroska(
+            [TrackSpec(VIDEO, 'V_MPEG4/ISO/AVC'),
+             TrackSpec(SUBTITLE, 'S_TEXT/UTF8', 'chi', default_duration=default_duration)],
+            clusters=[build_cluster(start, [simple_block(2, 0, text.encode('utf-8'))])
+                      for start, _, text in SRT_EVENTS]))
+
+    def test_extract_with_default_duration(self):
+        '''
+            Given the track has a default duration
+            When extracting the track
+            Then every event lasts the default duration
+        '''
+        file = self._build_video(default_duration=3_120_000_000)
+
+        self.assertEqual(extract_text_tracks(file, [1]), {
+            1: '1\n00:00:06,850 --> 00:00:09,970\n\u200eVIDEO 原创动画剧集\n\n'
+               '2\n00:01:20,350 --> 00:01:23,470\n\u200e真不愧是天下第一刺客\n\n',
+        })
+
+    def test_extract_without_default_duration(self):
+        '''
+            Given the track has no default duration
+            When extracting the track
+            Then raises an unsupported Matroska exception, to extract it with mkvextract
+        '''
+        with self.assertRaises(UnsupportedMatroskaException):
+            extract_text_tracks(self._build_video(default_duration=None), [1])
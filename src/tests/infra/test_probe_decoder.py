@@ -0,0 +1,56 @@
+from unittest import TestCase
+import json
+from benchmarks.probe import generate_probe_output
+from infra.file_info_reader_interface import FileInfoDto, Language, SubtitleTrack, TrackSubCodec, get_subtitle_tracks
+from infra.probe_decoder import decode_subtitle_tracks, get_subtitle_tracks_from_dict, subtitle_tracks_to_dict
+
+FIXTURE_PATHS = ['src/tests/fixture_file_info_ass.json',
+                 'src/tests/fixture_file_info_srt.json']
+
+
+class TestProbeDecoder(TestCase):
+    '''
+        Given the mkvmerge output of a video
+    '''
+
+    def test_decode_same_as_pydantic(self):
+        '''
+            When decoding the subtitle tracks of the fixtures and of a video with attachments and chapters
+            Then the tracks are the same as the ones of the file info validated with pydantic
+        '''
+        raw_jsons = [open(path, 'rb').read() for path in FIXTURE_PATHS]
+        raw_jsons.append(generate_probe_output(subtitle_count=4, attachment_count=2))
+
+        for raw_json in raw_jsons:
+            self.assertEqual(decode_subtitle_tracks(raw_json),
+                             get_subtitle_tracks(FileInfoDto.parse_raw(raw_json)))
+
+    def test_decode_only_subtitle_tracks(self):
+        '''
+            When decoding the subtitle tracks
+            Then the video and audio tracks are skipped
+            And the known codecs and languages are converted to their enums
+        '''
+        raw_json = json.dumps({'tracks': [
+            {'codec': 'AAC', 'id': 0, 'type': 'audio', 'properties': {'language': 'chi'}},
+            {'codec': 'SubRip/SRT', 'id': 1, 'type': 'subtitles', 'properties': {'language': 'chi'}},
+            {'codec': 'HDMV PGS', 'id': 2, 'type': 'subtitles', 'properties': {'language': 'fre'}},
+            {'codec': 'SubStationAlpha', 'id': 3, 'type': 'subtitles', 'properties': {}},
+        ]})
+
+        self.assertEqual(decode_subtitle_tracks(raw_json), [
+            SubtitleTrack(id=1, codec=TrackSubCodec.SRT, language=Language.CHINESE),
+            SubtitleTrack(id=2, codec='HDMV PGS', language='fre'),
+            SubtitleTrack(id=3, codec=TrackSubCodec.ASS, language='und'),
+        ])
+
+    def test_subtitle_tracks_to_dict(self):
+        '''
+            When converting the subtitle tracks to the mkvmerge format
+            Then they are decoded back to the same tracks
+        '''
+        subtitle_tracks = decode_subtitle_tracks(
+            generate_probe_output(subtitle_count=3, attachment_count=0))
+
+        self.assertEqual(get_subtitle_tracks_from_dict(
+            json.loads(json.dumps(subtitle_tracks_to_dict(subtitle_tracks)))), subtitle_tracks)
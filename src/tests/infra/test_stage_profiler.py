@@ -0,0 +1,94 @@
+from unittest import TestCase
+import marshal
+import tracemalloc
+from infra.file_system_fake import FileSystemFake
+from infra.stage_profiler import StageProfile, StageProfiler, write_profile_reports
+from infra.tracer import Tracer
+
+REPORTS_DIR_PATH = 'profiles'
+
+
+def _parse() -> list[str]:
+    return [str(number) * 100 for number in range(1000)]
+
+
+def _convert() -> int:
+    return sum(range(1000))
+
+
+def _get_functions(stage_profile: StageProfile) -> list[str]:
+    stage_profile.profile.create_stats()
+    return [function_name for _, _, function_name in stage_profile.profile.stats]
+
+
+class TestStageProfiler(TestCase):
+    '''
+        Given a profiler of the parse and pinyin stages
+    '''
+
+    def setUp(self) -> None:
+        self.tracer = Tracer()
+        self.sut = StageProfiler(self.tracer, stages=['parse', 'pinyin'])
+        self.sut.start()
+        self.addCleanup(self.sut.stop)
+
+    def test_profiles_stages(self):
+        '''
+            When the parse stage runs twice and the pinyin stage once, nested in the first parse
+            Then each stage is profiled without the stages nested in it
+            And the memory allocated by the parse stage is reported
+            And the spans are recorded by the tracer
+        '''
+        with self.sut.span('parse'):
+            lines = _parse()
+            with self.sut.span('pinyin'):
+                _convert()
+        with self.sut.span('parse'):
+            _parse()
+        with self.sut.span('write'):
+            _convert()
+
+        profiles = {profile.name: profile for profile in self.sut.get_profiles()}
+        self.assertEqual(list(profiles), ['parse', 'pinyin'])
+        self.assertEqual(profiles['parse'].calls, 2)
+        self.assertEqual(profiles['pinyin'].calls, 1)
+        parse_functions = set(_get_functions(profiles['parse']))
+        pinyin_functions = set(_get_functions(profiles['pinyin']))
+        self.assertIn('_parse', parse_functions)
+        self.assertNotIn('_convert', parse_functions)
+        self.assertIn('_convert', pinyin_functions)
+        self.assertGreater(profiles['parse'].peak_bytes, 100_000)
+        self.assertGreater(profiles['parse'].allocations[0].size_bytes, 100_000)
+        self.assertEqual([span.name for span in self.tracer.get_spans()],
+                         ['pinyin', 'parse', 'parse', 'write'])
+        self.assertEqual(len(lines), 1000)
+
+    def test_write_reports(self):
+        '''
+            When writing the reports of a profiled stage
+            Then a pstats file and a text report are written for the stage
+            And a summary of every stage
+        '''
+        with self.sut.span('parse'):
+            _parse()
+        file_system = FileSystemFake(directory_path=REPORTS_DIR_PATH)
+
+        paths = write_profile_reports(
+            file_system, REPORTS_DIR_PATH, self.sut.get_profiles())
+
+        self.assertEqual(paths, [f'{REPORTS_DIR_PATH}/parse.pstats',
+                                 f'{REPORTS_DIR_PATH}/parse.txt',
+                                 f'{REPORTS_DIR_PATH}/summary.txt'])
+        stats = marshal.loads(file_system.read_bytes(paths[0]))
+        self.assertIn('_parse', {function_name for _, _, function_name in stats})
+        self.assertIn('_parse', file_system.read(paths[1]))
+        self.assertIn('parse', file_system.read(paths[2]))
+
+    def test_stop_tracemalloc_started(self):
+        '''
+            When stopping the profiler
+            Then tracemalloc is stopped, since the profiler started it
+        '''
+        self.sut.stop()
+
+        self.assertFalse(tracemalloc.is_tracing())
@@ -0,0 +1,154 @@
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+import asyncio
+import os
+from infra.tracer import NullTracer, Tracer, format_summary, summarize, to_chrome_trace
+from infra.tracer_interface import SpanRecord
+
+
+def _record_span(tracer: Tracer) -> tuple[int, list[SpanRecord]]:
+    with tracer.span('worker', cues=2):
+        pass
+    return (os.getpid(), tracer.take_spans())
+
+
+class TestTracer(TestCase):
+    '''
+        Given a tracer
+    '''
+
+    def test_span_records_attributes(self):
+        '''
+            When a span is closed, after setting an attribute inside it
+            Then the span is recorded with the attributes given and set
+        '''
+        sut = Tracer()
+
+        with sut.span('parse', file='video.mkv') as span:
+            span.set('cues', 3)
+
+        spans = sut.get_spans()
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0].name, 'parse')
+        self.assertEqual(spans[0].attributes, {'file': 'video.mkv', 'cues': 3})
+        self.assertEqual(spans[0].pid, os.getpid())
+        self.assertGreaterEqual(spans[0].duration_us, 0)
+
+    def test_span_recorded_on_error(self):
+        '''
+            When the code inside a span raises
+            Then the span is recorded anyway
+        '''
+        sut = Tracer()
+
+        with self.assertRaises(ValueError):
+            with sut.span('parse'):
+                raise ValueError()
+
+        self.assertEqual([span.name for span in sut.get_spans()], ['parse'])
+
+    def test_take_spans_only_new(self):
+        '''
+            When taking the spans twice
+            Then the second time only returns the spans closed since the first
+        '''
+        sut = Tracer()
+        with sut.span('first'):
+            pass
+        first_spans = sut.take_spans()
+        with sut.span('second'):
+            pass
+
+        self.assertEqual([span.name for span in first_spans], ['first'])
+        self.assertEqual([span.name for span in sut.take_spans()], ['second'])
+
+    def test_spans_of_asyncio_tasks_on_different_lanes(self):
+        '''
+            When spans are recorded by concurrent asyncio tasks
+            Then each task has its own lane, so the spans are not shown nested
+        '''
+        sut = Tracer()
+
+        async def record_span() -> None:
+            with sut.span('extract'):
+                await asyncio.sleep(0)
+
+        async def record_spans() -> None:
+            await asyncio.gather(record_span(), record_span())
+
+        asyncio.run(record_spans())
+
+        self.assertEqual(len({span.tid for span in sut.get_spans()}), 2)
+
+    def test_merge_spans_of_worker_process(self):
+        '''
+            When a span is recorded by a worker process
+            Then its spans can be merged into the tracer of the main process
+        '''
+        sut = Tracer()
+
+        with ProcessPoolExecutor(1) as executor:
+            worker_pid, spans = executor.submit(_record_span, sut).result()
+        sut.merge_spans(spans)
+
+        self.assertEqual([span.name for span in sut.get_spans()], ['worker'])
+        self.assertEqual(sut.get_spans()[0].pid, worker_pid)
+        self.assertEqual(sut.take_spans(), [])
+
+    def test_null_tracer_records_nothing(self):
+        '''
+            Given the tracing is disabled
+            When a span is closed
+            Then nothing is recorded
+        '''
+        sut = NullTracer()
+
+        with sut.span('parse') as span:
+            span.set('cues', 3)
+
+        self.assertEqual(sut.take_spans(), [])
+
+
+class TestTracerExport(TestCase):
+    '''
+        Given spans of several stages
+    '''
+
+    def setUp(self) -> None:
+        self.spans = [
+            SpanRecord(name='parse', start_us=0, duration_us=1000, pid=1, tid=1,
+                       attributes={'cues': 10, 'bytes': 500, 'file': 'a.mkv'}),
+            SpanRecord(name='parse', start_us=2000, duration_us=3000, pid=1, tid=1,
+                       attributes={'cues': 20, 'bytes': 1500, 'file': 'b.mkv'}),
+            SpanRecord(name='extract', start_us=0, duration_us=8000, pid=2, tid=5,
+                       attributes={'tracks': 1}),
+        ]
+
+    def test_to_chrome_trace(self):
+        '''
+            When exporting them as a Chrome trace
+            Then each span is a complete event with its timings in microseconds
+        '''
+        trace = to_chrome_trace(self.spans)
+
+        self.assertEqual(trace['traceEvents'][2], {
+            'name': 'extract', 'ph': 'X', 'ts': 0, 'dur': 8000,
+            'pid': 2, 'tid': 5, 'args': {'tracks': 1}})
+
+    def test_summarize(self):
+        '''
+            When summarizing them
+            Then the spans are totalled by stage, the longest stage first
+        '''
+        summaries = summarize(self.spans)
+
+        self.assertEqual([summary.name for summary in summaries],
+                         ['extract', 'parse'])
+        parse_summary = summaries[1]
+        self.assertEqual(parse_summary.count, 2)
+        self.assertAlmostEqual(parse_summary.total_seconds, 0.004)
+        self.assertAlmostEqual(parse_summary.mean_seconds, 0.002)
+        self.assertAlmostEqual(parse_summary.max_seconds, 0.003)
+        self.assertEqual(parse_summary.cues, 30)
+        self.assertEqual(parse_summary.bytes, 2000)
+        self.assertEqual(len(format_summary(summaries).splitlines()), 3)
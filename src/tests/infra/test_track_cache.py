@@ -0,0 +1,80 @@
+from unittest import TestCase
+from infra.file_system_fake import FileSystemFake
+from infra.track_cache import TrackCache, TrackCacheStats
+from tests.fixture_file_file_info import VIDEO_FILE_PATH
+
+CACHE_DIR_PATH = 'cache/tracks'
+TRACK_PATH = 'tmp/track_3'
+OUTPUT_PATH = 'tmp/cached_track_3'
+
+
+class TestTrackCache(TestCase):
+    '''
+        Given a video whose track 3 has been extracted
+    '''
+
+    def setUp(self) -> None:
+        self.file_system = FileSystemFake(initial_files={
+            VIDEO_FILE_PATH: 'video content',
+            TRACK_PATH: 'track 3',
+        })
+        self.file_stat = self.file_system.get_file_stat(VIDEO_FILE_PATH)
+
+    def _get_cached_paths(self) -> list[str]:
+        return [path for path in self.file_system.get_file_paths() if path.startswith(CACHE_DIR_PATH)]
+
+    def test_get_stored_track(self):
+        '''
+            When storing the track
+            Then it is copied to the output path when getting it, even by another cache on the same directory
+            And the other tracks of the video are not cached
+        '''
+        TrackCache(self.file_system, CACHE_DIR_PATH).put(VIDEO_FILE_PATH, self.file_stat, 3, TRACK_PATH)
+        sut = TrackCache(self.file_system, CACHE_DIR_PATH)
+
+        self.assertTrue(sut.get(VIDEO_FILE_PATH, self.file_stat, 3, OUTPUT_PATH))
+        self.assertFalse(sut.get(VIDEO_FILE_PATH, self.file_stat, 2, 'tmp/cached_track_2'))
+        self.assertEqual(self.file_system.read(OUTPUT_PATH), 'track 3')
+        self.assertEqual(sut.get_stats(), TrackCacheStats(hits=1, misses=1, evictions=0))
+
+    def test_get_after_video_changed(self):
+        '''
+            Given the video changed after storing its track
+            When getting the track
+            Then it is not cached
+        '''
+        sut = TrackCache(self.file_system, CACHE_DIR_PATH)
+        sut.put(VIDEO_FILE_PATH, self.file_stat, 3, TRACK_PATH)
+        self.file_system.write(VIDEO_FILE_PATH, 'new video content')
+
+        self.assertFalse(sut.get(VIDEO_FILE_PATH, self.file_system.get_file_stat(VIDEO_FILE_PATH), 3, OUTPUT_PATH))
+        self.assertFalse(self.file_system.path_exists(OUTPUT_PATH))
+
+    def test_evict_least_recently_used(self):
+        '''
+            Given a cache that fits 2 tracks
+            When storing 3 tracks, after getting the first one
+            Then the second track is evicted, as the first one was used more recently
+        '''
+        sut = TrackCache(self.file_system, CACHE_DIR_PATH, max_bytes=2 * len('track 3'))
+        for track_id in [1, 2]:
+            sut.put(VIDEO_FILE_PATH, self.file_stat, track_id, TRACK_PATH)
+        sut.get(VIDEO_FILE_PATH, self.file_stat, 1, OUTPUT_PATH)
+
+        sut.put(VIDEO_FILE_PATH, self.file_stat, 3, TRACK_PATH)
+
+        self.assertEqual(len(self._get_cached_paths()), 2)
+        self.assertEqual([sut.get(VIDEO_FILE_PATH, self.file_stat, track_id, OUTPUT_PATH) for track_id in [1, 2, 3]],
+                         [True, False, True])
+        self.assertEqual(sut.get_stats().evictions, 1)
+
+    def test_keep_track_larger_than_cache(self):
+        '''
+            Given a cache smaller than the track
+            When storing the track
+            Then it is kept until another track is stored
+        '''
+        sut = TrackCache(self.file_system, CACHE_DIR_PATH, max_bytes=1)
+        sut.put(VIDEO_FILE_PATH, self.file_stat, 3, TRACK_PATH)
+
+        self.assertTrue(sut.get(VIDEO_FILE_PATH, self.file_stat, 3, OUTPUT_PATH))
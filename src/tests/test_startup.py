@@ -0,0 +1,23 @@
+import json
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+SRC_DIR_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Only needed by later stages, so importing them at start would slow down the tool
+DEFERRED_MODULES = ['pypinyin', 'prompt_toolkit', 'srt', 'multiprocessing', 'asyncio']
+
+
+class TestStartup(TestCase):
+    def test_slow_modules_not_imported_at_start(self):
+        '''
+            When the tool is started
+            Then the modules only needed by later stages are not imported yet
+        '''
+        code = 'import json, sys, main; ' \
+            f'print(json.dumps([name for name in {json.dumps(DEFERRED_MODULES)} if name in sys.modules]))'
+        output = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR_PATH,
+                                check=True, capture_output=True, text=True).stdout
+
+        self.assertEqual(json.loads(output), [])